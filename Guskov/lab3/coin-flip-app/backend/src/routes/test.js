@@ -0,0 +1,70 @@
+const express = require('express');
+const db = require('../config/database');
+const router = express.Router();
+
+// Служебные маршруты для подготовки данных в UI-тестах.
+// Подключаются только при ENABLE_TEST_API=true (см. server.js)
+
+// Пользователь по имени
+router.get('/user', async (req, res) => {
+  try {
+    const result = await db.query(
+      'SELECT id, username, email, balance FROM users WHERE username = $1',
+      [req.query.username]
+    );
+
+    if (result.rows.length === 0) {
+      return res.status(404).json({ error: 'Пользователь не найден' });
+    }
+
+    res.json(result.rows[0]);
+  } catch (error) {
+    console.error(error);
+    res.status(500).json({ error: 'Ошибка сервера' });
+  }
+});
+
+// Установка баланса
+router.put('/balance', async (req, res) => {
+  try {
+    const { username, balance } = req.body;
+
+    if (balance === undefined || balance < 0) {
+      return res.status(400).json({ error: 'Неверный баланс' });
+    }
+
+    const result = await db.query(
+      'UPDATE users SET balance = $1 WHERE username = $2 RETURNING id, username, email, balance',
+      [balance, username]
+    );
+
+    if (result.rows.length === 0) {
+      return res.status(404).json({ error: 'Пользователь не найден' });
+    }
+
+    res.json(result.rows[0]);
+  } catch (error) {
+    console.error(error);
+    res.status(500).json({ error: 'Ошибка сервера' });
+  }
+});
+
+// Удаление тестового пользователя вместе со ставками
+router.delete('/cleanup', async (req, res) => {
+  try {
+    const { username } = req.body;
+
+    await db.query(
+      'DELETE FROM bets WHERE user_id IN (SELECT id FROM users WHERE username = $1)',
+      [username]
+    );
+    const result = await db.query('DELETE FROM users WHERE username = $1', [username]);
+
+    res.json({ deleted: result.rowCount });
+  } catch (error) {
+    console.error(error);
+    res.status(500).json({ error: 'Ошибка сервера' });
+  }
+});
+
+module.exports = router;
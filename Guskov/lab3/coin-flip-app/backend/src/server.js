@@ -13,7 +13,7 @@ const PORT = process.env.PORT || 3000;
 
 const limiter = rateLimit({
   windowMs: 15 * 60 * 1000,
-  max: 100
+  max: parseInt(process.env.RATE_LIMIT_MAX || '100', 10)
 });
 
 app.use(cors());
@@ -62,6 +62,11 @@ app.use('/api/auth', authRoutes);
 app.use('/api/game', gameRoutes);
 app.use('/api/leaderboard', leaderboardRoutes);
 
+// Служебные маршруты для UI-тестов
+if (process.env.ENABLE_TEST_API === 'true') {
+  app.use('/api/test', require('./routes/test'));
+}
+
 // Обработка 404
 app.use('*', (req, res) => {
   res.status(404).json({ error: 'Маршрут не найден' });
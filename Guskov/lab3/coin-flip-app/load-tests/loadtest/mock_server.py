@@ -0,0 +1,140 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, urlparse
+
+START_BALANCE = 1000.0
+
+
+class MockState:
+    """Данные мок-сервера в памяти (пользователи, токены, ставки)"""
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.users = {}   # username -> {"id", "username", "email", "password", "balance"}
+        self.tokens = {}  # token -> username
+        self.bets = 0
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Повторяет ответы backend/src/routes (auth, game, leaderboard) без БД"""
+
+    protocol_version = "HTTP/1.1"
+    state: MockState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _user(self):
+        token = (self.headers.get("Authorization") or "").replace("Bearer ", "")
+        username = self.state.tokens.get(token)
+        return self.state.users.get(username) if username else None
+
+    def _simulate(self) -> bool:
+        """Задержка и случайные ошибки сервера; False — ответить 500"""
+        if self.state.latency_ms:
+            time.sleep(self.state.rng.expovariate(1 / self.state.latency_ms) / 1000)
+        return self.state.rng.random() >= self.state.error_rate
+
+    @staticmethod
+    def _public(user: dict) -> dict:
+        return {key: user[key] for key in ("id", "username", "email", "balance")}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not self._simulate():
+            return self._send(500, {"error": "Ошибка сервера"})
+        if url.path == "/health":
+            return self._send(200, {"status": "OK"})
+        if url.path == "/api/leaderboard":
+            limit = int(parse_qs(url.query).get("limit", ["10"])[0])
+            with self.state.lock:
+                top = sorted(self.state.users.values(), key=lambda u: -u["balance"])[:limit]
+                rows = [{"username": u["username"], "balance": u["balance"]} for u in top]
+            return self._send(200, rows)
+        self._send(404, {"error": "Маршрут не найден"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        data = self._json()
+        if not self._simulate():
+            return self._send(500, {"error": "Ошибка сервера"})
+        state = self.state
+
+        if url.path == "/api/auth/register":
+            with state.lock:
+                if data["username"] in state.users:
+                    return self._send(400, {"error": "Пользователь уже существует"})
+                user = {"id": len(state.users) + 1, "username": data["username"], "email": data["email"],
+                        "password": data["password"], "balance": START_BALANCE}
+                state.users[user["username"]] = user
+                token = uuid.uuid4().hex
+                state.tokens[token] = user["username"]
+            return self._send(201, {"message": "Пользователь создан", "token": token, "user": self._public(user)})
+
+        if url.path == "/api/auth/login":
+            with state.lock:
+                user = state.users.get(data.get("username"))
+                if not user or user["password"] != data.get("password"):
+                    return self._send(400, {"error": "Неверные учетные данные"})
+                token = uuid.uuid4().hex
+                state.tokens[token] = user["username"]
+            return self._send(200, {"message": "Вход выполнен", "token": token, "user": self._public(user)})
+
+        if url.path in ("/api/game/flip", "/api/game/quick-bet"):
+            user = self._user()
+            if user is None:
+                return self._send(401, {"error": "Токен доступа отсутствует"})
+            amount, side = data.get("amount"), data.get("chosenSide")
+            if not amount or amount <= 0 or side not in ("heads", "tails"):
+                return self._send(400, {"error": "Неверные параметры ставки"})
+            with state.lock:
+                if user["balance"] < amount:
+                    return self._send(400, {"error": "Недостаточно средств"})
+                result = "heads" if state.rng.random() < 0.5 else "tails"
+                win = result == side
+                user["balance"] += amount if win else -amount
+                state.bets += 1
+            return self._send(200, {"result": result, "win": win, "payout": amount * 2 if win else 0,
+                                    "newBalance": user["balance"]})
+
+        self._send(404, {"error": "Маршрут не найден"})
+
+
+def start_mock_server(port: int = 0, latency_ms: float = 0.0, error_rate: float = 0.0,
+                      seed: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Запустить мок API в фоновом потоке.
+
+    Args:
+        port: Порт (0 — любой свободный)
+        latency_ms: Средняя искусственная задержка ответа
+        error_rate: Доля ответов 500
+
+    Returns:
+        (сервер — остановить через shutdown(), базовый URL)
+    """
+    handler = type("BoundMockHandler", (MockHandler,), {"state": MockState(latency_ms, error_rate, seed)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-api", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
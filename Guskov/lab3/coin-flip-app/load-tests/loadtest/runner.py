@@ -0,0 +1,103 @@
+"""
+Нагрузочный прогон API Coin Flip.
+
+Примеры:
+    python -m loadtest.runner --base-url http://localhost:3000 --users 50 --ramp-up 30 --duration 120
+    python -m loadtest.runner --mock --users 200 --duration 20
+    python -m loadtest.runner --mock --compare reports/baseline.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import httpx
+
+from .mock_server import start_mock_server
+from .scenarios import DEFAULT_WEIGHTS, VirtualUser
+from .stats import RunStats, format_report, load_report, save_report
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "reports")
+REQUEST_TIMEOUT = 10.0
+
+
+async def run_load(base_url: str, users: int = 10, ramp_up: float = 10.0, duration: float = 60.0,
+                   think_time: float = 0.5, weights: Optional[Dict[str, float]] = None,
+                   seed: Optional[int] = None) -> dict:
+    """
+    Запустить `users` виртуальных пользователей и собрать отчет.
+
+    Пользователи подключаются равномерно за `ramp_up` секунд, весь прогон
+    длится `duration` секунд с момента старта (разгон входит в него).
+    Все пользователи делят один пул соединений httpx.
+    """
+    config = {
+        "base_url": base_url, "users": users, "ramp_up_s": ramp_up, "duration_s": duration,
+        "think_time_s": think_time, "weights": weights or DEFAULT_WEIGHTS, "seed": seed,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    stats = RunStats()
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=REQUEST_TIMEOUT, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        virtual_users = [
+            VirtualUser(client, stats, random.Random(rng.random()), think_time, weights)
+            for _ in range(users)
+        ]
+        await asyncio.gather(*(
+            user.run(start + ramp_up * i / users, deadline)
+            for i, user in enumerate(virtual_users)
+        ))
+        elapsed = time.perf_counter() - start
+    return stats.report(config, elapsed)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API Coin Flip")
+    parser.add_argument("--base-url", default=os.getenv("API_URL", "http://localhost:3000"))
+    parser.add_argument("--users", type=int, default=10, help="Число виртуальных пользователей")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Время разгона, с")
+    parser.add_argument("--duration", type=float, default=60.0, help="Длительность прогона, с")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Средняя пауза между действиями, с")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--mock", action="store_true", help="Поднять локальный мок API вместо --base-url")
+    parser.add_argument("--mock-latency-ms", type=float, default=0.0)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--report", default=None, help="Путь к JSON-отчету (по умолчанию reports/<время>.json)")
+    parser.add_argument("--compare", default=None, help="JSON-отчет прошлого прогона для сравнения")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None
+    base_url = args.base_url
+    if args.mock:
+        server, base_url = start_mock_server(latency_ms=args.mock_latency_ms,
+                                             error_rate=args.mock_error_rate, seed=args.seed or 0)
+        print(f"🧪 Мок API: {base_url}")
+
+    print(f"🚀 {args.users} пользователей, разгон {args.ramp_up} с, прогон {args.duration} с → {base_url}")
+    try:
+        report = asyncio.run(run_load(base_url, args.users, args.ramp_up, args.duration,
+                                      args.think_time, seed=args.seed))
+    finally:
+        if server:
+            server.shutdown()
+
+    path = args.report or os.path.join(REPORTS_DIR, f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    save_report(report, path)
+
+    baseline = load_report(args.compare) if args.compare else None
+    print(format_report(report, baseline))
+    print(f"📄 Отчет: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import asyncio
+import random
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from .stats import RunStats
+
+# Те же сценарии, что проходят Selenium-тесты через страницы
+# (LoginPage, GamePage, LeaderboardPage), но напрямую через API
+DEFAULT_WEIGHTS = {"flip": 0.6, "quick_bet": 0.1, "leaderboard": 0.3}
+BET_AMOUNTS = (1, 5, 10, 25)
+QUICK_BET_AMOUNTS = (10, 50, 100)  # кнопки быстрых ставок на странице игры
+PASSWORD = "LoadTest123!"
+
+
+class VirtualUser:
+    """
+    Виртуальный пользователь: регистрация, вход, затем ставки и просмотр
+    таблицы лидеров вперемешку с паузами «на подумать» до конца прогона.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, stats: RunStats, rng: random.Random,
+                 think_time: float = 0.5, weights: Optional[Dict[str, float]] = None):
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time
+        self.weights = weights or DEFAULT_WEIGHTS
+        self.username = f"load_{uuid.uuid4().hex[:12]}"
+        self.token: Optional[str] = None
+        self.balance = 0.0
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    async def request(self, method: str, path: str, ok_statuses: Tuple[int, ...] = (200,),
+                      name: Optional[str] = None, **kwargs) -> Optional[dict]:
+        """Запрос с записью задержки и статуса в статистику эндпоинта"""
+        name = name or f"{method} {path}"
+        start = time.perf_counter()
+        status, body = None, None
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+            status = response.status_code
+            if response.headers.get("content-type", "").startswith("application/json"):
+                body = response.json()
+        except httpx.HTTPError:
+            pass
+        ok = status in ok_statuses
+        self.stats.record(name, (time.perf_counter() - start) * 1000, status, ok)
+        return body if ok else None
+
+    # Сценарии
+    async def register(self) -> bool:
+        body = await self.request("POST", "/api/auth/register", ok_statuses=(201,), json={
+            "username": self.username,
+            "email": f"{self.username}@load.test",
+            "password": PASSWORD,
+        })
+        return body is not None
+
+    async def login(self) -> bool:
+        body = await self.request("POST", "/api/auth/login", json={
+            "username": self.username,
+            "password": PASSWORD,
+        })
+        if body:
+            self.token = body["token"]
+            self.balance = float(body["user"]["balance"])
+        return body is not None
+
+    async def _bet(self, path: str, amounts: Tuple[int, ...]):
+        affordable = [amount for amount in amounts if amount <= self.balance]
+        if not affordable:
+            # Баланс кончился — остается смотреть таблицу лидеров
+            return await self.leaderboard()
+        body = await self.request("POST", path, json={
+            "amount": self.rng.choice(affordable),
+            "chosenSide": self.rng.choice(["heads", "tails"]),
+        })
+        if body:
+            self.balance = float(body["newBalance"])
+
+    async def flip(self):
+        await self._bet("/api/game/flip", BET_AMOUNTS)
+
+    async def quick_bet(self):
+        await self._bet("/api/game/quick-bet", QUICK_BET_AMOUNTS)
+
+    async def leaderboard(self):
+        await self.request("GET", "/api/leaderboard", params={"limit": 10}, name="GET /api/leaderboard")
+
+    async def think(self):
+        if self.think_time:
+            # Экспоненциальные паузы: поток запросов ближе к живым пользователям
+            await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+
+    async def run(self, start_at: float, deadline: float):
+        await asyncio.sleep(max(0.0, start_at - time.perf_counter()))
+        if not await self.register() or not await self.login():
+            return
+        actions = list(self.weights)
+        weights = [self.weights[action] for action in actions]
+        while time.perf_counter() < deadline:
+            await self.think()
+            if time.perf_counter() >= deadline:
+                break
+            await getattr(self, self.rng.choices(actions, weights)[0])()
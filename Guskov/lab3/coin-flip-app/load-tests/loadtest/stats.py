@@ -0,0 +1,141 @@
+import json
+import math
+from typing import Dict, Optional
+
+# Логарифмические корзины: шаг 5%, то есть погрешность перцентилей не больше 5%
+BUCKET_GROWTH = 1.05
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек с логарифмическими корзинами.
+    Память не зависит от числа запросов, гистограммы разных прогонов
+    и виртуальных пользователей складываются.
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.max_ms = 0.0
+        self.sum_ms = 0.0
+
+    @staticmethod
+    def bucket(ms: float) -> int:
+        return int(math.log(max(ms, 0.01) / 0.01) / _LOG_GROWTH)
+
+    @staticmethod
+    def bucket_upper(index: int) -> float:
+        return 0.01 * BUCKET_GROWTH ** (index + 1)
+
+    def record(self, ms: float):
+        index = self.bucket(ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, p: float) -> float:
+        """Верхняя граница корзины, в которую попадает p-й перцентиль (мс)"""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * p / 100)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.bucket_upper(index), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            **{f"p{p}_ms": round(self.percentile(p), 2) for p in PERCENTILES},
+            "buckets": {str(index): count for index, count in sorted(self.counts.items())},
+        }
+
+
+class EndpointStats:
+    """Задержки и ошибки одного эндпоинта"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.status_codes: Dict[str, int] = {}
+
+    def record(self, ms: float, status: Optional[int], ok: bool):
+        self.latency.record(ms)
+        key = str(status) if status is not None else "network_error"
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.latency.total if self.latency.total else 0.0
+
+    def to_dict(self, duration: float) -> dict:
+        return {
+            **self.latency.to_dict(),
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 4),
+            "rps": round(self.latency.total / duration, 2) if duration else 0.0,
+            "status_codes": self.status_codes,
+        }
+
+
+class RunStats:
+    """Статистика прогона по эндпоинтам"""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def record(self, endpoint: str, ms: float, status: Optional[int], ok: bool):
+        self.endpoints.setdefault(endpoint, EndpointStats()).record(ms, status, ok)
+
+    def report(self, config: dict, duration: float) -> dict:
+        return {
+            "config": config,
+            "duration_s": round(duration, 2),
+            "endpoints": {name: stats.to_dict(duration) for name, stats in sorted(self.endpoints.items())},
+        }
+
+
+def save_report(report: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    """
+    Таблица по эндпоинтам; с baseline — изменение p95 и доли ошибок
+    относительно прошлого прогона.
+    """
+    lines = [
+        f"⏱️  Длительность: {report['duration_s']} с, пользователей: {report['config'].get('users')}",
+        f"{'Эндпоинт':<32}{'запросов':>10}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'ошибки':>9}",
+    ]
+    for name, e in report["endpoints"].items():
+        line = (f"{name:<32}{e['count']:>10}{e['rps']:>9.1f}{e['p50_ms']:>9.1f}"
+                f"{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}{e['error_rate'] * 100:>8.1f}%")
+        old = (baseline or {}).get("endpoints", {}).get(name)
+        if old:
+            delta = e["p95_ms"] - old["p95_ms"]
+            line += f"   p95 {delta:+.1f} мс, ошибки {(e['error_rate'] - old['error_rate']) * 100:+.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,81 @@
+"""
+Проверка самого нагрузочного стенда на локальном мок API (без backend и сети).
+"""
+import asyncio
+import json
+
+import pytest
+
+from loadtest.mock_server import start_mock_server
+from loadtest.runner import main, run_load
+from loadtest.stats import LatencyHistogram, format_report
+
+
+@pytest.fixture
+def mock_api():
+    server, base_url = start_mock_server()
+    yield server, base_url
+    server.shutdown()
+
+
+def test_histogram_percentiles_within_bucket_error():
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(float(ms))
+    assert histogram.total == 1000
+    for p in (50, 95, 99):
+        assert abs(histogram.percentile(p) - p * 10) <= p * 10 * 0.05
+    assert histogram.percentile(100) == 1000.0
+
+
+def test_histograms_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    for ms in range(1, 501):
+        a.record(float(ms))
+    for ms in range(501, 1001):
+        b.record(float(ms))
+    a.merge(b)
+    assert a.total == 1000 and a.max_ms == 1000.0
+    assert abs(a.percentile(50) - 500) <= 25
+
+
+def test_run_against_mock_api(mock_api):
+    server, base_url = mock_api
+    report = asyncio.run(run_load(base_url, users=20, ramp_up=0.5, duration=2.0, think_time=0.02, seed=1))
+
+    endpoints = report["endpoints"]
+    assert endpoints["POST /api/auth/register"]["count"] == 20
+    assert endpoints["POST /api/auth/login"]["count"] == 20
+    assert endpoints["POST /api/game/flip"]["count"] > 20
+    assert endpoints["GET /api/leaderboard"]["count"] > 0
+    assert all(e["errors"] == 0 for e in endpoints.values())
+    assert len(server.RequestHandlerClass.state.users) == 20
+    assert 2.0 <= report["duration_s"] < 4.0
+    json.dumps(report)
+
+
+def test_server_errors_counted():
+    server, base_url = start_mock_server(error_rate=0.3, seed=3)
+    try:
+        report = asyncio.run(run_load(base_url, users=10, ramp_up=0.0, duration=1.0, think_time=0.01, seed=3))
+    finally:
+        server.shutdown()
+    errors = sum(e["errors"] for e in report["endpoints"].values())
+    total = sum(e["count"] for e in report["endpoints"].values())
+    assert 0.15 < errors / total < 0.45
+    assert any("500" in e["status_codes"] for e in report["endpoints"].values())
+
+
+def test_cli_saves_report_and_compares(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    main(["--mock", "--users", "5", "--ramp-up", "0", "--duration", "0.5",
+          "--think-time", "0.01", "--seed", "1", "--report", str(baseline)])
+    current = tmp_path / "current.json"
+    main(["--mock", "--users", "5", "--ramp-up", "0", "--duration", "0.5", "--think-time", "0.01",
+          "--seed", "1", "--mock-latency-ms", "5", "--report", str(current), "--compare", str(baseline)])
+
+    report = json.loads(current.read_text(encoding="utf-8"))
+    assert report["config"]["users"] == 5
+    output = capsys.readouterr().out
+    assert "p95 +" in output
+    assert format_report(report).count("\n") == len(report["endpoints"]) + 1
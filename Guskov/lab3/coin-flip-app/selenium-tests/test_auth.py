@@ -17,11 +17,11 @@ class TestAuthentication:
         assert "/game" in browser.current_url
         assert browser.current_url == f"{base_url}/game"
 
-    def test_successful_login(self, browser, base_url):
-        """Тест успешного входа"""
+    def test_successful_login(self, browser, base_url, api_user):
+        """Тест успешного входа (пользователь создан через API)"""
         login_page = LoginPage(browser, base_url)
-        username = "testuser"
-        password = "testpassword"
+        username = api_user["user"]["username"]
+        password = api_user["password"]
         
         login_page.open_login_page()
         login_page.login(username, password)
@@ -39,13 +39,13 @@ class TestAuthentication:
         # Проверяем, что остались на странице логина
         assert "/login" in browser.current_url
 
-    def test_navigation_after_login(self, browser, base_url):
+    def test_navigation_after_login(self, browser, base_url, api_user):
         """Тест навигации после входа"""
         login_page = LoginPage(browser, base_url)
         
         # Логинимся
         login_page.open_login_page()
-        login_page.login("testuser", "testpassword")
+        login_page.login(api_user["user"]["username"], api_user["password"])
         
         # Проверяем, что видим элементы игровой страницы
         assert "/game" in browser.current_url
@@ -1,16 +1,12 @@
 import pytest
 import time
-from pages.login_page import LoginPage
 from pages.game_page import GamePage
 
 
 class TestGameFunctionality:
     @pytest.fixture(autouse=True)
-    def login(self, browser, base_url):
-        """Автоматический вход перед каждым тестом игры"""
-        login_page = LoginPage(browser, base_url)
-        login_page.open_login_page()
-        login_page.login("testuser", "testpassword")
+    def login(self, logged_in):
+        """Вход через API перед каждым тестом: свой пользователь, без формы логина"""
         yield
 
     def test_balance_display(self, browser, base_url):
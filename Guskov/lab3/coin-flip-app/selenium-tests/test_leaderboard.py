@@ -1,16 +1,12 @@
 import pytest
-from pages.login_page import LoginPage
 from pages.leaderboard_page import LeaderboardPage
 from pages.game_page import GamePage
 
 
 class TestLeaderboard:
     @pytest.fixture(autouse=True)
-    def login(self, browser, base_url):
-        """Автоматический вход перед каждым тестом"""
-        login_page = LoginPage(browser, base_url)
-        login_page.open_login_page()
-        login_page.login("testuser", "testpassword")
+    def login(self, logged_in):
+        """Вход через API перед каждым тестом: свой пользователь, без формы логина"""
         yield
 
     def test_leaderboard_access(self, browser, base_url):
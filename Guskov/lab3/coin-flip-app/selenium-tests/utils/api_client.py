@@ -0,0 +1,57 @@
+import json
+
+import requests
+
+from .helpers import generate_random_username
+
+DEFAULT_PASSWORD = "testpassword123"
+
+
+class ApiClient:
+    """
+    Подготовка данных для UI-тестов через HTTP вместо кликов:
+    регистрация и удаление пользователей. Эндпоинты /api/test/* есть только у backend,
+    запущенного с ENABLE_TEST_API=true.
+    """
+
+    def __init__(self, api_url, timeout=10):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _post(self, path, payload):
+        response = self.session.post(f"{self.api_url}{path}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def register(self, username=None, password=DEFAULT_PASSWORD):
+        """Создать пользователя; возвращает {"token", "user", "password"}"""
+        username = username or generate_random_username()
+        data = self._post("/api/auth/register", {
+            "username": username,
+            "email": f"{username}@test.com",
+            "password": password,
+        })
+        return {**data, "password": password}
+
+    def cleanup(self, username):
+        response = self.session.delete(f"{self.api_url}/api/test/cleanup",
+                                       json={"username": username}, timeout=self.timeout)
+        return response.status_code == 200
+
+    def close(self):
+        self.session.close()
+
+
+def inject_auth(driver, base_url, token, user):
+    """
+    Авторизовать браузер без формы входа: кладем токен и пользователя
+    в localStorage так же, как frontend/src/utils/auth.js (setAuth).
+    """
+    # localStorage доступен только на странице своего origin
+    driver.get(f"{base_url}/login")
+    driver.execute_script(
+        "window.localStorage.setItem('token', arguments[0]);"
+        "window.localStorage.setItem('user', arguments[1]);",
+        token, json.dumps(user),
+    )
@@ -0,0 +1,156 @@
+import json
+import os
+import platform
+import shutil
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+# Путь к chromedriver запоминается на диске: webdriver-manager ходит в сеть
+# за версией при каждом install(), а xdist-воркеры вызывали бы его одновременно
+DRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "coin-flip-selenium", "driver.json")
+DRIVER_CACHE_TTL = 7 * 24 * 3600
+WINDOW_SIZE = (1920, 1080)
+
+YANDEX_PATHS = {
+    "Windows": [
+        r"C:\Users\%USERNAME%\AppData\Local\Yandex\YandexBrowser\Application\browser.exe",
+        r"C:\Program Files (x86)\Yandex\YandexBrowser\Application\browser.exe",
+    ],
+    "Linux": [
+        "/usr/bin/yandex-browser",
+        "/usr/bin/yandex_browser",
+        "/snap/bin/yandex-browser",
+    ],
+    "Darwin": [
+        "/Applications/Yandex.app/Contents/MacOS/Yandex",
+    ],
+}
+
+
+def find_yandex_browser():
+    """Путь к Яндекс.Браузеру или None (тогда используется Chrome)"""
+    for path in YANDEX_PATHS.get(platform.system(), []):
+        expanded_path = os.path.expandvars(path)
+        if os.path.exists(expanded_path):
+            return expanded_path
+    return None
+
+
+def _read_cached_driver_path():
+    try:
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - cached.get("saved_at", 0) > DRIVER_CACHE_TTL:
+        return None
+    path = cached.get("path")
+    return path if path and os.path.isfile(path) else None
+
+
+def _write_cached_driver_path(path):
+    os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+    # Запись через временный файл: параллельные воркеры не увидят половину JSON
+    tmp_path = f"{DRIVER_CACHE_FILE}.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "saved_at": time.time()}, f)
+    os.replace(tmp_path, DRIVER_CACHE_FILE)
+
+
+def resolve_driver_path():
+    """
+    Путь к chromedriver без сетевых запросов в обычном случае:
+    CHROMEDRIVER_PATH → chromedriver в PATH → кэш на диске → webdriver-manager.
+    """
+    path = os.getenv("CHROMEDRIVER_PATH") or shutil.which("chromedriver") or _read_cached_driver_path()
+    if path:
+        return path
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    _write_cached_driver_path(path)
+    return path
+
+
+def build_options(headless=True, binary_location=None):
+    options = Options()
+    if binary_location:
+        options.binary_location = binary_location
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument(f"--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    return options
+
+
+class BrowserPool:
+    """
+    Пул браузеров одного процесса pytest.
+
+    Под pytest-xdist каждый воркер — отдельный процесс со своим пулом,
+    поэтому браузеры воркеров не пересекаются. Браузер запускается один раз
+    и между тестами только сбрасывается (cookies, localStorage), а не
+    перезапускается.
+    """
+
+    def __init__(self, headless=True, implicit_wait=5):
+        self.headless = headless
+        self.implicit_wait = implicit_wait
+        self.driver_path = None
+        self.binary_location = find_yandex_browser()
+        self._idle = []
+        self._all = []
+
+    def _create(self):
+        if self.driver_path is None:
+            self.driver_path = resolve_driver_path()
+        driver = webdriver.Chrome(
+            service=Service(self.driver_path),
+            options=build_options(self.headless, self.binary_location),
+        )
+        if self.binary_location:
+            # Скрываем автоматизацию
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        driver.implicitly_wait(self.implicit_wait)
+        self._all.append(driver)
+        return driver
+
+    def acquire(self):
+        return self._idle.pop() if self._idle else self._create()
+
+    def release(self, driver, base_url=None):
+        """Вернуть браузер в пул, очистив состояние приложения"""
+        try:
+            if base_url and driver.current_url.startswith(base_url):
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+        except Exception:
+            # Браузер упал — закрываем, следующий тест получит новый
+            self._discard(driver)
+            return
+        self._idle.append(driver)
+
+    def _discard(self, driver):
+        self._all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close_all(self):
+        for driver in list(self._all):
+            self._discard(driver)
+        self._idle.clear()
+
+    @property
+    def browser_name(self):
+        return "Яндекс.Браузер" if self.binary_location else "Chrome"
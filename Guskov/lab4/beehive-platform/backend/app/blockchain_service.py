@@ -1,40 +1,178 @@
+import asyncio
+import itertools
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
 from web3 import Web3
-from .database import get_web3
-import json
+
+from .database import BLOCKCHAIN_RPC_URL
+
+# Номер блока перечитывается не чаще раза в BLOCK_TTL секунд; балансы
+# кэшируются до смены блока (но не дольше BALANCE_TTL)
+BLOCK_TTL = 1.0
+BALANCE_TTL = 15.0
+# JSON-RPC пакеты больше этого размера делятся на части
+MAX_BATCH_SIZE = 100
+
+
+class RPCError(Exception):
+    pass
+
 
 class BlockchainService:
-    def __init__(self):
-        self.w3 = get_web3()
-        self.check_connection()
-    
-    def check_connection(self):
-        if self.w3.is_connected():
-            print("✅ Connected to blockchain")
-            print(f"📦 Latest block: {self.w3.eth.block_number}")
-        else:
-            print("❌ Failed to connect to blockchain")
-    
-    def get_accounts(self):
+    """
+    Async access to the chain node.
+
+    Nothing is requested at construction time: the HTTP client is created on the
+    first call and reused (keep-alive pool). Balance lookups for many addresses go
+    out as one JSON-RPC batch pinned to the current block, results are cached
+    until a new block appears, and transaction nonces are tracked locally so
+    consecutive transactions from one account don't re-query the node.
+    """
+
+    def __init__(self, rpc_url: str = BLOCKCHAIN_RPC_URL, timeout: float = 5.0, transport=None):
+        self.rpc_url = rpc_url
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._ids = itertools.count(1)
+        self._block: Optional[Tuple[float, int]] = None  # (время получения, номер)
+        self._balances: Dict[str, Tuple[int, float, int]] = {}  # адрес -> (блок, время, wei)
+        self._nonces: Dict[str, int] = {}
+        self._nonce_locks: Dict[str, asyncio.Lock] = {}
+        self.rpc_requests = 0  # HTTP-запросов к узлу (для метрик и тестов)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # JSON-RPC
+    async def _post(self, payload):
+        self.rpc_requests += 1
+        response = await self.client.post(self.rpc_url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _result(reply: dict):
+        if "error" in reply:
+            raise RPCError(reply["error"].get("message", reply["error"]))
+        return reply["result"]
+
+    async def call(self, method: str, params: Sequence = ()) -> Any:
+        reply = await self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)})
+        return self._result(reply)
+
+    async def batch(self, calls: List[Tuple[str, Sequence]]) -> List[Any]:
+        """Several JSON-RPC calls in one HTTP request (results in call order)"""
+        results = []
+        for start in range(0, len(calls), MAX_BATCH_SIZE):
+            chunk = calls[start:start + MAX_BATCH_SIZE]
+            payload = [
+                {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+                for method, params in chunk
+            ]
+            replies = await self._post(payload)
+            by_id = {reply["id"]: reply for reply in replies}
+            results.extend(self._result(by_id[request["id"]]) for request in payload)
+        return results
+
+    # Чтение
+    async def is_connected(self) -> bool:
+        try:
+            await self.block_number()
+            return True
+        except (httpx.HTTPError, RPCError, ValueError):
+            return False
+
+    async def block_number(self) -> int:
+        now = time.monotonic()
+        if self._block is None or now - self._block[0] > BLOCK_TTL:
+            self._block = (now, int(await self.call("eth_blockNumber"), 16))
+        return self._block[1]
+
+    async def get_accounts(self) -> List[str]:
         """Get available accounts from the blockchain"""
-        return self.w3.eth.accounts
-    
-    def get_balance(self, address):
+        return await self.call("eth_accounts")
+
+    async def get_balances_wei(self, addresses: Sequence[str]) -> Dict[str, int]:
+        """
+        Balances of many addresses at the current block: cached ones are reused,
+        the rest are fetched with one JSON-RPC batch.
+
+        Returns:
+            address (as passed) -> balance in wei
+        """
+        checksummed = {address: Web3.to_checksum_address(address) for address in addresses}
+        block = await self.block_number()
+        now = time.monotonic()
+        balances, missing = {}, []
+        for address in dict.fromkeys(checksummed.values()):
+            cached = self._balances.get(address)
+            if cached and cached[0] == block and now - cached[1] < BALANCE_TTL:
+                balances[address] = cached[2]
+            else:
+                missing.append(address)
+        if missing:
+            values = await self.batch([("eth_getBalance", (address, hex(block))) for address in missing])
+            for address, value in zip(missing, values):
+                wei = int(value, 16)
+                self._balances[address] = (block, now, wei)
+                balances[address] = wei
+        return {address: balances[checksum] for address, checksum in checksummed.items()}
+
+    async def get_balances(self, addresses: Sequence[str]) -> Dict[str, Decimal]:
+        balances = await self.get_balances_wei(addresses)
+        return {address: Web3.from_wei(wei, "ether") for address, wei in balances.items()}
+
+    async def get_balance(self, address: str) -> Decimal:
         """Get balance of an address"""
-        balance = self.w3.eth.get_balance(address)
-        return self.w3.from_wei(balance, 'ether')
-    
-    def create_test_transaction(self, from_address, to_address, amount_eth):
+        return (await self.get_balances([address]))[address]
+
+    # Транзакции
+    async def next_nonce(self, address: str) -> int:
+        """
+        Nonce for the next transaction from address.
+        The node is asked once (pending count), then the counter is kept locally.
+        """
+        address = Web3.to_checksum_address(address)
+        lock = self._nonce_locks.setdefault(address, asyncio.Lock())
+        async with lock:
+            if address not in self._nonces:
+                self._nonces[address] = int(await self.call("eth_getTransactionCount", (address, "pending")), 16)
+            nonce = self._nonces[address]
+            self._nonces[address] = nonce + 1
+            return nonce
+
+    def reset_nonce(self, address: str):
+        """Forget the local nonce (after a rejected transaction) so it is re-read from the node"""
+        self._nonces.pop(Web3.to_checksum_address(address), None)
+
+    async def create_test_transaction(self, from_address, to_address, amount_eth):
         """Create a test transaction"""
         try:
             transaction = {
-                'from': from_address,
-                'to': to_address,
-                'value': self.w3.to_wei(amount_eth, 'ether'),
+                'from': Web3.to_checksum_address(from_address),
+                'to': Web3.to_checksum_address(to_address),
+                'value': Web3.to_wei(amount_eth, 'ether'),
                 'gas': 21000,
-                'gasPrice': self.w3.to_wei('50', 'gwei'),
-                'nonce': self.w3.eth.get_transaction_count(from_address)
+                'gasPrice': Web3.to_wei('50', 'gwei'),
+                'nonce': await self.next_nonce(from_address)
             }
-            
+
             # Note: In real implementation, you'd sign and send the transaction
             # For demo, we just return the transaction object
             return transaction
@@ -42,5 +180,5 @@ class BlockchainService:
             print(f"Error creating transaction: {e}")
             return None
 
-# Singleton instance
-blockchain_service = BlockchainService()
\ No newline at end of file
+# Singleton instance (без обращений к узлу при импорте)
+blockchain_service = BlockchainService()
@@ -0,0 +1,146 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import redis
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Минимальный суммарный вес голосов, после которого предложение решается
+QUORUM_WEIGHT = float(os.getenv("CONSENSUS_QUORUM_WEIGHT", "10"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+DECISIONS_CHANNEL = "beehive:proposal_decisions"
+VOTE_TYPES = ("for", "against")
+
+_redis_client = None
+
+
+def evaluate(proposal: models.InvestmentProposal) -> Optional[str]:
+    """
+    New status for a proposal based on its running tallies (O(1)).
+
+    Returns:
+        "approved" / "rejected" once the quorum is reached, otherwise None
+    """
+    total_weight = proposal.votes_for_weight + proposal.votes_against_weight
+    if total_weight < QUORUM_WEIGHT:
+        return None
+    if proposal.votes_for_weight / total_weight >= proposal.consensus_threshold:
+        return "approved"
+    return "rejected"
+
+
+def decision_event(proposal: models.InvestmentProposal) -> dict:
+    total_weight = proposal.votes_for_weight + proposal.votes_against_weight
+    return {
+        "proposal_id": proposal.id,
+        "status": proposal.status,
+        "votes_for_weight": proposal.votes_for_weight,
+        "votes_against_weight": proposal.votes_against_weight,
+        "consensus_ratio": proposal.votes_for_weight / total_weight if total_weight > 0 else 0,
+        "decided_at": proposal.decided_at.isoformat(),
+    }
+
+
+def ingest_votes(db: Session, votes: List) -> Dict[str, list]:
+    """
+    Apply a batch of votes in the caller's transaction (the caller commits once).
+
+    Proposals are locked with SELECT ... FOR UPDATE in id order, so concurrent
+    batches touching the same proposals serialize instead of losing tally
+    updates, and concurrent batches never deadlock. Each accepted vote updates
+    the in-memory tally and the proposal status is re-evaluated right away:
+    votes arriving after the decision are rejected as "voting_closed".
+
+    Args:
+        db: Session
+        votes: Objects with user_id, proposal_id, vote_type (schemas.VoteCreate)
+
+    Returns:
+        {"accepted": [indexes], "rejected": [{"index", "reason"}], "decisions": [events]}
+    """
+    result = {"accepted": [], "rejected": [], "decisions": []}
+    if not votes:
+        return result
+
+    proposal_ids = sorted({vote.proposal_id for vote in votes})
+    user_ids = {vote.user_id for vote in votes}
+    proposals = {
+        proposal.id: proposal
+        for proposal in db.query(models.InvestmentProposal)
+        .filter(models.InvestmentProposal.id.in_(proposal_ids))
+        .order_by(models.InvestmentProposal.id)
+        .with_for_update()
+    }
+    weights = dict(
+        db.query(models.User.id, models.User.voting_weight).filter(models.User.id.in_(user_ids))
+    )
+    # Уже поданные голоса читаются после блокировки, поэтому актуальны
+    voted = set(
+        db.query(models.Vote.user_id, models.Vote.proposal_id).filter(
+            models.Vote.proposal_id.in_(proposal_ids),
+            models.Vote.user_id.in_(user_ids)
+        )
+    )
+
+    now = datetime.utcnow()
+    new_votes = []
+    for index, vote in enumerate(votes):
+        proposal = proposals.get(vote.proposal_id)
+        if vote.vote_type not in VOTE_TYPES:
+            reason = "invalid_vote_type"
+        elif vote.user_id not in weights:
+            reason = "user_not_found"
+        elif proposal is None:
+            reason = "proposal_not_found"
+        elif (vote.user_id, vote.proposal_id) in voted:
+            reason = "already_voted"
+        elif proposal.status != "voting":
+            reason = "voting_closed"
+        else:
+            reason = None
+        if reason:
+            result["rejected"].append({"index": index, "reason": reason})
+            continue
+
+        weight = weights[vote.user_id]
+        voted.add((vote.user_id, vote.proposal_id))
+        new_votes.append(models.Vote(
+            user_id=vote.user_id,
+            proposal_id=vote.proposal_id,
+            vote_type=vote.vote_type,
+            weight=weight
+        ))
+        if vote.vote_type == "for":
+            proposal.votes_for_weight += weight
+        else:
+            proposal.votes_against_weight += weight
+        result["accepted"].append(index)
+
+        status = evaluate(proposal)
+        if status:
+            proposal.status = status
+            proposal.decided_at = now
+            result["decisions"].append(decision_event(proposal))
+
+    db.add_all(new_votes)
+    db.flush()
+    return result
+
+
+def get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=2)
+    return _redis_client
+
+
+def publish_decisions(events: List[dict]):
+    """Publish decision events to Redis after commit (best effort)"""
+    for event in events:
+        try:
+            get_redis().publish(DECISIONS_CHANNEL, json.dumps(event))
+        except redis.RedisError as e:
+            print(f"Error publishing decision for proposal {event['proposal_id']}: {e}")
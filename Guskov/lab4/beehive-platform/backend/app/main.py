@@ -1,6 +1,7 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, w3, init_db
+from .database import engine, init_db
+from .blockchain_service import blockchain_service
 from . import models
 from .routers import users, voting, investments, withdrawals
 
@@ -29,23 +30,39 @@ app.include_router(withdrawals.router, prefix="/api/withdrawals", tags=["withdra
 async def root():
     return {"message": "BeeHive Decentralized Investment Platform"}
 
+@app.on_event("shutdown")
+async def shutdown():
+    await blockchain_service.close()
+
 @app.get("/health")
 async def health_check():
-    blockchain_status = "connected" if w3.is_connected() else "disconnected"
+    connected = await blockchain_service.is_connected()
     return {
         "status": "healthy", 
         "service": "beehive-backend",
-        "blockchain": blockchain_status,
-        "block_number": w3.eth.block_number if w3.is_connected() else None
+        "blockchain": "connected" if connected else "disconnected",
+        "block_number": await blockchain_service.block_number() if connected else None
     }
 
 @app.get("/blockchain/accounts")
 async def get_blockchain_accounts():
-    from .blockchain_service import blockchain_service
-    accounts = blockchain_service.get_accounts()
-    balances = {account: float(blockchain_service.get_balance(account)) for account in accounts}
+    connected = await blockchain_service.is_connected()
+    if not connected:
+        return {"accounts": [], "balances": {}, "connected": False}
+    accounts = await blockchain_service.get_accounts()
+    # Все балансы — одним пакетным JSON-RPC запросом
+    balances = await blockchain_service.get_balances(accounts)
     return {
         "accounts": accounts,
-        "balances": balances,
-        "connected": w3.is_connected()
-    }
\ No newline at end of file
+        "balances": {account: float(balance) for account, balance in balances.items()},
+        "connected": True
+    }
+
+@app.get("/blockchain/balances")
+async def get_blockchain_balances(addresses: str):
+    # addresses — через запятую
+    try:
+        balances = await blockchain_service.get_balances([a.strip() for a in addresses.split(",") if a.strip()])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {address: float(balance) for address, balance in balances.items()}
\ No newline at end of file
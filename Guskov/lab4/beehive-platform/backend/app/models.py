@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -32,13 +32,21 @@ class InvestmentProposal(Base):
     proposer_id = Column(Integer, ForeignKey("users.id"))
     status = Column(String(20), default="voting")  # voting, approved, rejected, funded
     consensus_threshold = Column(Float, default=0.7)
+    # Взвешенные итоги голосования, обновляются в cast_vote вместе со вставкой голоса
+    votes_for_weight = Column(Float, default=0.0, nullable=False)
+    votes_against_weight = Column(Float, default=0.0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    decided_at = Column(DateTime, nullable=True)
     
     proposer = relationship("User", back_populates="proposals")
     votes = relationship("Vote", back_populates="proposal")
 
 class Vote(Base):
     __tablename__ = "votes"
+    __table_args__ = (
+        # Один голос пользователя на предложение
+        Index("uq_votes_user_proposal", "user_id", "proposal_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -63,6 +71,9 @@ class WithdrawalRequest(Base):
 
 class ApprovalVote(Base):
     __tablename__ = "approval_votes"
+    __table_args__ = (
+        Index("ix_approval_votes_withdrawal_approver", "withdrawal_id", "approver_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     withdrawal_id = Column(Integer, ForeignKey("withdrawal_requests.id"))
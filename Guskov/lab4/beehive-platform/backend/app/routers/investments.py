@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from ..database import SessionLocal
 from .. import models, schemas
@@ -29,30 +30,36 @@ def get_proposal(proposal_id: int, db: Session = Depends(get_db)):
 
 @router.get("/decisions")
 def get_investment_decisions(db: Session = Depends(get_db)):
-    # Возвращает карту принятых инвестиционных решений
-    approved_proposals = db.query(models.InvestmentProposal).filter(
-        models.InvestmentProposal.status == "approved"
+    # Возвращает карту принятых инвестиционных решений (один запрос на всю карту)
+    proposal = models.InvestmentProposal
+    rows = db.query(
+        proposal.id,
+        proposal.title,
+        proposal.asset_symbol,
+        proposal.target_amount,
+        func.coalesce(proposal.decided_at, proposal.created_at).label("decided_at"),
+        consensus_ratio_expr().label("consensus_ratio")
+    ).filter(
+        proposal.status == "approved"
     ).all()
     
-    decisions_map = []
-    for proposal in approved_proposals:
-        decisions_map.append({
-            "id": proposal.id,
-            "title": proposal.title,
-            "asset": proposal.asset_symbol,
-            "amount": proposal.target_amount,
-            "timestamp": proposal.created_at,
-            "consensus_ratio": calculate_consensus_ratio(proposal.id, db)
-        })
-    
-    return decisions_map
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "asset": row.asset_symbol,
+            "amount": row.target_amount,
+            "timestamp": row.decided_at,
+            "consensus_ratio": row.consensus_ratio
+        }
+        for row in rows
+    ]
 
-def calculate_consensus_ratio(proposal_id: int, db: Session):
-    votes = db.query(models.Vote).filter(models.Vote.proposal_id == proposal_id).all()
-    if not votes:
-        return 0
-    
-    total_weight = sum(vote.weight for vote in votes)
-    for_weight = sum(vote.weight for vote in votes if vote.vote_type == "for")
-    
-    return for_weight / total_weight if total_weight > 0 else 0
\ No newline at end of file
+def consensus_ratio_expr():
+    """SQL-выражение доли голосов "за" по сохраненным итогам предложения"""
+    proposal = models.InvestmentProposal
+    total_weight = proposal.votes_for_weight + proposal.votes_against_weight
+    return case(
+        (total_weight > 0, proposal.votes_for_weight / total_weight),
+        else_=0.0
+    )
@@ -1,11 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from ..database import SessionLocal
-from .. import models, schemas
+from .. import models, schemas, consensus
 from typing import List
 
 router = APIRouter()
 
+# Причина отказа из consensus.ingest_votes -> (HTTP статус, сообщение)
+REJECTION_ERRORS = {
+    "invalid_vote_type": (400, "Vote type must be 'for' or 'against'"),
+    "user_not_found": (404, "User not found"),
+    "proposal_not_found": (404, "Proposal not found"),
+    "already_voted": (400, "User already voted"),
+    "voting_closed": (409, "Voting on this proposal is closed"),
+}
+
 def get_db():
     db = SessionLocal()
     try:
@@ -42,29 +52,38 @@ def create_proposal(proposal: schemas.ProposalCreate, db: Session = Depends(get_
 @router.post("/vote")
 def cast_vote(vote: schemas.VoteCreate, db: Session = Depends(get_db)):
     try:
-        # Check if user already voted
-        existing_vote = db.query(models.Vote).filter(
-            models.Vote.user_id == vote.user_id,
-            models.Vote.proposal_id == vote.proposal_id
-        ).first()
-        
-        if existing_vote:
-            raise HTTPException(status_code=400, detail="User already voted")
-        
-        # Get user voting weight
-        user = db.query(models.User).filter(models.User.id == vote.user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        db_vote = models.Vote(
-            user_id=vote.user_id,
-            proposal_id=vote.proposal_id,
-            vote_type=vote.vote_type,
-            weight=user.voting_weight
-        )
-        db.add(db_vote)
+        result = consensus.ingest_votes(db, [vote])
+        if result["rejected"]:
+            db.rollback()
+            status_code, detail = REJECTION_ERRORS[result["rejected"][0]["reason"]]
+            raise HTTPException(status_code=status_code, detail=detail)
+        db.commit()
+    except IntegrityError:
+        # Уникальный индекс (user_id, proposal_id) — последняя линия защиты
+        db.rollback()
+        raise HTTPException(status_code=400, detail="User already voted")
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    consensus.publish_decisions(result["decisions"])
+    return {"message": "Vote cast successfully", "decisions": result["decisions"]}
+
+@router.post("/votes/batch")
+def cast_votes_batch(batch: schemas.VoteBatch, db: Session = Depends(get_db)):
+    # Пакетная загрузка голосов: одна транзакция и один commit на весь пакет
+    try:
+        result = consensus.ingest_votes(db, batch.votes)
         db.commit()
-        
-        return {"message": "Vote cast successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    consensus.publish_decisions(result["decisions"])
+    return {
+        "accepted": len(result["accepted"]),
+        "rejected": result["rejected"],
+        "decisions": result["decisions"]
+    }
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import case, func, select, union_all, update
 from sqlalchemy.orm import Session
 import random
 from ..database import SessionLocal
 from .. import models, schemas
-from typing import List
+from typing import List, Tuple
 
 router = APIRouter()
 
@@ -14,89 +15,150 @@ def get_db():
     finally:
         db.close()
 
+# Сколько подтверждений нужно и во сколько раз больше кандидатов берется для взвешенного выбора
+REQUIRED_APPROVALS = 3
+CANDIDATE_FACTOR = 4
+MIN_APPROVER_RATING = 1.0
+# Для маленьких таблиц проще выбрать из всех подходящих пользователей
+SMALL_TABLE_IDS = 1000
+
 @router.post("/request", response_model=schemas.WithdrawalRequest)
 def create_withdrawal_request(request: schemas.WithdrawalRequestCreate, db: Session = Depends(get_db)):
     # Проверяем баланс пользователя
     user = db.query(models.User).filter(models.User.id == request.user_id).first()
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
     if user.total_contribution < request.amount:
         raise HTTPException(status_code=400, detail="Insufficient funds")
     
-    # Создаем запрос на вывод
+    # Запрос и подтверждающие создаются в одной транзакции
     db_request = models.WithdrawalRequest(
         user_id=request.user_id,
         amount=request.amount,
-        required_approvals=3  # Случайная выборка из 3 участников
+        required_approvals=REQUIRED_APPROVALS  # Случайная выборка из 3 участников
     )
     db.add(db_request)
-    db.commit()
-    db.refresh(db_request)
+    db.flush()
     
     # Выбираем случайных участников для подтверждения
-    select_random_approvers(db_request.id, db)
+    select_random_approvers(db_request, db)
     
+    db.commit()
+    db.refresh(db_request)
     return db_request
 
 @router.post("/approve/{request_id}")
 def approve_withdrawal(request_id: int, approver_id: int, db: Session = Depends(get_db)):
-    withdrawal_request = db.query(models.WithdrawalRequest).filter(
-        models.WithdrawalRequest.id == request_id
-    ).first()
+    # Голос подтверждения отмечается атомарно: повторное подтверждение ничего не меняет
+    marked = db.query(models.ApprovalVote).filter(
+        models.ApprovalVote.withdrawal_id == request_id,
+        models.ApprovalVote.approver_id == approver_id,
+        models.ApprovalVote.approved == False
+    ).update({models.ApprovalVote.approved: True}, synchronize_session=False)
     
-    if withdrawal_request is None:
-        raise HTTPException(status_code=404, detail="Withdrawal request not found")
+    if not marked:
+        db.rollback()
+        exists = db.query(models.WithdrawalRequest.id).filter(
+            models.WithdrawalRequest.id == request_id
+        ).first()
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Withdrawal request not found")
+        assigned = db.query(models.ApprovalVote.id).filter(
+            models.ApprovalVote.withdrawal_id == request_id,
+            models.ApprovalVote.approver_id == approver_id
+        ).first()
+        if assigned is None:
+            raise HTTPException(status_code=403, detail="Not authorized to approve this request")
+        raise HTTPException(status_code=409, detail="Already approved")
     
-    # Проверяем, может ли этот пользователь подтверждать
-    can_approve = db.query(models.ApprovalVote).filter(
-        models.ApprovalVote.withdrawal_id == request_id,
-        models.ApprovalVote.approver_id == approver_id
+    # Счетчик и статус обновляются одним UPDATE без чтения-изменения-записи
+    withdrawal = models.WithdrawalRequest
+    new_count = withdrawal.approval_count + 1
+    row = db.execute(
+        update(withdrawal)
+        .where(withdrawal.id == request_id)
+        .values(
+            approval_count=new_count,
+            status=case((new_count >= withdrawal.required_approvals, "approved"), else_=withdrawal.status)
+        )
+        .returning(withdrawal.approval_count, withdrawal.status)
     ).first()
+    db.commit()
     
-    if not can_approve:
-        raise HTTPException(status_code=403, detail="Not authorized to approve this request")
-    
-    # Записываем голос подтверждения
-    approval_vote = models.ApprovalVote(
-        withdrawal_id=request_id,
-        approver_id=approver_id,
-        approved=True
+    # Здесь будет вызов смарт-контракта для выполнения вывода средств, если status == "approved"
+    return {"message": "Withdrawal approved", "approval_count": row.approval_count, "status": row.status}
+
+def _eligible(query, initiator_id: int):
+    return query.filter(
+        models.User.id != initiator_id,
+        models.User.bee_rating >= MIN_APPROVER_RATING  # Только пользователи с достаточным рейтингом
     )
-    db.add(approval_vote)
-    
-    # Обновляем счетчик подтверждений
-    withdrawal_request.approval_count += 1
-    
-    # Проверяем, достигнут ли необходимый порог
-    if withdrawal_request.approval_count >= withdrawal_request.required_approvals:
-        withdrawal_request.status = "approved"
-        # Здесь будет вызов смарт-контракта для выполнения вывода средств
-    
-    db.commit()
-    return {"message": "Withdrawal approved"}
 
-def select_random_approvers(withdrawal_id: int, db: Session):
-    # Выбираем случайных активных пользователей (кроме самого инициатора)
-    withdrawal = db.query(models.WithdrawalRequest).filter(
-        models.WithdrawalRequest.id == withdrawal_id
-    ).first()
-    
-    all_users = db.query(models.User).filter(
-        models.User.id != withdrawal.user_id,
-        models.User.bee_rating >= 1.0  # Только пользователи с достаточным рейтингом
-    ).all()
-    
-    # Выбираем случайную выборку
-    approvers = random.sample(all_users, min(3, len(all_users)))
+def sample_candidates(db: Session, initiator_id: int, count: int) -> List[Tuple[int, float]]:
+    """
+    Random eligible users without loading the users table.
+
+    Each candidate is one index seek: a random id in [min(id), max(id)] and the
+    first eligible user at or after it. All seeks go in one UNION ALL query.
+    Users right after a gap in ids are slightly more likely to be picked.
+
+    Returns:
+        List of distinct (user id, bee_rating)
+    """
+    # min и max отдельными подзапросами: так каждый берется с края индекса
+    low, high = db.query(
+        select(func.min(models.User.id)).scalar_subquery(),
+        select(func.max(models.User.id)).scalar_subquery()
+    ).one()
+    if low is None:
+        return []
+    if high - low < SMALL_TABLE_IDS:
+        return [tuple(row) for row in _eligible(db.query(models.User.id, models.User.bee_rating), initiator_id)]
+
+    candidates = {}
+    for _ in range(3):
+        seeks = [
+            _eligible(select(models.User.id, models.User.bee_rating), initiator_id)
+            .where(models.User.id >= random.randint(low, high))
+            .order_by(models.User.id)
+            .limit(1)
+            .subquery()
+            for _ in range(count)
+        ]
+        rows = db.execute(union_all(*(select(seek.c.id, seek.c.bee_rating) for seek in seeks))).all()
+        candidates.update((row.id, row.bee_rating) for row in rows)
+        if len(candidates) >= count:
+            break
+    return list(candidates.items())
+
+def select_random_approvers(withdrawal: models.WithdrawalRequest, db: Session, weighted: bool = True) -> List[int]:
+    """
+    Pick approvers for a withdrawal and add their ApprovalVote rows (the caller commits).
+
+    Args:
+        withdrawal: Flushed withdrawal request
+        db: Session
+        weighted: Prefer users with a higher bee_rating (weighted sampling
+                  without replacement among the sampled candidates)
+
+    Returns:
+        Approver ids
+    """
+    needed = withdrawal.required_approvals
+    candidates = sample_candidates(db, withdrawal.user_id, needed * CANDIDATE_FACTOR)
+    if weighted:
+        # Ключи Эфраимидиса–Спиракиса: u ** (1 / вес), берем наибольшие
+        candidates.sort(key=lambda item: random.random() ** (1.0 / item[1]), reverse=True)
+        approver_ids = [user_id for user_id, _ in candidates[:needed]]
+    else:
+        approver_ids = [user_id for user_id, _ in random.sample(candidates, min(needed, len(candidates)))]
     
     # Создаем записи для голосования подтверждения
-    for approver in approvers:
-        approval_vote = models.ApprovalVote(
-            withdrawal_id=withdrawal_id,
-            approver_id=approver.id,
-            approved=False
-        )
-        db.add(approval_vote)
-    
-    db.commit()
+    db.add_all(
+        models.ApprovalVote(withdrawal_id=withdrawal.id, approver_id=approver_id, approved=False)
+        for approver_id in approver_ids
+    )
+    return approver_ids
 
 @router.get("/requests/{user_id}", response_model=List[schemas.WithdrawalRequest])
 def get_user_withdrawal_requests(user_id: int, db: Session = Depends(get_db)):
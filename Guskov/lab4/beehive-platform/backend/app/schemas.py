@@ -34,7 +34,10 @@ class Proposal(ProposalBase):
     status: str
     current_amount: float = 0.0
     consensus_threshold: float = 0.7
+    votes_for_weight: float = 0.0
+    votes_against_weight: float = 0.0
     created_at: datetime
+    decided_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -47,6 +50,9 @@ class VoteBase(BaseModel):
 class VoteCreate(VoteBase):
     pass
 
+class VoteBatch(BaseModel):
+    votes: List[VoteCreate]
+
 class Vote(VoteBase):
     id: int
     weight: float
@@ -0,0 +1,134 @@
+"""
+BlockchainService tests.
+
+Unit tests run against an in-process fake JSON-RPC node. The dev chain test
+needs ganache/anvil (docker-compose service "blockchain" or `anvil`):
+    TEST_RPC_URL=http://localhost:8545 pytest tests/test_blockchain_service.py
+"""
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from app.blockchain_service import BlockchainService
+
+ADDRESSES = [f"0x{i:040x}" for i in range(1, 6)]
+
+
+class FakeNode:
+    """Minimal JSON-RPC node: counts HTTP requests and supports batches"""
+
+    def __init__(self):
+        self.block = 10
+        self.requests = []
+        self.nonce_queries = 0
+
+    def reply(self, request):
+        method, params = request["method"], request["params"]
+        if method == "eth_blockNumber":
+            result = hex(self.block)
+        elif method == "eth_getBalance":
+            result = hex(int(params[0], 16) * 10 ** 18 + int(params[1], 16))
+        elif method == "eth_getTransactionCount":
+            self.nonce_queries += 1
+            result = hex(7)
+        elif method == "eth_accounts":
+            result = ADDRESSES
+        else:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32601, "message": "not found"}}
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+    def handler(self, http_request: httpx.Request) -> httpx.Response:
+        payload = json.loads(http_request.content)
+        self.requests.append(payload)
+        if isinstance(payload, list):
+            return httpx.Response(200, json=[self.reply(item) for item in payload])
+        return httpx.Response(200, json=self.reply(payload))
+
+
+@pytest.fixture
+def node():
+    return FakeNode()
+
+
+@pytest.fixture
+def service(node):
+    return BlockchainService("http://fake-node", transport=httpx.MockTransport(node.handler))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_construction_makes_no_requests(node, service):
+    assert node.requests == []
+    assert service.rpc_requests == 0
+
+
+def test_balances_use_one_batch_and_block_cache(node, service):
+    async def scenario():
+        first = await service.get_balances_wei(ADDRESSES)
+        requests_after_first = len(node.requests)
+        second = await service.get_balances_wei(ADDRESSES)
+        return first, requests_after_first, second
+
+    first, requests_after_first, second = run(scenario())
+    # eth_blockNumber + один пакет на все адреса
+    assert requests_after_first == 2
+    assert isinstance(node.requests[1], list) and len(node.requests[1]) == len(ADDRESSES)
+    assert first == second == {a: int(a, 16) * 10 ** 18 + 10 for a in ADDRESSES}
+    # Повтор внутри того же блока не обращается к узлу
+    assert len(node.requests) == 2
+
+
+def test_new_block_invalidates_balances(node, service, monkeypatch):
+    monkeypatch.setattr("app.blockchain_service.BLOCK_TTL", 0.0)
+
+    async def scenario():
+        await service.get_balances_wei(ADDRESSES[:2])
+        node.block = 11
+        return await service.get_balances_wei(ADDRESSES[:2])
+
+    balances = run(scenario())
+    assert balances[ADDRESSES[0]] == 10 ** 18 + 11
+
+
+def test_nonce_manager_queries_node_once(node, service):
+    async def scenario():
+        return await asyncio.gather(*(service.next_nonce(ADDRESSES[0]) for _ in range(10)))
+
+    assert sorted(run(scenario())) == list(range(7, 17))
+    assert node.nonce_queries == 1
+    service.reset_nonce(ADDRESSES[0])
+    assert run(service.next_nonce(ADDRESSES[0])) == 7
+    assert node.nonce_queries == 2
+
+
+def test_unreachable_node_reports_disconnected():
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    service = BlockchainService("http://fake-node", transport=httpx.MockTransport(refuse))
+    assert run(service.is_connected()) is False
+
+
+@pytest.mark.skipif(not os.getenv("TEST_RPC_URL"), reason="TEST_RPC_URL (ganache/anvil) not set")
+def test_dev_chain_batch_matches_single_calls():
+    service = BlockchainService(os.environ["TEST_RPC_URL"])
+
+    async def scenario():
+        try:
+            assert await service.is_connected()
+            accounts = await service.get_accounts()
+            batched = await service.get_balances_wei(accounts)
+            single = [int(await service.call("eth_getBalance", (a, "latest")), 16) for a in accounts]
+            nonces = [await service.next_nonce(accounts[0]) for _ in range(3)]
+            return accounts, batched, single, nonces
+        finally:
+            await service.close()
+
+    accounts, batched, single, nonces = run(scenario())
+    assert [batched[a] for a in accounts] == single
+    assert nonces == [nonces[0], nonces[0] + 1, nonces[0] + 2]
@@ -0,0 +1,90 @@
+"""
+Approver selection at 100k+ users: DB-side sampling vs loading every eligible user.
+Runs on TEST_DATABASE_URL (e.g. a local Postgres) or a temporary SQLite file.
+"""
+import os
+import random
+import timeit
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import configure_sqlite
+from app.routers.withdrawals import select_random_approvers
+
+USERS = 120_000
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    url = os.getenv("TEST_DATABASE_URL", f"sqlite:///{tmp_path_factory.mktemp('bench') / 'users.db'}")
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        configure_sqlite(engine)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    rnd = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": i, "username": f"bee{i}", "email": f"bee{i}@hive",
+             "bee_rating": rnd.choice([0.5, 1.0, 1.5, 2.5, 4.0])}
+            for i in range(1, USERS + 1)
+        ])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    models.Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def select_by_loading_all(withdrawal, db):
+    """Прежний способ: все подходящие пользователи в Python и random.sample"""
+    all_users = db.query(models.User).filter(
+        models.User.id != withdrawal.user_id,
+        models.User.bee_rating >= 1.0
+    ).all()
+    return [user.id for user in random.sample(all_users, min(3, len(all_users)))]
+
+
+def test_selected_approvers_are_eligible(db):
+    withdrawal = models.WithdrawalRequest(id=1, user_id=5, amount=1, required_approvals=3)
+    ratings = dict(db.query(models.User.id, models.User.bee_rating))
+    for _ in range(50):
+        approvers = select_random_approvers(withdrawal, db)
+        assert len(approvers) == len(set(approvers)) == 3
+        assert 5 not in approvers
+        assert all(ratings[a] >= 1.0 for a in approvers)
+        db.rollback()
+
+
+def test_weighted_selection_prefers_high_rating(db):
+    withdrawal = models.WithdrawalRequest(id=1, user_id=5, amount=1, required_approvals=3)
+    ratings = dict(db.query(models.User.id, models.User.bee_rating))
+    picked = []
+    for _ in range(300):
+        picked.extend(ratings[a] for a in select_random_approvers(withdrawal, db))
+        db.rollback()
+    counts = {rating: picked.count(rating) for rating in (1.0, 1.5, 2.5, 4.0)}
+    assert counts[4.0] > counts[1.0]
+
+
+def test_benchmark_select_approvers(db):
+    print(f"\n[BENCHMARK] выбор 3 подтверждающих из {USERS} пользователей")
+    withdrawal = models.WithdrawalRequest(id=1, user_id=5, amount=1, required_approvals=3)
+
+    def run_new():
+        select_random_approvers(withdrawal, db)
+        db.rollback()
+
+    def run_old():
+        select_by_loading_all(withdrawal, db)
+        db.expunge_all()
+
+    old = min(timeit.repeat(run_old, number=1, repeat=3))
+    new = min(timeit.repeat(run_new, number=20, repeat=3)) / 20
+    print(f"  загрузка всех пользователей: {old * 1000:.1f} мс")
+    print(f"  выборка на стороне БД: {new * 1000:.2f} мс")
+    print(f"  Ускорение: x{old / new:.0f}")
+    assert new * 10 < old
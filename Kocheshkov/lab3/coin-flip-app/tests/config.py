@@ -1,63 +1,96 @@
 # tests/config.py
 """
 Selenium config & helpers for tests.
-- BASE_URL: адрес работающего фронтенда (по-умолчанию http://localhost:3002)
-- create_driver(): создаёт Chrome WebDriver (webdriver-manager)
-- login(driver, username, password): вспомогательная функция для быстрого логина
+- BASE_URL: адрес работающего фронтенда (по-умолчанию http://localhost:3002, env BASE_URL)
+- API_URL: адрес backend (по-умолчанию http://localhost:3000, env API_URL)
+- create_driver(): создаёт Chrome WebDriver, по умолчанию headless (HEADLESS=0 — с окном)
+- login(driver, username, password): вход через форму
+- api_login(driver, username, password): вход через API без формы
 """
 
+import json
 import os
+import shutil
+import time
+from functools import lru_cache
+
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-# Если фронтенд слушает другой порт/хост — поменяй здесь
-BASE_URL = "http://localhost:3002"
+# Если фронтенд слушает другой порт/хост — поменяй здесь или задай BASE_URL
+BASE_URL = os.getenv("BASE_URL", "http://localhost:3002")
+API_URL = os.getenv("API_URL", "http://localhost:3000")
+
+# Найденный chromedriver запоминается на неделю, чтобы не ходить в сеть
+# через webdriver-manager и не обходить каталоги при каждом запуске
+DRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "coin-flip-tests", "chromedriver.json")
+DRIVER_CACHE_TTL = 7 * 24 * 3600
+DRIVER_NAMES = ("chromedriver.exe", "chromedriver")
+
 
 def _resolve_chromedriver_path(candidate_path: str) -> str:
-    """Устойчиво находит chromedriver.exe рядом с результатом ChromeDriverManager().install()."""
-    if os.path.isdir(candidate_path):
-        for root, _, files in os.walk(candidate_path):
-            for f in files:
-                if f.lower() == "chromedriver.exe":
-                    return os.path.join(root, f)
-
-    if os.path.isfile(candidate_path):
-        name = os.path.basename(candidate_path).lower()
-        if name.endswith(".exe"):
-            return candidate_path
-        parent = os.path.dirname(candidate_path)
-        alt = os.path.join(parent, "chromedriver.exe")
-        if os.path.isfile(alt):
-            return alt
-        # искать любые chromedriver*.exe
-        try:
-            for f in os.listdir(parent):
-                if f.lower().startswith("chromedriver") and f.lower().endswith(".exe"):
-                    return os.path.join(parent, f)
-        except Exception:
-            pass
+    """Находит исполняемый chromedriver рядом с результатом ChromeDriverManager().install()."""
+    if os.path.isfile(candidate_path) and os.path.basename(candidate_path).lower() in DRIVER_NAMES:
+        return candidate_path
 
-    # предположение
-    try:
-        guessed = os.path.join(os.path.dirname(candidate_path), "chromedriver.exe")
-        if os.path.isfile(guessed):
-            return guessed
-    except Exception:
-        pass
+    # install() иногда возвращает соседний файл (THIRD_PARTY_NOTICES) или каталог
+    search_dir = candidate_path if os.path.isdir(candidate_path) else os.path.dirname(candidate_path)
+    for root, _, files in os.walk(search_dir):
+        for f in files:
+            if f.lower() in DRIVER_NAMES:
+                return os.path.join(root, f)
 
     raise FileNotFoundError(
-        f"Не удалось найти chromedriver.exe рядом с: {candidate_path}. "
-        "Попробуй установить chromedriver вручную или проверь webdriver-manager."
+        f"Не удалось найти chromedriver рядом с: {candidate_path}. "
+        "Попробуй установить chromedriver вручную (CHROMEDRIVER_PATH) или проверь webdriver-manager."
     )
 
-def create_driver(headless: bool = False):
-    """Создаёт Chrome WebDriver через webdriver-manager."""
+
+def _read_driver_cache():
+    try:
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    path = cached.get("path")
+    if time.time() - cached.get("saved_at", 0) > DRIVER_CACHE_TTL or not path or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _write_driver_cache(path: str):
+    os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+    tmp_path = f"{DRIVER_CACHE_FILE}.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "saved_at": time.time()}, f)
+    # Атомарная замена: параллельные воркеры xdist не прочитают половину файла
+    os.replace(tmp_path, DRIVER_CACHE_FILE)
+
+
+@lru_cache(maxsize=None)
+def get_driver_path() -> str:
+    """CHROMEDRIVER_PATH → chromedriver в PATH → кэш на диске → webdriver-manager."""
+    path = os.getenv("CHROMEDRIVER_PATH") or shutil.which("chromedriver") or _read_driver_cache()
+    if path:
+        return path
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = _resolve_chromedriver_path(ChromeDriverManager().install())
+    _write_driver_cache(path)
+    return path
+
+
+def create_driver(headless: bool = None):
+    """Создаёт Chrome WebDriver; по умолчанию headless, HEADLESS=0 — с окном."""
+    if headless is None:
+        headless = os.getenv("HEADLESS", "1") != "0"
+
     options = Options()
     if headless:
         # new headless mode
@@ -72,13 +105,44 @@ def create_driver(headless: bool = False):
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
 
-    candidate = ChromeDriverManager().install()
-    driver_path = _resolve_chromedriver_path(candidate)
-
-    service = Service(driver_path)
+    service = Service(get_driver_path())
     driver = webdriver.Chrome(service=service, options=options)
     return driver
 
+
+def reset_driver(driver):
+    """Сбросить состояние между тестами вместо перезапуска браузера."""
+    if driver.current_url.startswith(BASE_URL):
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    driver.delete_all_cookies()
+    driver.get("about:blank")
+
+
+def api_login(driver, username: str = "admin", password: str = "1234", wait_seconds: int = 15):
+    """
+    Вход без формы: токен берём у backend и кладём в localStorage,
+    как это делает frontend/src/utils/auth.js (setAuth). Открывает /game.
+    """
+    response = requests.post(f"{API_URL}/api/auth/login",
+                             json={"username": username, "password": password}, timeout=10)
+    if response.status_code != 200:
+        return False
+    data = response.json()
+
+    # localStorage доступен только на странице своего origin
+    driver.get(f"{BASE_URL}/login")
+    driver.execute_script(
+        "window.localStorage.setItem('token', arguments[0]);"
+        "window.localStorage.setItem('user', arguments[1]);",
+        data["token"], json.dumps(data["user"]),
+    )
+    driver.get(f"{BASE_URL}/game")
+    try:
+        WebDriverWait(driver, wait_seconds).until(EC.url_contains("/game"))
+        return True
+    except Exception:
+        return False
+
 def login(driver, username: str = "admin", password: str = "1234", wait_seconds: int = 15):
     """
     Утилита — открыть страницу логина и выполнить вход.
@@ -1,9 +1,22 @@
 # tests/conftest.py
 import pytest
-from tests.config import create_driver
+from tests.config import create_driver, reset_driver
+from tests.suite_timer import register_suite_timer
 
-@pytest.fixture
-def driver():
+
+@pytest.fixture(scope="session")
+def _browser():
+    """Один браузер на процесс: под pytest-xdist (-n auto) у каждого воркера свой"""
     d = create_driver()
     yield d
     d.quit()
+
+
+@pytest.fixture
+def driver(_browser):
+    yield _browser
+    reset_driver(_browser)
+
+
+def pytest_configure(config):
+    register_suite_timer(config)
@@ -0,0 +1,33 @@
+import time
+
+SLOWEST_TESTS = 5
+
+
+class SuiteTimer:
+    """Общее время прогона и самые медленные тесты (в главном процессе, в т.ч. под xdist)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+
+    def pytest_runtest_logreport(self, report):
+        # Под xdist сюда приходят отчеты всех воркеров: setup + call + teardown
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+
+    def pytest_terminal_summary(self, terminalreporter, config):
+        wall_time = time.perf_counter() - self.started
+        total = sum(self.durations.values())
+        workers = getattr(config.option, "numprocesses", None) or 1
+
+        terminalreporter.write_sep("=", "время прогона")
+        terminalreporter.write_line(f"⏱️  Общее время: {wall_time:.1f} с, воркеров: {workers}")
+        terminalreporter.write_line(f"Сумма времени тестов: {total:.1f} с"
+                                    f" (ускорение от параллельности x{total / wall_time if wall_time else 0:.1f})")
+        for nodeid, duration in sorted(self.durations.items(), key=lambda item: -item[1])[:SLOWEST_TESTS]:
+            terminalreporter.write_line(f"  {duration:6.1f} с  {nodeid}")
+
+
+def register_suite_timer(config):
+    """Подключить отчет к pytest; только главный процесс — воркеры xdist отчет не печатают"""
+    if not hasattr(config, "workerinput"):
+        config.pluginmanager.register(SuiteTimer(), "suite_timer")
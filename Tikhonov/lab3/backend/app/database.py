@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError
 import os
@@ -30,6 +30,25 @@ def get_db():
         db.close()
 
 
+def add_missing_columns(base):
+    """
+    Добавить в существующие таблицы новые nullable-колонки моделей.
+    create_all создает только отсутствующие таблицы, а не колонки.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                logger.info(f"Добавление колонки {table.name}.{column.name}")
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
 def init_db():
     """Инициализация базы данных с повторными попытками"""
     from .models import Base
@@ -41,6 +60,7 @@ def init_db():
         try:
             logger.info(f"Попытка подключения к БД (попытка {attempt + 1}/{max_retries})")
             Base.metadata.create_all(bind=engine)
+            add_missing_columns(Base)
             logger.info("База данных успешно инициализирована")
             return
         except OperationalError as e:
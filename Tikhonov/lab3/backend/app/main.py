@@ -14,7 +14,8 @@ from .auth import (
     get_current_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from .memes import router as memes_router
+from .memes import router as memes_router, backfill_meme_columns
+from .rendering import shutdown_executor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -63,12 +64,19 @@ async def startup_event():
     await asyncio.sleep(2)
     try:
         init_db()
+        backfill_meme_columns()
         logger.info("Приложение готово к работе")
     except Exception as e:
         logger.error(f"Ошибка при инициализации БД: {e}")
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Остановка пула процессов рендеринга"""
+    shutdown_executor()
+
+
 @app.post("/api/auth/register", response_model=UserResponse)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     """Регистрация нового пользователя"""
@@ -1,14 +1,15 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from PIL import Image, ImageDraw, ImageFont
 from pydantic import BaseModel
-import io
 import os
+import uuid
 from typing import List
-from .database import get_db
+from .database import get_db, SessionLocal
 from .models import User, Meme
 from .auth import get_current_user
+from .rendering import render_cached, run_in_pool, normalize_image, thumbnail_path_for
 
 
 class TextItem(BaseModel):
@@ -22,9 +23,38 @@ router = APIRouter(prefix="/api/memes", tags=["memes"])
 
 UPLOAD_DIR = "/app/uploads"
 OUTPUT_DIR = "/app/outputs"
+# Готовые мемы по ключу (хэш изображения, тексты, выравнивание)
+CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
+
+# Загрузка читается кусками, файлы больше лимита отклоняются
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MEME_MAX_UPLOAD_MB", "20")) * 1024 * 1024
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+
+def remove_file(path: str):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def backfill_meme_columns():
+    """
+    Заполнить output_path для мемов, созданных до появления колонки.
+    Проверяются только мемы без output_path, один раз при старте.
+    """
+    db = SessionLocal()
+    try:
+        memes = db.query(Meme).filter(Meme.output_path.is_(None)).all()
+        for meme in memes:
+            legacy_path = os.path.join(OUTPUT_DIR, f"meme_{meme.id}_{meme.user_id}.png")
+            if os.path.exists(legacy_path):
+                meme.output_path = legacy_path
+        db.commit()
+    finally:
+        db.close()
 
 
 @router.post("/upload")
@@ -37,17 +67,36 @@ async def upload_image(
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
 
-    # Сохраняем оригинальное изображение
-    file_path = os.path.join(UPLOAD_DIR, f"{current_user.id}_{file.filename}")
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Сохраняем загрузку кусками, не держа весь файл в памяти и не блокируя цикл событий
+    ext = os.path.splitext(file.filename or "")[1].lower() or ".jpg"
+    raw_path = os.path.join(UPLOAD_DIR, f"{current_user.id}_{uuid.uuid4().hex}{ext}")
+    size = 0
+    buffer = await run_in_threadpool(open, raw_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                break
+            await run_in_threadpool(buffer.write, chunk)
+    finally:
+        await run_in_threadpool(buffer.close)
+    if size > MAX_UPLOAD_BYTES:
+        await run_in_threadpool(remove_file, raw_path)
+        raise HTTPException(status_code=413, detail="File is too large")
+
+    # Поворот по EXIF, ограничение разрешения и миниатюра — в пуле процессов
+    try:
+        file_path = await run_in_pool(normalize_image, raw_path)
+    except Exception:
+        await run_in_threadpool(remove_file, raw_path)
+        raise HTTPException(status_code=400, detail="File must be an image")
 
     # Создаем запись в БД
     meme = Meme(
         user_id=current_user.id,
         filename=file_path,
-        original_filename=file.filename
+        original_filename=file.filename,
+        thumbnail_path=thumbnail_path_for(file_path)
     )
     db.add(meme)
     db.commit()
@@ -76,108 +125,35 @@ async def create_meme(
     if not meme:
         raise HTTPException(status_code=404, detail="Meme not found")
 
-    # Открываем изображение
-    try:
-        image = Image.open(meme.filename)
-        draw = ImageDraw.Draw(image)
-
-        # Пытаемся загрузить шрифт, если не получается - используем стандартный
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 40)
-        except:
-            try:
-                font = ImageFont.truetype("arial.ttf", 40)
-            except:
-                font = ImageFont.load_default()
-
-        # Добавляем текст на изображение
-        texts = request.texts
-        width, height = image.size
-        
-        # Фильтруем только непустые тексты
-        valid_texts = [t for t in texts if t.text.strip()]
-        
-        if not valid_texts:
-            raise HTTPException(status_code=400, detail="No valid texts provided")
-        
-        # Группируем тексты по выравниванию
-        top_texts = [t for t in valid_texts if t.alignment.lower() == "top"]
-        center_texts = [t for t in valid_texts if t.alignment.lower() == "center"]
-        bottom_texts = [t for t in valid_texts if t.alignment.lower() == "bottom"]
-        
-        # Распределяем тексты по вертикали в зависимости от выравнивания
-        for text_item in valid_texts:
-            text = text_item.text.strip()
-            alignment = text_item.alignment.lower()
-            
-            # Получаем размеры текста
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height_bbox = bbox[3] - bbox[1]
-            
-            # Выравнивание по горизонтали (всегда по центру)
-            x_position = (width - text_width) // 2
-            
-            # Выравнивание по вертикали
-            if alignment == "top":
-                # Верх - тексты размещаются сверху вниз
-                index = top_texts.index(text_item)
-                if len(top_texts) == 1:
-                    y_position = 20  # Отступ сверху
-                else:
-                    spacing = min(30, (height // 3) // len(top_texts))
-                    y_position = 20 + (text_height_bbox + spacing) * index
-            elif alignment == "bottom":
-                # Низ - тексты размещаются снизу вверх
-                index = bottom_texts.index(text_item)
-                if len(bottom_texts) == 1:
-                    y_position = height - text_height_bbox - 20  # Отступ снизу
-                else:
-                    spacing = min(30, (height // 3) // len(bottom_texts))
-                    y_position = height - text_height_bbox - 20 - (text_height_bbox + spacing) * (len(bottom_texts) - 1 - index)
-            else:  # center (по умолчанию)
-                # Центр - тексты размещаются в центре изображения
-                index = center_texts.index(text_item)
-                center_y = height // 2
-                if len(center_texts) == 1:
-                    y_position = center_y - text_height_bbox // 2
-                else:
-                    total_height = (text_height_bbox + 20) * len(center_texts)
-                    start_y = center_y - total_height // 2
-                    y_position = start_y + (text_height_bbox + 20) * index
-
-            # Рисуем обводку (черная)
-            for adj in range(-2, 3):
-                for adj2 in range(-2, 3):
-                    draw.text(
-                        (x_position + adj, y_position + adj2),
-                        text,
-                        font=font,
-                        fill="black"
-                    )
-            
-            # Рисуем основной текст (белый)
-            draw.text(
-                (x_position, y_position),
-                text,
-                font=font,
-                fill="white"
-            )
-
-        # Сохраняем результат
-        output_filename = f"meme_{meme_id}_{current_user.id}.png"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        image.save(output_path, "PNG")
-
-        return {
-            "id": meme_id,
-            "output_filename": output_filename,
-            "message": "Meme created successfully"
-        }
+    # Фильтруем только непустые тексты
+    texts = [
+        (t.text.strip(), t.alignment.lower())
+        for t in request.texts
+        if t.text.strip()
+    ]
+    if not texts:
+        raise HTTPException(status_code=400, detail="No valid texts provided")
 
+    output_filename = f"meme_{meme_id}_{current_user.id}.png"
+    output_path = os.path.join(OUTPUT_DIR, output_filename)
+
+    # Рендеринг идет в пуле процессов; одинаковые запросы берутся из кэша
+    try:
+        cached = await render_cached(meme.filename, texts, CACHE_DIR, output_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating meme: {str(e)}")
 
+    meme.output_path = output_path
+    meme.output_thumbnail_path = thumbnail_path_for(output_path)
+    db.commit()
+
+    return {
+        "id": meme_id,
+        "output_filename": output_filename,
+        "cached": cached,
+        "message": "Meme created successfully"
+    }
+
 
 @router.get("/download/{meme_id}")
 async def download_meme(
@@ -194,14 +170,11 @@ async def download_meme(
     if not meme:
         raise HTTPException(status_code=404, detail="Meme not found")
 
-    output_filename = f"meme_{meme_id}_{current_user.id}.png"
-    output_path = os.path.join(OUTPUT_DIR, output_filename)
-
-    if not os.path.exists(output_path):
+    if not meme.output_path:
         raise HTTPException(status_code=404, detail="Meme file not found")
 
     return FileResponse(
-        output_path,
+        meme.output_path,
         media_type="image/png",
         filename=f"meme_{meme.original_filename}"
     )
@@ -222,9 +195,6 @@ async def get_meme_image(
     if not meme:
         raise HTTPException(status_code=404, detail="Meme not found")
 
-    output_filename = f"meme_{meme_id}_{current_user.id}.png"
-    output_path = os.path.join(OUTPUT_DIR, output_filename)
-
     # Определяем тип медиа на основе расширения файла
     def get_media_type(filename):
         ext = os.path.splitext(filename)[1].lower()
@@ -238,38 +208,58 @@ async def get_meme_image(
         return media_types.get(ext, 'image/png')
 
     # Если готовый мем не существует, возвращаем оригинальное изображение
-    if not os.path.exists(output_path):
-        if os.path.exists(meme.filename):
-            return FileResponse(
-                meme.filename,
-                media_type=get_media_type(meme.filename),
-            )
-        raise HTTPException(status_code=404, detail="Meme file not found")
+    if not meme.output_path:
+        return FileResponse(
+            meme.filename,
+            media_type=get_media_type(meme.filename),
+        )
 
     return FileResponse(
-        output_path,
+        meme.output_path,
         media_type="image/png",
     )
 
 
+@router.get("/thumbnail/{meme_id}")
+async def get_meme_thumbnail(
+    meme_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Миниатюра для списка мемов: готового мема, если он есть, иначе исходника"""
+    meme = db.query(Meme).filter(
+        Meme.id == meme_id,
+        Meme.user_id == current_user.id
+    ).first()
+
+    if not meme:
+        raise HTTPException(status_code=404, detail="Meme not found")
+
+    path = meme.output_thumbnail_path if meme.output_path else meme.thumbnail_path
+    if not path:
+        # Мем загружен до появления миниатюр
+        path = meme.output_path or meme.filename
+    return FileResponse(
+        path,
+        headers={"Cache-Control": "private, max-age=60"},
+    )
+
+
 @router.get("/list")
 async def list_memes(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Список всех мемов пользователя"""
-    memes = db.query(Meme).filter(Meme.user_id == current_user.id).all()
-    result = []
-    for meme in memes:
-        output_filename = f"meme_{meme.id}_{current_user.id}.png"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        has_meme = os.path.exists(output_path)
-        
-        result.append({
-            "id": meme.id,
-            "filename": meme.original_filename,
-            "created_at": meme.created_at.isoformat(),
-            "has_meme": has_meme  # Есть ли готовый мем
-        })
-    return result
+    # Наличие готового мема берется из БД, без проверки файлов на диске
+    memes = db.query(
+        Meme.id, Meme.original_filename, Meme.created_at, Meme.output_path
+    ).filter(Meme.user_id == current_user.id).order_by(Meme.id).all()
+    return [{
+        "id": meme.id,
+        "filename": meme.original_filename,
+        "created_at": meme.created_at.isoformat(),
+        "has_meme": meme.output_path is not None,  # Есть ли готовый мем
+        "thumbnail_url": f"/api/memes/thumbnail/{meme.id}"
+    } for meme in memes]
 
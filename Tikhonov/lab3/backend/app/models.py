@@ -22,9 +22,12 @@ class Meme(Base):
     __tablename__ = "memes"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     filename = Column(String, nullable=False)
     original_filename = Column(String, nullable=False)
+    thumbnail_path = Column(String, nullable=True)  # Миниатюра исходника для списка
+    output_path = Column(String, nullable=True)  # Готовый мем; None — мем еще не создан
+    output_thumbnail_path = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     owner = relationship("User", back_populates="memes")
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+logger = logging.getLogger(__name__)
+
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "arial.ttf",
+]
+FONT_SIZE = 40
+STROKE_WIDTH = 2
+# Загрузки ужимаются до этой стороны, миниатюры для списка — до THUMBNAIL_SIDE
+MAX_IMAGE_SIDE = int(os.getenv("MEME_MAX_IMAGE_SIDE", "2048"))
+THUMBNAIL_SIDE = 320
+
+# Количество процессов для рендеринга (по умолчанию — по числу ядер)
+RENDER_WORKERS = int(os.getenv("MEME_RENDER_WORKERS", "0")) or os.cpu_count() or 1
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Запросы, которые уже рендерятся: одинаковые параллельные запросы ждут один результат
+_inflight: Dict[str, asyncio.Future] = {}
+# (путь, mtime, размер) -> sha256 содержимого
+_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+@lru_cache(maxsize=8)
+def get_font(size: int = FONT_SIZE):
+    """Шрифт загружается с диска один раз на процесс"""
+    for path in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 файла (запоминается, пока файл не изменился)"""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = _digests[key] = sha.hexdigest()
+    return digest
+
+
+def thumbnail_path_for(path: str) -> str:
+    """Путь миниатюры рядом с изображением"""
+    return os.path.splitext(path)[0] + "_thumb.webp"
+
+
+def save_thumbnail(image: Image.Image, path: str):
+    thumb = image.copy()
+    thumb.thumbnail((THUMBNAIL_SIDE, THUMBNAIL_SIDE), Image.LANCZOS)
+    thumb.save(path, "WEBP", quality=80)
+
+
+def normalize_image(raw_path: str) -> str:
+    """
+    Привести загрузку к рабочему виду: применить поворот из EXIF,
+    уменьшить до MAX_IMAGE_SIDE и сохранить миниатюру.
+    Выполняется в пуле процессов.
+
+    Args:
+        raw_path: Путь к сохраненному как есть файлу
+
+    Returns:
+        Путь к нормализованному изображению (JPEG, или PNG при прозрачности)
+    """
+    with Image.open(raw_path) as source:
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+
+    base = os.path.splitext(raw_path)[0]
+    path = base + (".png" if has_alpha else ".jpg")
+    tmp_path = f"{path}.tmp"
+    if has_alpha:
+        image.save(tmp_path, "PNG")
+    else:
+        image.save(tmp_path, "JPEG", quality=90)
+    os.replace(tmp_path, path)
+    if path != raw_path:
+        os.remove(raw_path)
+    save_thumbnail(image, thumbnail_path_for(path))
+    return path
+
+
+def cache_key(image_digest: str, texts: List[Tuple[str, str]]) -> str:
+    """Ключ кэша готовых мемов: хэш исходника + тексты с выравниванием"""
+    payload = json.dumps([image_digest, texts, FONT_SIZE, STROKE_WIDTH], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_meme(source_path: str, texts: List[Tuple[str, str]], output_path: str) -> str:
+    """
+    Нарисовать тексты поверх изображения и сохранить PNG.
+    Выполняется в отдельном процессе, поэтому принимает только простые типы.
+
+    Args:
+        source_path: Путь к исходному изображению
+        texts: Список (текст, выравнивание: top/center/bottom)
+        output_path: Куда сохранить результат
+
+    Returns:
+        output_path
+    """
+    font = get_font()
+    image = Image.open(source_path)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    draw = ImageDraw.Draw(image)
+    width, height = image.size
+
+    # Группируем тексты по выравниванию
+    groups = {"top": [], "center": [], "bottom": []}
+    for index, (_, alignment) in enumerate(texts):
+        groups.get(alignment, groups["center"]).append(index)
+
+    for index, (text, alignment) in enumerate(texts):
+        bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = bbox[2] - bbox[0]
+        text_height_bbox = bbox[3] - bbox[1]
+
+        # Выравнивание по горизонтали (всегда по центру)
+        x_position = (width - text_width) // 2
+
+        # Выравнивание по вертикали
+        if alignment == "top":
+            # Верх - тексты размещаются сверху вниз
+            group = groups["top"]
+            position = group.index(index)
+            if len(group) == 1:
+                y_position = 20  # Отступ сверху
+            else:
+                spacing = min(30, (height // 3) // len(group))
+                y_position = 20 + (text_height_bbox + spacing) * position
+        elif alignment == "bottom":
+            # Низ - тексты размещаются снизу вверх
+            group = groups["bottom"]
+            position = group.index(index)
+            if len(group) == 1:
+                y_position = height - text_height_bbox - 20  # Отступ снизу
+            else:
+                spacing = min(30, (height // 3) // len(group))
+                y_position = height - text_height_bbox - 20 - (text_height_bbox + spacing) * (len(group) - 1 - position)
+        else:  # center (по умолчанию)
+            # Центр - тексты размещаются в центре изображения
+            group = groups["center"]
+            position = group.index(index)
+            center_y = height // 2
+            if len(group) == 1:
+                y_position = center_y - text_height_bbox // 2
+            else:
+                total_height = (text_height_bbox + 20) * len(group)
+                start_y = center_y - total_height // 2
+                y_position = start_y + (text_height_bbox + 20) * position
+
+        # Белый текст с черной обводкой за один вызов
+        draw.text(
+            (x_position, y_position),
+            text,
+            font=font,
+            fill="white",
+            stroke_width=STROKE_WIDTH,
+            stroke_fill="black"
+        )
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    image.save(tmp_path, "PNG")
+    os.replace(tmp_path, output_path)
+    save_thumbnail(image, thumbnail_path_for(output_path))
+    return output_path
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+    return _executor
+
+
+async def run_in_pool(func, *args):
+    """Выполнить CPU-тяжелую функцию в пуле процессов"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _link(cached_path: str, output_path: str):
+    if os.path.exists(output_path) and os.path.samefile(cached_path, output_path):
+        return
+    tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(cached_path, tmp_path)
+    except OSError:
+        shutil.copyfile(cached_path, tmp_path)
+    os.replace(tmp_path, output_path)
+
+
+def _publish(cached_path: str, output_path: str):
+    """Выложить закэшированный мем (и его миниатюру) под именем конкретного мема пользователя"""
+    _link(cached_path, output_path)
+    _link(thumbnail_path_for(cached_path), thumbnail_path_for(output_path))
+
+
+async def render_cached(source_path: str, texts: List[Tuple[str, str]], cache_dir: str, output_path: str) -> bool:
+    """
+    Отрендерить мем вне цикла событий, переиспользуя уже готовый результат.
+
+    Args:
+        source_path: Путь к исходному изображению
+        texts: Список (текст, выравнивание)
+        cache_dir: Каталог кэша готовых мемов (имена по ключу кэша)
+        output_path: Итоговый путь мема пользователя
+
+    Returns:
+        True, если результат взят из кэша
+    """
+    loop = asyncio.get_running_loop()
+    digest = await loop.run_in_executor(None, file_digest, source_path)
+    key = cache_key(digest, texts)
+    cached_path = os.path.join(cache_dir, f"{key}.png")
+
+    hit = os.path.exists(cached_path) and os.path.exists(thumbnail_path_for(cached_path))
+    if not hit:
+        future = _inflight.get(key)
+        if future is None:
+            future = loop.run_in_executor(get_executor(), render_meme, source_path, texts, cached_path)
+            _inflight[key] = future
+            future.add_done_callback(lambda _: _inflight.pop(key, None))
+        else:
+            hit = True
+        await asyncio.shield(future)
+
+    await loop.run_in_executor(None, _publish, cached_path, output_path)
+    return hit
@@ -261,9 +261,10 @@ async function loadMemes() {
     }
 }
 
-async function loadMemeImage(memeId) {
+async function loadMemeImage(memeId, thumbnail = false) {
     try {
-        const response = await fetch(`${API_URL}/api/memes/image/${memeId}`, {
+        const endpoint = thumbnail ? 'thumbnail' : 'image';
+        const response = await fetch(`${API_URL}/api/memes/${endpoint}/${memeId}`, {
             headers: {
                 'Authorization': `Bearer ${token}`,
             },
@@ -289,12 +290,13 @@ async function displayMemes(memes) {
         return;
     }
 
-    for (const meme of memes) {
+    // Загружаем миниатюры с авторизацией параллельно
+    const imageUrls = await Promise.all(memes.map(meme => loadMemeImage(meme.id, true)));
+
+    memes.forEach((meme, index) => {
         const memeDiv = document.createElement('div');
         memeDiv.className = 'meme-item';
-        
-        // Загружаем изображение с авторизацией
-        const imageUrl = await loadMemeImage(meme.id);
+        const imageUrl = imageUrls[index];
         
         memeDiv.innerHTML = `
             <div class="meme-image-container">
@@ -310,7 +312,7 @@ async function displayMemes(memes) {
             </div>
         `;
         container.appendChild(memeDiv);
-    }
+    });
 }
 
 async function downloadMeme(memeId) {
@@ -1,20 +1,150 @@
-from typing import List, Tuple, Optional
-from copy import deepcopy
-from core.board import is_valid_move, apply_move_and_cascade, ROWS, COLS
-
-def bot_find_best_move(board: List[List[int]]) -> Tuple[Optional[Tuple[int, int, int, int]], int]:
-    best_move = None
-    max_removed = 0
-    for r in range(ROWS):
-        for c in range(COLS):
-            for dr, dc in [(0, 1), (1, 0)]:
-                nr, nc = r + dr, c + dc
-                if nr >= ROWS or nc >= COLS:
-                    continue
-                if is_valid_move(board, r, c, nr, nc):
-                    test_board = deepcopy(board)
-                    removed = apply_move_and_cascade(test_board, r, c, nr, nc)
-                    if removed is not None and removed > max_removed:
-                        max_removed = removed
-                        best_move = (r, c, nr, nc)
-    return best_move, max_removed
\ No newline at end of file
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from core.engine import Board, Move
+
+# Параметры сложности:
+#   depth — глубина поиска в ходах бота,
+#   samples — сколько случайных досыпаний усредняется в узле случая,
+#   width — сколько лучших по упорядочиванию ходов рассматривается во внутренних узлах,
+#   time_budget — лимит времени на ход, сек
+DIFFICULTY_LEVELS = {
+    "easy": {"depth": 1, "samples": 1, "width": 112, "time_budget": 0.05},
+    "normal": {"depth": 2, "samples": 2, "width": 12, "time_budget": 0.2},
+    "hard": {"depth": 3, "samples": 3, "width": 10, "time_budget": 0.5},
+}
+DEFAULT_DIFFICULTY = "normal"
+# Будущие очки ценятся чуть меньше текущих
+DISCOUNT = 0.9
+TT_MAX_ENTRIES = 200_000
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class BotSearch:
+    """
+    Expectimax с ограничением глубины: узлы бота выбирают лучший ход,
+    узлы случая усредняют результат по нескольким случайным досыпаниям.
+    Итеративное углубление укладывается в лимит времени, таблица
+    транспозиций по хэшу Зобриста не дает пересчитывать повторяющиеся
+    позиции, а ходы упорядочиваются по числу плиток, снимаемых сразу.
+    Доска не копируется: ходы делаются и отменяются на одном Board.
+    """
+
+    def __init__(self, depth: int = 2, samples: int = 2, width: int = 12,
+                 time_budget: float = 0.2, seed: Optional[int] = None):
+        self.depth = depth
+        self.samples = samples
+        self.width = width
+        self.time_budget = time_budget
+        self.rng = random.Random(seed)
+        # (хэш доски, глубина) -> оценка
+        self.tt: Dict[Tuple[int, int], float] = {}
+        # хэш доски -> лучший ход с прошлой итерации (для упорядочивания)
+        self.best_moves: Dict[int, Move] = {}
+        self.deadline = math.inf
+        self.nodes = 0
+
+    @classmethod
+    def for_difficulty(cls, difficulty: str = DEFAULT_DIFFICULTY, seed: Optional[int] = None) -> "BotSearch":
+        if difficulty not in DIFFICULTY_LEVELS:
+            raise ValueError(f"Неизвестная сложность: {difficulty}")
+        return cls(seed=seed, **DIFFICULTY_LEVELS[difficulty])
+
+    def ordered_moves(self, board: Board, width: Optional[int] = None) -> List[Move]:
+        """Допустимые ходы, лучшие первыми: сначала ход из таблицы, затем по снимаемым плиткам"""
+        moves = sorted(board.valid_moves, key=lambda m: (-board.first_step_removed(*m), m))
+        hinted = self.best_moves.get(board.hash)
+        if hinted in moves:
+            moves.remove(hinted)
+            moves.insert(0, hinted)
+        return moves[:width] if width else moves
+
+    def max_node(self, board: Board, depth: int) -> float:
+        """Лучшая ожидаемая сумма очков за depth ходов с этой позиции"""
+        if time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        key = (board.hash, depth)
+        cached = self.tt.get(key)
+        if cached is not None:
+            return cached
+        self.nodes += 1
+
+        best_value, best_move = 0.0, None
+        for move in self.ordered_moves(board, self.width):
+            value = self.chance_node(board, move, depth)
+            if best_move is None or value > best_value:
+                best_value, best_move = value, move
+
+        if len(self.tt) >= TT_MAX_ENTRIES:
+            self.tt.clear()
+        self.tt[key] = best_value
+        if best_move is not None:
+            self.best_moves[board.hash] = best_move
+        return best_value
+
+    def chance_node(self, board: Board, move: Move, depth: int) -> float:
+        """Среднее по случайным досыпаниям: снятые плитки + ценность следующей позиции"""
+        samples = self.samples if depth > 1 else 1
+        total = 0.0
+        for _ in range(samples):
+            removed = board.make_move(*move)
+            try:
+                future = self.max_node(board, depth - 1) if depth > 1 else 0.0
+            finally:
+                board.unmake_move()
+            total += removed + DISCOUNT * future
+        return total / samples
+
+    def search(self, cells) -> Tuple[Optional[Move], float]:
+        """
+        Выбрать ход итеративным углублением.
+
+        Args:
+            cells: Доска (вложенные списки или массив)
+
+        Returns:
+            (лучший ход или None, его ожидаемая ценность)
+        """
+        board = Board(cells, rng=self.rng)
+        root_moves = self.ordered_moves(board)
+        if not root_moves:
+            return None, 0.0
+
+        best_move, best_value = root_moves[0], 0.0
+        start = time.perf_counter()
+        for depth in range(1, self.depth + 1):
+            # Первая итерация всегда доводится до конца, чтобы ход был в любом случае
+            self.deadline = math.inf if depth == 1 else start + self.time_budget
+            try:
+                values = {move: self.chance_node(board, move, depth) for move in root_moves}
+            except SearchTimeout:
+                break
+            root_moves.sort(key=lambda m: -values[m])
+            best_move, best_value = root_moves[0], values[root_moves[0]]
+        return best_move, best_value
+
+
+def bot_find_best_move(board: List[List[int]], difficulty: str = DEFAULT_DIFFICULTY,
+                       seed: Optional[int] = None) -> Tuple[Optional[Move], int]:
+    """
+    Ход бота и число плиток, которые он снимает.
+
+    Args:
+        board: Доска (не изменяется)
+        difficulty: Уровень сложности из DIFFICULTY_LEVELS
+        seed: Seed для случайных досыпаний внутри поиска
+
+    Returns:
+        (ход или None, число снятых плиток при выполнении хода)
+    """
+    move, _ = BotSearch.for_difficulty(difficulty, seed).search(board)
+    if move is None:
+        return None, 0
+    # Сам ход выполняется на копии с общим генератором, как и ход игрока
+    removed = Board(board).apply_move(*move)
+    return move, removed or 0
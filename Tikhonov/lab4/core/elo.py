@@ -1,4 +1,6 @@
-from typing import Tuple
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
 
 def expected_score(rating_a: float, rating_b: float) -> float:
     return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
@@ -8,4 +10,78 @@ def update_elo(rating_a: float, rating_b: float, outcome: float, k=32) -> Tuple[
     e_b = expected_score(rating_b, rating_a)
     new_a = rating_a + k * (outcome - e_a)
     new_b = rating_b + k * ((1 - outcome) - e_b)
-    return new_a, new_b
\ No newline at end of file
+    return new_a, new_b
+
+BOT_RATING = 1200.0
+
+def update_ratings(ratings: Dict[int, float], games: Iterable[Tuple[int, int, float]], k=32) -> Dict[int, float]:
+    """
+    Последовательно применить результаты пачки матчей к рейтингам в памяти.
+
+    Args:
+        ratings: id игрока -> рейтинг (обновляется на месте)
+        games: (id первого игрока, id второго, исход для первого); id < 0 — бот
+               с постоянным рейтингом BOT_RATING
+        k: Коэффициент Эло
+
+    Returns:
+        ratings
+    """
+    for a, b, outcome in games:
+        rating_b = ratings[b] if b > 0 else BOT_RATING
+        new_a, new_b = update_elo(ratings[a], rating_b, outcome, k)
+        ratings[a] = new_a
+        if b > 0:
+            ratings[b] = new_b
+    return ratings
+
+def recompute_elo(player1_ids, player2_ids, outcomes, initial=1200.0, k=32) -> Dict[int, float]:
+    """
+    Пересчитать рейтинги по всей истории матчей векторно.
+
+    Матч зависит только от предыдущих матчей своих двух игроков, поэтому
+    матчи раскладываются по уровням (уровень = 1 + максимальный уровень
+    предыдущих матчей участников). Внутри уровня каждый игрок встречается
+    не больше раза, и весь уровень считается одной операцией NumPy —
+    результат совпадает с последовательным update_elo в порядке истории.
+
+    Args:
+        player1_ids, player2_ids: Участники матчей в хронологическом порядке (id < 0 — бот)
+        outcomes: Исход для первого игрока (1, 0.5, 0)
+        initial: Стартовый рейтинг
+        k: Коэффициент Эло
+
+    Returns:
+        id игрока -> рейтинг
+    """
+    p1 = np.asarray(player1_ids, dtype=np.int64)
+    p2 = np.asarray(player2_ids, dtype=np.int64)
+    result = np.asarray(outcomes, dtype=np.float64)
+    pvp = p2 > 0
+    players = np.unique(np.concatenate([p1, p2[pvp]]))
+    ratings = np.full(len(players), initial, dtype=np.float64)
+    if len(p1) == 0:
+        return {}
+    idx1 = np.searchsorted(players, p1)
+    idx2 = np.where(pvp, np.searchsorted(players, np.where(pvp, p2, players[0])), -1)
+
+    last_level = [0] * len(players)
+    levels = np.empty(len(p1), dtype=np.int64)
+    for i, (a, b) in enumerate(zip(idx1.tolist(), idx2.tolist())):
+        level = max(last_level[a], last_level[b] if b >= 0 else 0) + 1
+        last_level[a] = level
+        if b >= 0:
+            last_level[b] = level
+        levels[i] = level
+
+    order = np.argsort(levels, kind="stable")
+    bounds = np.flatnonzero(np.diff(levels[order])) + 1
+    for chunk in np.split(order, bounds):
+        a, b, o, both = idx1[chunk], idx2[chunk], result[chunk], pvp[chunk]
+        rating_a = ratings[a]
+        rating_b = np.where(both, ratings[b], BOT_RATING)
+        e_a = 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+        e_b = 1 / (1 + 10 ** ((rating_a - rating_b) / 400))
+        ratings[a] = rating_a + k * (o - e_a)
+        ratings[b[both]] = rating_b[both] + k * ((1 - o[both]) - e_b[both])
+    return dict(zip(players.tolist(), ratings.tolist()))
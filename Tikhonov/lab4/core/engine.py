@@ -0,0 +1,365 @@
+# core/engine.py
+import random
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.board import TILE_TYPES, ROWS, COLS
+
+Move = Tuple[int, int, int, int]
+
+# Битборды: бит r * COLS + c соответствует клетке (r, c)
+FULL = (1 << (ROWS * COLS)) - 1
+COL_FIRST = sum(1 << (r * COLS) for r in range(ROWS))
+COL_LAST = COL_FIRST << (COLS - 1)
+NOT_COL_FIRST = FULL ^ COL_FIRST
+NOT_COL_LAST = FULL ^ COL_LAST
+ROW_BITS = [((1 << COLS) - 1) << (r * COLS) for r in range(ROWS)]
+COL_BITS = [COL_FIRST << c for c in range(COLS)]
+COLORS = np.arange(1, TILE_TYPES + 1, dtype=np.int8).reshape(-1, 1)
+
+# Хэш Зобриста: случайное 64-битное число на каждую пару (цвет, клетка); строка 0 — пустая клетка
+_zobrist_rng = np.random.RandomState(20240601)
+ZOBRIST = _zobrist_rng.randint(0, 2 ** 63, size=(TILE_TYPES + 1, ROWS * COLS), dtype=np.int64)
+ZOBRIST[0] = 0
+ZOBRIST_KEYS = ZOBRIST.tolist()
+CELL_INDEX = np.arange(ROWS * COLS)
+
+# Все 112 пар соседних клеток в том же порядке, что перебирает has_valid_move
+ALL_MOVES: List[Move] = [
+    (r, c, r + dr, c + dc)
+    for r in range(ROWS)
+    for c in range(COLS)
+    for dr, dc in [(0, 1), (1, 0)]
+    if r + dr < ROWS and c + dc < COLS
+]
+
+
+# Сдвиги битборда на одну клетку (без переноса через край доски)
+def _east(b: int) -> int:
+    return (b << 1) & NOT_COL_FIRST
+
+
+def _west(b: int) -> int:
+    return (b >> 1) & NOT_COL_LAST
+
+
+def _south(b: int) -> int:
+    return (b << COLS) & FULL
+
+
+def _north(b: int) -> int:
+    return b >> COLS
+
+
+def _lines_mask(lines: Optional[Iterable[int]], bits: List[int]) -> int:
+    if lines is None:
+        return FULL
+    mask = 0
+    for i in lines:
+        mask |= bits[int(i)]
+    return mask
+
+
+def bits_to_mask(bits: int) -> np.ndarray:
+    """Битборд -> булева маска ROWS×COLS"""
+    raw = np.array([bits], dtype="<u8").view(np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:ROWS * COLS].reshape(ROWS, COLS).astype(bool)
+
+
+def find_runs(bitboards: List[int], rows_mask: int = FULL, cols_mask: int = FULL) -> Tuple[int, int]:
+    """
+    Клетки горизонтальных и вертикальных совпадений (3+ в ряд).
+
+    Args:
+        bitboards: Битборд каждого цвета
+        rows_mask: Горизонтальные совпадения ищутся только в этих строках
+        cols_mask: Вертикальные — только в этих столбцах
+
+    Returns:
+        (битборд горизонтальных совпадений, битборд вертикальных)
+    """
+    row_runs = col_runs = 0
+    for b in bitboards:
+        h = b & rows_mask
+        start = h & _west(h) & _west(_west(h))
+        if start:
+            row_runs |= start | _east(start) | _east(_east(start))
+        v = b & cols_mask
+        start = v & _north(v) & _north(_north(v))
+        if start:
+            col_runs |= start | _south(start) | _south(_south(start))
+    return row_runs, col_runs
+
+
+def find_moves(bitboards: List[int]) -> Tuple[int, int]:
+    """
+    Все допустимые ходы стабильной доски за O(число цветов) операций над словами.
+
+    Returns:
+        (битборд горизонтальных ходов — бит левой клетки пары,
+         битборд вертикальных ходов — бит верхней клетки пары)
+    """
+    h_moves = v_moves = 0
+    for b in bitboards:
+        w1, e1, n1, s1 = _west(b), _east(b), _north(b), _south(b)
+        # Клетка t, куда пришла плитка этого цвета, замыкает линию:
+        pair_east = w1 & _west(w1)    # t+1, t+2
+        pair_west = e1 & _east(e1)    # t-1, t-2
+        pair_south = n1 & _north(n1)  # ниже на 1 и 2
+        pair_north = s1 & _south(s1)  # выше на 1 и 2
+        split_h = w1 & e1             # t-1 и t+1
+        split_v = n1 & s1             # выше и ниже
+        free = FULL ^ b
+        # Клетка, откуда пришла плитка, в линию не входит: там теперь другая плитка
+        from_west = e1 & free & (pair_east | pair_north | pair_south | split_v)
+        from_east = w1 & free & (pair_west | pair_north | pair_south | split_v)
+        from_north = s1 & free & (pair_south | pair_east | pair_west | split_h)
+        from_south = n1 & free & (pair_north | pair_east | pair_west | split_h)
+        h_moves |= (from_west >> 1) | from_east
+        v_moves |= (from_north >> COLS) | from_south
+    return h_moves, v_moves
+
+
+class Board:
+    """
+    Компактная доска «три в ряд»: NumPy-массив int8 8×8 и битборд на каждый цвет.
+
+    Инвариант: между ходами на доске нет готовых совпадений. Поэтому после
+    перестановки проверяются только две затронутые строки и два столбца, а
+    после обвала — только столбцы с удаленными плитками и строки над самой
+    нижней удаленной плиткой. Обвал и досыпание векторизованы на NumPy,
+    поиск совпадений и допустимых ходов идет по битбордам.
+    """
+
+    def __init__(self, cells, rng=None):
+        """
+        Args:
+            cells: Доска как вложенные списки или массив ROWS×COLS
+            rng: Источник случайности для досыпания плиток (по умолчанию модуль random,
+                 как в core.board — при одинаковом seed результат совпадает)
+        """
+        self.cells = np.array(cells, dtype=np.int8).reshape(ROWS, COLS)
+        self.rng = rng or random
+        self.bitboards = self._pack()
+        self.hash = self._zobrist()
+        self._moves: Optional[Tuple[int, int]] = None
+        # Стек для отмены ходов (make_move / unmake_move)
+        self._history: List[tuple] = []
+
+    @classmethod
+    def generate(cls, rng=None) -> "Board":
+        """
+        Случайная доска без готовых совпадений и хотя бы с одним ходом.
+        Цвет каждой клетки выбирается среди тех, что не замыкают тройку,
+        поэтому перебирать целые доски до удачной не нужно.
+        """
+        rng = rng or random
+        while True:
+            g = [[0] * COLS for _ in range(ROWS)]
+            for r in range(ROWS):
+                for c in range(COLS):
+                    forbidden = set()
+                    if c >= 2 and g[r][c - 1] == g[r][c - 2]:
+                        forbidden.add(g[r][c - 1])
+                    if r >= 2 and g[r - 1][c] == g[r - 2][c]:
+                        forbidden.add(g[r - 1][c])
+                    g[r][c] = rng.choice([t for t in range(1, TILE_TYPES + 1) if t not in forbidden])
+            board = cls(g, rng)
+            if board.has_valid_move():
+                return board
+
+    def _pack(self) -> List[int]:
+        eq = self.cells.reshape(1, -1) == COLORS
+        return np.packbits(eq, axis=1, bitorder="little").view("<u8").ravel().tolist()
+
+    def _zobrist(self) -> int:
+        return int(np.bitwise_xor.reduce(ZOBRIST[self.cells.ravel(), CELL_INDEX]))
+
+    def to_list(self) -> List[List[int]]:
+        return self.cells.tolist()
+
+    def copy(self) -> "Board":
+        board = Board.__new__(Board)
+        board.cells = self.cells.copy()
+        board.rng = self.rng
+        board.bitboards = list(self.bitboards)
+        board.hash = self.hash
+        board._moves = self._moves
+        board._history = []
+        return board
+
+    # Поиск совпадений
+    def match_masks(self, rows: Optional[Iterable[int]] = None,
+                    cols: Optional[Iterable[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Маски клеток, входящих в горизонтальные и вертикальные совпадения.
+
+        Args:
+            rows: Какие строки проверять (None — все)
+            cols: Какие столбцы проверять (None — все)
+
+        Returns:
+            (маска горизонтальных совпадений, маска вертикальных)
+        """
+        row_runs, col_runs = find_runs(self.bitboards, _lines_mask(rows, ROW_BITS), _lines_mask(cols, COL_BITS))
+        return bits_to_mask(row_runs), bits_to_mask(col_runs)
+
+    def has_matches(self) -> bool:
+        row_runs, col_runs = find_runs(self.bitboards)
+        return bool(row_runs or col_runs)
+
+    # Ходы
+    def swap(self, r1: int, c1: int, r2: int, c2: int):
+        a = self.cells
+        t1, t2 = int(a[r1, c1]), int(a[r2, c2])
+        a[r1, c1], a[r2, c2] = t2, t1
+        i1, i2 = r1 * COLS + c1, r2 * COLS + c2
+        both = (1 << i1) | (1 << i2)
+        if t1 != t2:
+            keys1, keys2 = ZOBRIST_KEYS[t1], ZOBRIST_KEYS[t2]
+            self.hash ^= keys1[i1] ^ keys1[i2] ^ keys2[i1] ^ keys2[i2]
+            if t1:
+                self.bitboards[t1 - 1] ^= both
+            if t2:
+                self.bitboards[t2 - 1] ^= both
+        self._moves = None
+
+    @property
+    def move_masks(self) -> Tuple[int, int]:
+        """Битборды допустимых ходов (пересчитываются лениво после изменения доски)"""
+        if self._moves is None:
+            self._moves = find_moves(self.bitboards)
+        return self._moves
+
+    @property
+    def valid_moves(self) -> Set[Move]:
+        h_moves, v_moves = self.move_masks
+        moves = set()
+        for bits, dr, dc in ((h_moves, 0, 1), (v_moves, 1, 0)):
+            while bits:
+                low = bits & -bits
+                i = low.bit_length() - 1
+                r, c = divmod(i, COLS)
+                moves.add((r, c, r + dr, c + dc))
+                bits ^= low
+        return moves
+
+    def is_valid_move(self, r1: int, c1: int, r2: int, c2: int) -> bool:
+        if not (0 <= r1 < ROWS and 0 <= c1 < COLS and 0 <= r2 < ROWS and 0 <= c2 < COLS):
+            return False
+        if abs(r1 - r2) + abs(c1 - c2) != 1:
+            return False
+        if (r1, c1) > (r2, c2):
+            r1, c1, r2, c2 = r2, c2, r1, c1
+        h_moves, v_moves = self.move_masks
+        bits = h_moves if r1 == r2 else v_moves
+        return bool(bits >> (r1 * COLS + c1) & 1)
+
+    def has_valid_move(self) -> bool:
+        h_moves, v_moves = self.move_masks
+        return bool(h_moves or v_moves)
+
+    def apply_move(self, r1: int, c1: int, r2: int, c2: int) -> Optional[int]:
+        """
+        Сделать ход и обрушить совпадения.
+
+        Returns:
+            Число удаленных плиток (как в core.board.apply_move_and_cascade) или None
+        """
+        if not self.is_valid_move(r1, c1, r2, c2):
+            return None
+        self.swap(r1, c1, r2, c2)
+        return self.cascade(rows=(r1, r2), cols=(c1, c2))
+
+    def make_move(self, r1: int, c1: int, r2: int, c2: int) -> Optional[int]:
+        """
+        Как apply_move, но запоминает состояние для unmake_move.
+        Вместо deepcopy всей доски сохраняется 64 байта клеток и битборды.
+        """
+        undo = (self.cells.copy(), list(self.bitboards), self.hash, self._moves)
+        removed = self.apply_move(r1, c1, r2, c2)
+        if removed is not None:
+            self._history.append(undo)
+        return removed
+
+    def unmake_move(self):
+        """Отменить последний make_move"""
+        self.cells, self.bitboards, self.hash, self._moves = self._history.pop()
+
+    def first_step_removed(self, r1: int, c1: int, r2: int, c2: int) -> int:
+        """
+        Сколько плиток снимет ход до обвала (без изменения доски).
+        Дешевая оценка для упорядочивания ходов в поиске.
+        """
+        i1, i2 = r1 * COLS + c1, r2 * COLS + c2
+        t1, t2 = int(self.cells[r1, c1]), int(self.cells[r2, c2])
+        both = (1 << i1) | (1 << i2)
+        bitboards = list(self.bitboards)
+        bitboards[t1 - 1] ^= both
+        bitboards[t2 - 1] ^= both
+        row_runs, col_runs = find_runs(
+            bitboards, ROW_BITS[r1] | ROW_BITS[r2], COL_BITS[c1] | COL_BITS[c2]
+        )
+        return bin(row_runs).count("1") + bin(col_runs).count("1")
+
+    def collapse(self, removed: np.ndarray) -> Tuple[np.ndarray, int]:
+        """
+        Обнулить удаленные клетки, опустить плитки и досыпать новые сверху.
+
+        Returns:
+            (столбцы с удалениями, индекс самой нижней затронутой строки)
+        """
+        a = self.cells
+        a[removed] = 0
+        hit_cols = np.flatnonzero(removed.any(axis=0))
+        lowest = int(np.flatnonzero(removed.any(axis=1))[-1])
+        sub = a[:, hit_cols]
+        # Устойчивая сортировка по признаку «не пусто» опускает плитки, сохраняя их порядок
+        order = np.argsort(sub != 0, axis=0, kind="stable")
+        a[:, hit_cols] = np.take_along_axis(sub, order, axis=0)
+        empty = a == 0
+        # Порядок досыпания — построчный, как в core.board
+        a[empty] = [self.rng.randint(1, TILE_TYPES) for _ in range(int(empty.sum()))]
+        self.bitboards = self._pack()
+        self.hash = self._zobrist()
+        self._moves = None
+        return hit_cols, lowest
+
+    def cascade(self, rows: Optional[Iterable[int]] = None, cols: Optional[Iterable[int]] = None) -> int:
+        """
+        Удалять совпадения, пока они есть.
+
+        Args:
+            rows, cols: Где искать совпадения на первом шаге (None — вся доска)
+
+        Returns:
+            Число удаленных плиток
+        """
+        rows_mask = _lines_mask(rows, ROW_BITS)
+        cols_mask = _lines_mask(cols, COL_BITS)
+        total = 0
+        while True:
+            row_runs, col_runs = find_runs(self.bitboards, rows_mask, cols_mask)
+            if not (row_runs or col_runs):
+                break
+            # Плитка на пересечении двух совпадений считается дважды, как в core.board
+            total += bin(row_runs).count("1") + bin(col_runs).count("1")
+            hit_cols, lowest = self.collapse(bits_to_mask(row_runs | col_runs))
+            rows_mask = _lines_mask(range(lowest + 1), ROW_BITS)
+            cols_mask = _lines_mask(hit_cols, COL_BITS)
+        return total
+
+
+def generate_valid_board() -> List[List[int]]:
+    """Замена core.board.generate_valid_board без перебора целых досок"""
+    return Board.generate().to_list()
+
+
+def apply_move_and_cascade(board: List[List[int]], r1: int, c1: int, r2: int, c2: int) -> Optional[int]:
+    """Совместимая с core.board обертка: меняет доску-список на месте"""
+    engine = Board(board)
+    removed = engine.apply_move(r1, c1, r2, c2)
+    if removed is not None:
+        board[:] = engine.to_list()
+    return removed
@@ -1,10 +1,11 @@
 # core/models.py
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.types import TypeDecorator, TEXT
 import json
 from datetime import datetime
+from core.board import ROWS, COLS
 
 class JsonType(TypeDecorator):
     impl = TEXT
@@ -13,6 +14,22 @@ class JsonType(TypeDecorator):
     def process_result_value(self, value, dialect):
         return json.loads(value) if value else None
 
+class BoardBlob(TypeDecorator):
+    """Доска ROWS×COLS в 64 байтах (байт на клетку) вместо JSON-текста"""
+    impl = LargeBinary
+    cache_ok = True
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return bytes(int(cell) for row in value for cell in row)
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # Матчи, сохраненные до перехода на бинарный формат
+            return json.loads(value)
+        return [list(value[r * COLS:(r + 1) * COLS]) for r in range(ROWS)]
+
 Base = declarative_base()
 
 class Player(Base):
@@ -61,5 +78,17 @@ class Match(Base):
     winner_id = Column(Integer, nullable=True)
     is_timeout = Column(Boolean, default=False)
     finished = Column(Boolean, default=False)
-    board_state = Column(JsonType)
-    initial_board_state = Column(JsonType)
\ No newline at end of file
+    board_state = Column(BoardBlob)
+    initial_board_state = Column(BoardBlob)
+
+class OutboxEvent(Base):
+    """
+    События для Kafka, записанные в той же транзакции, что и результат матча.
+    Отправляет их фоновый OutboxRelay (server/outbox.py), а не end_match.
+    """
+    __tablename__ = "outbox_events"
+    id = Column(Integer, primary_key=True, index=True)
+    payload = Column(JsonType)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True, index=True)
+    attempts = Column(Integer, default=0)
\ No newline at end of file
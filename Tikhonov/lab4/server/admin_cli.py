@@ -3,6 +3,7 @@ from core.models import Player, Character, Item, Match
 from utils.board_renderer import render_board_cli
 from core.equipment import generate_random_item
 from server.match_service import end_match
+from server.outbox import dead_events, retry_dead
 
 def admin_list_players():
     db = SessionLocal()
@@ -68,4 +69,19 @@ def admin_end_match(match_id: int):
     db = SessionLocal()
     end_match(match_id, db)
     db.close()
-    print(f"✅ Матч #{match_id} завершён принудительно.")
\ No newline at end of file
+    print(f"✅ Матч #{match_id} завершён принудительно.")
+
+def admin_outbox_status():
+    db = SessionLocal()
+    dead = dead_events(db)
+    if not dead:
+        print("✅ Outbox: мертвых событий нет")
+    for event in dead:
+        print(f"☠️ Событие #{event.id} ({event.created_at:%Y-%m-%d %H:%M:%S}): {event.attempts} попыток — {event.payload}")
+    db.close()
+
+def admin_retry_outbox():
+    db = SessionLocal()
+    count = retry_dead(db)
+    db.close()
+    print(f"🔁 Повторная отправка: {count} событий")
\ No newline at end of file
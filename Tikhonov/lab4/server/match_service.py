@@ -1,13 +1,17 @@
 from sqlalchemy.orm import Session
 from db.database import SessionLocal
-from core.models import Player, Character, Item, Match
-from core.board import generate_valid_board, apply_move_and_cascade  # ← обе функции
+from core.models import Player, Character, Item, Match, OutboxEvent
+from core.engine import Board
 from core.bot_ai import bot_find_best_move
-from core.elo import update_elo
+from core.elo import update_ratings
 from core.equipment import generate_random_item
-from kafka_utils.producer import send_match_result
+from server.outbox import relay as outbox_relay
 from datetime import datetime, timedelta
 from copy import deepcopy
+from typing import List
+
+# Сложность бота в PvE-матчах (см. core.bot_ai.DIFFICULTY_LEVELS)
+BOT_DIFFICULTY = "normal"
 
 def create_test_player(username: str, char_name: str, db: Session):
     # Проверим, не существует ли уже игрок с таким именем
@@ -25,7 +29,7 @@ def create_test_player(username: str, char_name: str, db: Session):
     return player
 
 def start_match(player1_id: int, player2_id: int, db: Session) -> Match:
-    board = generate_valid_board()
+    board = Board.generate().to_list()
     char1 = db.query(Character).filter(Character.player_id == player1_id).first()
     hp1 = char1.base_hp + sum(i.hp_bonus for i in char1.items)
     if player2_id > 0:
@@ -52,28 +56,23 @@ def apply_player_move(match_id: int, move: tuple, db: Session) -> dict:
     match = db.query(Match).filter(Match.id == match_id).first()
     if not match or match.finished:
         return {"error": "Match not active"}
-    removed = apply_move_and_cascade(match.board_state, *move)
+    board = Board(match.board_state)
+    removed = board.apply_move(*move)
     if removed is None:
         return {"error": "Invalid move"}
+    # Новый список, а не правка на месте: иначе SQLAlchemy не заметит изменение JSON
+    match.board_state = board.to_list()
     match.player1_total_score += removed
     db.commit()
     return {"removed": removed, "total": match.player1_total_score}
 
-def end_match(match_id: int, db: Session):
-    match = db.query(Match).filter(Match.id == match_id).first()
-    if not match or match.finished:
-        return
-    if datetime.utcnow() - match.start_time > timedelta(seconds=45):
+def _settle(match: Match, bot_score: int, now: datetime) -> float:
+    """Итог одного матча: HP, победитель. Возвращает исход для первого игрока"""
+    if now - match.start_time > timedelta(seconds=45):
         match.is_timeout = True
     match.finished = True
-    match.end_time = datetime.utcnow()
-    # Счёт игрока
+    match.end_time = now
     player_score = match.player1_total_score
-    # Счёт бота
-    if match.player2_id < 0:
-        _, bot_score = bot_find_best_move(match.initial_board_state)
-    else:
-        bot_score = 0  # PvP — не используется здесь
     # Урон
     dmg_to_p2 = min(match.player2_hp_start, player_score * 3)
     dmg_to_p1 = min(match.player1_hp_start, bot_score * 3)
@@ -97,36 +96,91 @@ def end_match(match_id: int, db: Session):
             winner_id = None
             outcome = 0.5
     match.winner_id = winner_id
-    # Обновление статистики
-    p1 = db.query(Player).filter(Player.id == match.player1_id).first()
-    if winner_id == match.player1_id:
-        p1.wins += 1
-    elif winner_id is not None:
-        p1.losses += 1
-    if match.player2_id > 0:
-        p2 = db.query(Player).filter(Player.id == match.player2_id).first()
-        if winner_id == match.player2_id:
-            p2.wins += 1
-        else:
-            p2.losses += 1
-        new_r1, new_r2 = update_elo(p1.elo_rating, p2.elo_rating, outcome)
-        p1.elo_rating = new_r1
-        p2.elo_rating = new_r2
-    else:
-        bot_rating = 1200.0
-        new_r1, _ = update_elo(p1.elo_rating, bot_rating, outcome)
-        p1.elo_rating = new_r1
-    # Награда победителю
-    if winner_id == match.player1_id:
-        item = generate_random_item()
-        char1 = db.query(Character).filter(Character.player_id == match.player1_id).first()
-        item.character_id = char1.id
-        db.add(item)
+    return outcome
+
+def end_matches(match_ids: List[int], db: Session) -> List[int]:
+    """
+    Завершить пачку матчей одной транзакцией.
+    Ходы бота считаются заранее, до блокировки матчей (SELECT ... FOR UPDATE),
+    так что поиск не держит блокировки строк. Игроки и персонажи всех матчей
+    загружаются двумя запросами, рейтинги пересчитываются в памяти в порядке
+    матчей и записываются одним flush, события для Kafka пишутся в outbox
+    и отправляются фоновым потоком.
+
+    Args:
+        match_ids: id матчей (уже завершенные и несуществующие пропускаются)
+        db: Сессия БД
+
+    Returns:
+        id завершенных матчей
+    """
+    # Стартовая доска после создания матча не меняется — ее можно читать без блокировки
+    bot_boards = (
+        db.query(Match.id, Match.initial_board_state)
+        .filter(Match.id.in_(match_ids), Match.finished == False, Match.player2_id < 0)
+        .all()
+    )
+    bot_scores = {mid: bot_find_best_move(board, BOT_DIFFICULTY)[1] for mid, board in bot_boards}
+
+    matches = (
+        db.query(Match)
+        .filter(Match.id.in_(match_ids), Match.finished == False)
+        .order_by(Match.id)
+        .with_for_update()
+        .all()
+    )
+    if not matches:
+        return []
+    player_ids = {m.player1_id for m in matches} | {m.player2_id for m in matches if m.player2_id > 0}
+    players = {p.id: p for p in db.query(Player).filter(Player.id.in_(player_ids))}
+    characters = {}
+    for char in db.query(Character).filter(Character.player_id.in_(player_ids)).order_by(Character.id.desc()):
+        # Как и .first() раньше — первый персонаж игрока
+        characters[char.player_id] = char
+
+    now = datetime.utcnow()
+    ratings = {pid: p.elo_rating for pid, p in players.items()}
+    games = []
+    for match in matches:
+        # Счёт бота (PvP — не используется здесь)
+        bot_score = bot_scores.get(match.id, 0)
+        outcome = _settle(match, bot_score, now)
+        winner_id = match.winner_id
+        games.append((match.player1_id, match.player2_id, outcome))
+        # Обновление статистики
+        p1 = players[match.player1_id]
+        if winner_id == match.player1_id:
+            p1.wins += 1
+        elif winner_id is not None:
+            p1.losses += 1
+        if match.player2_id > 0:
+            p2 = players[match.player2_id]
+            if winner_id == match.player2_id:
+                p2.wins += 1
+            else:
+                p2.losses += 1
+        # Награда победителю; без персонажа награду пропускаем, а не откатываем всю пачку
+        if winner_id == match.player1_id:
+            if match.player1_id in characters:
+                item = generate_random_item()
+                item.character_id = characters[match.player1_id].id
+                db.add(item)
+            else:
+                print(f"⚠️ Матч #{match.id}: у победителя {winner_id} нет персонажа, награда не выдана")
+        db.add(OutboxEvent(payload={
+            "match_id": match.id,
+            "winner_id": winner_id,
+            "player1_score": match.player1_total_score,
+            "bot_score": bot_score if match.player2_id < 0 else None,
+            "timeout": match.is_timeout
+        }))
+
+    update_ratings(ratings, games)
+    for pid, rating in ratings.items():
+        players[pid].elo_rating = rating
     db.commit()
-    send_match_result({
-        "match_id": match.id,
-        "winner_id": winner_id,
-        "player1_score": player_score,
-        "bot_score": bot_score if match.player2_id < 0 else None,
-        "timeout": match.is_timeout
-    })
\ No newline at end of file
+    outbox_relay.notify()
+    return [m.id for m in matches]
+
+def end_match(match_id: int, db: Session):
+    end_matches([match_id], db)
@@ -0,0 +1,130 @@
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from core.models import OutboxEvent
+
+BATCH_SIZE = 200
+POLL_INTERVAL = 2.0  # сек между проверками, если новых событий не было
+MAX_ATTEMPTS = 10
+
+
+def send_to_kafka(payload: dict):
+    # Продюсер импортируется при отправке: сервис матчей не зависит от клиента Kafka
+    from kafka_utils.producer import send_match_result
+    send_match_result(payload)
+
+
+def publish_pending(db: Session, send: Callable[[dict], None] = send_to_kafka, limit: int = BATCH_SIZE) -> int:
+    """
+    Отправить в Kafka неотправленные события из outbox (в порядке записи).
+    Событие, не отправленное за MAX_ATTEMPTS попыток, "мертвое": на нем отправка
+    останавливается, чтобы следующие события не обогнали его. Список таких
+    событий — dead_events, повторная отправка — retry_dead (см. admin_cli).
+
+    Args:
+        db: Сессия БД
+        send: Функция отправки одного события
+        limit: Сколько событий взять за раз
+
+    Returns:
+        Число отправленных событий
+    """
+    events = (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.sent_at.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .all()
+    )
+    sent = 0
+    now = datetime.utcnow()
+    for event in events:
+        if event.attempts >= MAX_ATTEMPTS:
+            print(f"⚠️ Событие #{event.id} не отправлено за {event.attempts} попыток, outbox остановлен "
+                  f"(повтор: admin_retry_outbox)")
+            break
+        try:
+            send(event.payload)
+        except Exception as e:
+            # Порядок событий важен: остальные ждут следующей попытки
+            event.attempts += 1
+            print(f"⚠️ Не удалось отправить событие #{event.id}: {e}")
+            break
+        event.sent_at = now
+        sent += 1
+    db.commit()
+    return sent
+
+
+def dead_events(db: Session) -> List[OutboxEvent]:
+    """Неотправленные события, исчерпавшие попытки (блокируют отправку остальных)"""
+    return (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.sent_at.is_(None), OutboxEvent.attempts >= MAX_ATTEMPTS)
+        .order_by(OutboxEvent.id)
+        .all()
+    )
+
+
+def retry_dead(db: Session) -> int:
+    """Сбросить счетчик попыток мертвых событий, чтобы relay отправил их снова"""
+    events = dead_events(db)
+    for event in events:
+        event.attempts = 0
+    db.commit()
+    return len(events)
+
+
+class OutboxRelay:
+    """
+    Фоновый поток, пересылающий события матчей из outbox в Kafka.
+    Завершение матча только пишет событие в БД в своей транзакции,
+    поэтому не ждет брокер и не теряет событие, если брокер недоступен.
+    """
+
+    def __init__(self, session_factory=SessionLocal, send: Callable[[dict], None] = send_to_kafka):
+        self.session_factory = session_factory
+        self.send = send
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Сообщить о новых событиях (поток запускается при первом вызове)"""
+        self.start()
+        self._wakeup.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            db = self.session_factory()
+            try:
+                sent = publish_pending(db, self.send)
+            except Exception as e:
+                print(f"⚠️ Ошибка outbox: {e}")
+                sent = 0
+            finally:
+                db.close()
+            # Полная пачка — сразу за следующей, иначе ждем новых событий
+            if sent < BATCH_SIZE:
+                self._wakeup.wait(POLL_INTERVAL)
+
+
+relay = OutboxRelay()
@@ -0,0 +1,19 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", default=False,
+                     help="запускать бенчмарки (по умолчанию пропускаются)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: замер скорости, запускается только с --benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="бенчмарк: запустите pytest --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
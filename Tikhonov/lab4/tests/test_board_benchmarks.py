@@ -0,0 +1,64 @@
+import random
+import timeit
+from copy import deepcopy
+
+import pytest
+
+from core import board as ref
+from core.engine import Board, ALL_MOVES
+
+# Только печатают замеры; запуск: pytest tests/test_board_benchmarks.py --benchmark -s
+pytestmark = pytest.mark.benchmark
+
+
+def _boards(n=50):
+    random.seed(0)
+    return [ref.generate_valid_board() for _ in range(n)]
+
+
+def _first_valid(board):
+    return next(m for m in ALL_MOVES if ref.is_valid_move(board, *m))
+
+
+def _bench(name, stmt, number):
+    seconds = min(timeit.repeat(stmt, number=number, repeat=3)) / number
+    print(f"  {name}: {seconds * 1e6:.1f} мкс")
+    return seconds
+
+
+def test_benchmark_has_valid_move():
+    print("\n[BENCHMARK] has_valid_move (проход по всем 112 парам)")
+    boards = _boards()
+    old = _bench("core.board", lambda: [ref.has_valid_move(b) for b in boards], 5)
+    new = _bench("core.engine", lambda: [Board(b).valid_moves for b in boards], 5)
+    print(f"  Ускорение: x{old / new:.1f}")
+
+
+def test_benchmark_apply_move():
+    print("\n[BENCHMARK] ход + каскад + проверка, остались ли ходы")
+    boards = _boards()
+    moves = [_first_valid(b) for b in boards]
+
+    def run_ref():
+        for b, m in zip(boards, moves):
+            b = deepcopy(b)
+            ref.apply_move_and_cascade(b, *m)
+            ref.has_valid_move(b)
+
+    def run_engine():
+        for b, m in zip(boards, moves):
+            engine = Board(b)
+            engine.valid_moves
+            engine.apply_move(*m)
+            engine.has_valid_move()
+
+    old = _bench("core.board", run_ref, 5)
+    new = _bench("core.engine", run_engine, 5)
+    print(f"  Ускорение: x{old / new:.1f}")
+
+
+def test_benchmark_generate():
+    print("\n[BENCHMARK] generate_valid_board")
+    old = _bench("core.board", ref.generate_valid_board, 20)
+    new = _bench("core.engine", Board.generate, 20)
+    print(f"  Ускорение: x{old / new:.1f}")
@@ -0,0 +1,84 @@
+import random
+from copy import deepcopy
+
+import pytest
+
+from core import board as ref
+from core.engine import Board, ALL_MOVES
+
+SEEDS = range(200)
+
+
+def random_stable_board(seed):
+    """Доска эталонной реализации без готовых совпадений"""
+    random.seed(seed)
+    return ref.generate_valid_board()
+
+
+def match_cells(board):
+    return {cell for match in ref.find_matches(board) for cell in match}
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_match_masks_equal_find_matches(seed):
+    rnd = random.Random(seed)
+    # Произвольные доски, в том числе с готовыми совпадениями и пустыми клетками
+    board = [[rnd.randint(0 if seed % 3 == 0 else 1, 3) for _ in range(ref.COLS)] for _ in range(ref.ROWS)]
+    row_mask, col_mask = Board(board).match_masks()
+    cells = {(int(r), int(c)) for r, c in zip(*(row_mask | col_mask).nonzero())}
+    assert cells == match_cells(board)
+    assert int(row_mask.sum() + col_mask.sum()) == sum(len(m) for m in ref.find_matches(board))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_valid_moves_equal_reference(seed):
+    board = random_stable_board(seed)
+    engine = Board(board)
+    expected = {m for m in ALL_MOVES if ref.is_valid_move(board, *m)}
+    assert engine.valid_moves == expected
+    assert engine.has_valid_move() == ref.has_valid_move(board)
+    for r1, c1, r2, c2 in ALL_MOVES:
+        # Обратный порядок клеток и ходы за пределы доски
+        assert engine.is_valid_move(r2, c2, r1, c1) == ref.is_valid_move(board, r2, c2, r1, c1)
+    assert not engine.is_valid_move(0, 0, 0, 2)
+    assert not engine.is_valid_move(7, 7, 7, 8)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_apply_move_equals_reference(seed):
+    board = random_stable_board(seed)
+    engine = Board(deepcopy(board))
+    engine.valid_moves  # строим множество, чтобы проверить его ленивый пересчет после хода
+    rnd = random.Random(seed)
+    for step in range(10):
+        moves = sorted(m for m in ALL_MOVES if ref.is_valid_move(board, *m))
+        if not moves:
+            break
+        move = rnd.choice(moves)
+        # Одинаковый seed -> одинаковые досыпанные плитки
+        random.seed(seed * 1000 + step)
+        expected = ref.apply_move_and_cascade(board, *move)
+        random.seed(seed * 1000 + step)
+        removed = engine.apply_move(*move)
+        assert removed == expected
+        assert engine.to_list() == board
+        assert engine.valid_moves == {m for m in ALL_MOVES if ref.is_valid_move(board, *m)}
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_invalid_move_leaves_board_untouched(seed):
+    board = random_stable_board(seed)
+    engine = Board(deepcopy(board))
+    for move in ALL_MOVES:
+        if not ref.is_valid_move(board, *move):
+            assert engine.apply_move(*move) is None
+            break
+    assert engine.to_list() == board
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_generate_produces_playable_board(seed):
+    board = Board.generate(random.Random(seed)).to_list()
+    assert not ref.find_matches(board)
+    assert ref.has_valid_move(board)
+    assert all(1 <= tile <= ref.TILE_TYPES for row in board for tile in row)
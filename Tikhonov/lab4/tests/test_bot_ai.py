@@ -0,0 +1,70 @@
+import random
+import time
+
+import pytest
+
+from core import board as ref
+from core.bot_ai import BotSearch, bot_find_best_move, DIFFICULTY_LEVELS
+from core.engine import Board
+
+
+def random_stable_board(seed):
+    random.seed(seed)
+    return ref.generate_valid_board()
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_make_unmake_restores_board(seed):
+    cells = random_stable_board(seed)
+    board = Board(cells, rng=random.Random(seed))
+    before = (board.to_list(), list(board.bitboards), board.hash, board.valid_moves)
+    for move in sorted(board.valid_moves)[:5]:
+        assert board.make_move(*move) is not None
+        board.unmake_move()
+        assert (board.to_list(), board.bitboards, board.hash, board.valid_moves) == before
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_incremental_hash_equals_full(seed):
+    board = Board(random_stable_board(seed), rng=random.Random(seed))
+    move = sorted(board.valid_moves)[0]
+    board.swap(*move)
+    assert board.hash == Board(board.to_list()).hash
+    board.cascade()
+    assert board.hash == Board(board.to_list()).hash
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_first_step_removed_matches_masks(seed):
+    board = Board(random_stable_board(seed))
+    for move in board.valid_moves:
+        trial = board.copy()
+        trial.swap(*move)
+        row_mask, col_mask = trial.match_masks()
+        assert board.first_step_removed(*move) == int(row_mask.sum() + col_mask.sum())
+
+
+@pytest.mark.parametrize("difficulty", sorted(DIFFICULTY_LEVELS))
+def test_bot_returns_valid_move(difficulty):
+    for seed in range(5):
+        cells = random_stable_board(seed)
+        move, removed = bot_find_best_move(cells, difficulty, seed=seed)
+        assert ref.is_valid_move(cells, *move)
+        assert removed >= 3
+        # Исходная доска не меняется
+        assert cells == random_stable_board(seed)
+
+
+def test_bot_respects_time_budget():
+    search = BotSearch(depth=6, samples=4, width=10, time_budget=0.1, seed=0)
+    start = time.perf_counter()
+    move, _ = search.search(random_stable_board(0))
+    assert move is not None
+    # Первая итерация доводится до конца, дальше — не сильно дольше лимита
+    assert time.perf_counter() - start < 1.0
+
+
+def test_bot_without_moves():
+    cells = [[(r * 3 + c) % 6 + 1 for c in range(ref.COLS)] for r in range(ref.ROWS)]
+    assert not Board(cells).has_valid_move()
+    assert bot_find_best_move(cells) == (None, 0)
@@ -0,0 +1,245 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import threading
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from core import board as ref
+from core.elo import recompute_elo, update_ratings
+from core.models import Base, Character, Item, Match, OutboxEvent, Player
+from server import outbox
+from tools.recompute_elo import recompute_all
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def random_history(seed, n_players=30, n_matches=500):
+    rnd = random.Random(seed)
+    history = []
+    for _ in range(n_matches):
+        a = rnd.randint(1, n_players)
+        b = -1 if rnd.random() < 0.3 else rnd.choice([p for p in range(1, n_players + 1) if p != a])
+        history.append((a, b, rnd.choice([0.0, 0.5, 1.0])))
+    return history
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_vectorized_elo_equals_sequential(seed):
+    history = random_history(seed)
+    players = {a for a, _, _ in history} | {b for _, b, _ in history if b > 0}
+    expected = update_ratings({p: 1200.0 for p in players}, history)
+    result = recompute_elo(*zip(*history))
+    assert result.keys() == expected.keys()
+    for pid in expected:
+        assert result[pid] == pytest.approx(expected[pid], abs=1e-9)
+
+
+def test_recompute_elo_empty_history():
+    assert recompute_elo([], [], []) == {}
+
+
+def test_board_blob_roundtrip(db):
+    random.seed(1)
+    board = ref.generate_valid_board()
+    db.add(Match(player1_id=1, player2_id=-1, board_state=board, initial_board_state=board))
+    db.commit()
+    raw = db.execute(text("SELECT board_state FROM matches")).scalar()
+    assert isinstance(raw, bytes) and len(raw) == ref.ROWS * ref.COLS
+    db.expire_all()
+    assert db.query(Match).one().board_state == board
+
+
+def test_board_blob_reads_legacy_json(db):
+    db.execute(text("INSERT INTO matches (id, player1_id, player2_id, board_state) VALUES (1, 1, -1, '[[1, 2], [3, 4]]')"))
+    db.commit()
+    assert db.query(Match).one().board_state == [[1, 2], [3, 4]]
+
+
+def test_recompute_all_matches_history(db):
+    history = random_history(0, n_players=5, n_matches=50)
+    db.add_all(Player(id=p, username=f"p{p}", elo_rating=1000.0) for p in range(1, 7))
+    start = datetime(2024, 1, 1)
+    for i, (a, b, outcome) in enumerate(history):
+        winner = {1.0: a, 0.0: b, 0.5: None}[outcome]
+        db.add(Match(player1_id=a, player2_id=b, winner_id=winner, finished=True,
+                     end_time=start + timedelta(minutes=i)))
+    db.commit()
+
+    changes = recompute_all(db)
+    expected = update_ratings({p: 1200.0 for p in range(1, 7)}, history)
+    for player in db.query(Player):
+        assert player.elo_rating == pytest.approx(expected[player.id])
+        assert changes[player.id][0] == 1000.0
+
+
+class FakeSend:
+    """Отправка в Kafka: запоминает payload, первые fail_times вызовов падают"""
+
+    def __init__(self, fail_times=0):
+        self.fail_times = fail_times
+        self.sent = []
+
+    def __call__(self, payload):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("брокер недоступен")
+        self.sent.append(payload)
+
+
+def add_events(db, count):
+    db.add_all(OutboxEvent(payload={"match_id": i}) for i in range(1, count + 1))
+    db.commit()
+
+
+def test_publish_pending_sends_in_order(db):
+    add_events(db, 3)
+    send = FakeSend()
+    assert outbox.publish_pending(db, send) == 3
+    assert send.sent == [{"match_id": 1}, {"match_id": 2}, {"match_id": 3}]
+    assert all(e.sent_at is not None for e in db.query(OutboxEvent))
+    assert outbox.publish_pending(db, send) == 0
+
+
+def test_publish_pending_retries_after_failure(db):
+    add_events(db, 3)
+    send = FakeSend(fail_times=1)
+    # Первое событие не ушло — следующие не обгоняют его
+    assert outbox.publish_pending(db, send) == 0
+    assert send.sent == []
+    assert db.query(OutboxEvent).order_by(OutboxEvent.id).first().attempts == 1
+    assert outbox.publish_pending(db, send) == 3
+    assert [p["match_id"] for p in send.sent] == [1, 2, 3]
+
+
+def test_dead_event_stops_relay_until_retry(db):
+    add_events(db, 3)
+    send = FakeSend(fail_times=outbox.MAX_ATTEMPTS)
+    for _ in range(outbox.MAX_ATTEMPTS):
+        outbox.publish_pending(db, send)
+    # Мертвое событие видно и не пропускается: события 2 и 3 ждут его
+    assert [e.id for e in outbox.dead_events(db)] == [1]
+    assert outbox.publish_pending(db, send) == 0
+    assert send.sent == []
+    assert outbox.retry_dead(db) == 1
+    assert outbox.publish_pending(db, send) == 3
+    assert [p["match_id"] for p in send.sent] == [1, 2, 3]
+
+
+def test_outbox_relay_thread(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    add_events(db, 5)
+    db.close()
+
+    received = threading.Event()
+    send = FakeSend(fail_times=1)
+    relay = outbox.OutboxRelay(session_factory, send=lambda p: (send(p), len(send.sent) == 5 and received.set()))
+    relay.notify()
+    try:
+        # Первая попытка падает, повтор — через POLL_INTERVAL
+        assert received.wait(outbox.POLL_INTERVAL + 5)
+    finally:
+        relay.stop()
+    assert [p["match_id"] for p in send.sent] == [1, 2, 3, 4, 5]
+
+
+@pytest.fixture
+def match_service(monkeypatch):
+    match_service = pytest.importorskip("server.match_service")
+    bot_boards = []
+
+    def fake_bot(board, difficulty):
+        bot_boards.append(board)
+        return None, 10
+
+    class FakeRelay:
+        notified = 0
+
+        def notify(self):
+            self.notified += 1
+
+    monkeypatch.setattr(match_service, "bot_find_best_move", fake_bot)
+    monkeypatch.setattr(match_service, "outbox_relay", FakeRelay())
+    match_service.bot_boards = bot_boards
+    return match_service
+
+
+def test_end_matches_settles_batch_in_one_transaction(db, match_service):
+    for pid in (1, 2, 3):
+        db.add(Player(id=pid, username=f"p{pid}"))
+        db.add(Character(name=f"c{pid}", player_id=pid))
+    random.seed(0)
+    board = ref.generate_valid_board()
+
+    def add_match(p1, p2, score, hp2, **kwargs):
+        match = Match(player1_id=p1, player2_id=p2, player1_hp_start=50, player2_hp_start=hp2,
+                      player1_total_score=score, board_state=board, initial_board_state=board, **kwargs)
+        db.add(match)
+        return match
+
+    m1 = add_match(1, -1, 40, 100)  # игрок добивает бота
+    m2 = add_match(2, -1, 0, 100)   # бот наносит 30 урона, у игрока меньше HP
+    m3 = add_match(1, 3, 5, 50)     # PvP: у первого игрока больше HP
+    m4 = add_match(3, -1, 99, 100, finished=True)
+    db.commit()
+
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+    ids = [m3.id, m1.id, m2.id, m4.id, 999]
+    assert match_service.end_matches(ids, db) == [m1.id, m2.id, m3.id]
+    assert len(commits) == 1
+    assert len(match_service.bot_boards) == 2
+    assert match_service.outbox_relay.notified == 1
+
+    db.expire_all()
+    assert [m.winner_id for m in (m1, m2, m3)] == [1, -1, 1]
+    assert m1.player2_hp_end == 0 and m2.player1_hp_end == 20 and m3.player2_hp_end == 35
+    assert all(m.finished and m.end_time for m in (m1, m2, m3))
+
+    players = {p.id: p for p in db.query(Player)}
+    assert [(players[p].wins, players[p].losses) for p in (1, 2, 3)] == [(2, 0), (0, 1), (0, 1)]
+    expected = update_ratings({1: 1200.0, 2: 1200.0, 3: 1200.0}, [(1, -1, 1.0), (2, -1, 0.0), (1, 3, 1.0)])
+    for pid, rating in expected.items():
+        assert players[pid].elo_rating == pytest.approx(rating)
+
+    # Награда за каждую победу первого игрока
+    assert db.query(Item).count() == 2
+    events = db.query(OutboxEvent).order_by(OutboxEvent.id).all()
+    assert [e.payload["match_id"] for e in events] == [m1.id, m2.id, m3.id]
+    assert [e.payload["bot_score"] for e in events] == [10, 10, None]
+
+    # Повторное завершение ничего не меняет
+    assert match_service.end_matches(ids, db) == []
+
+
+def test_end_matches_winner_without_character(db, match_service):
+    db.add(Player(id=1, username="p1"))
+    db.add(Player(id=2, username="p2"))
+    db.add(Character(name="c2", player_id=2))
+    random.seed(0)
+    board = ref.generate_valid_board()
+    matches = [
+        Match(player1_id=pid, player2_id=-1, player1_hp_start=50, player2_hp_start=100,
+              player1_total_score=40, board_state=board, initial_board_state=board)
+        for pid in (1, 2)
+    ]
+    db.add_all(matches)
+    db.commit()
+
+    # Победитель без персонажа не откатывает остальные матчи пачки
+    assert match_service.end_matches([m.id for m in matches], db) == [m.id for m in matches]
+    db.expire_all()
+    assert all(m.finished and m.winner_id == m.player1_id for m in matches)
+    assert [item.character.player_id for item in db.query(Item)] == [2]
@@ -0,0 +1,82 @@
+# tools/recompute_elo.py
+"""
+Офлайн-пересчет рейтингов Эло всех игроков по истории матчей.
+
+Запуск из корня проекта:
+    python -m tools.recompute_elo            # пересчитать и сохранить
+    python -m tools.recompute_elo --dry-run  # только показать изменения
+"""
+import argparse
+from typing import Dict, List, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from core.elo import recompute_elo
+from core.models import Player, Match
+
+INITIAL_RATING = 1200.0
+
+
+def load_history(db: Session) -> Tuple[List[int], List[int], List[float]]:
+    """
+    Завершенные матчи в хронологическом порядке (одним запросом, только нужные столбцы).
+
+    Returns:
+        (первые игроки, вторые игроки, исходы для первого игрока)
+    """
+    rows = (
+        db.query(Match.player1_id, Match.player2_id, Match.winner_id)
+        .filter(Match.finished == True)
+        .order_by(Match.end_time, Match.id)
+        .all()
+    )
+    player1_ids, player2_ids, outcomes = [], [], []
+    for player1_id, player2_id, winner_id in rows:
+        player1_ids.append(player1_id)
+        player2_ids.append(player2_id)
+        if winner_id is None:
+            outcomes.append(0.5)
+        else:
+            outcomes.append(1.0 if winner_id == player1_id else 0.0)
+    return player1_ids, player2_ids, outcomes
+
+
+def recompute_all(db: Session, dry_run: bool = False) -> Dict[int, Tuple[float, float]]:
+    """
+    Пересчитать рейтинги всех игроков (без матчей — стартовый рейтинг).
+
+    Returns:
+        id игрока -> (старый рейтинг, новый рейтинг)
+    """
+    ratings = recompute_elo(*load_history(db), initial=INITIAL_RATING)
+    changes = {}
+    for player_id, old_rating in db.query(Player.id, Player.elo_rating):
+        changes[player_id] = (old_rating, ratings.get(player_id, INITIAL_RATING))
+    if not dry_run and changes:
+        db.execute(update(Player), [{"id": pid, "elo_rating": new} for pid, (_, new) in changes.items()])
+        db.commit()
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчет рейтингов Эло по истории матчей")
+    parser.add_argument("--dry-run", action="store_true", help="не сохранять, только показать изменения")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        changes = recompute_all(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    changed = {pid: c for pid, c in changes.items() if abs(c[0] - c[1]) >= 0.01}
+    for pid, (old, new) in sorted(changed.items(), key=lambda item: -abs(item[1][1] - item[1][0])):
+        print(f"ID: {pid} | Elo: {old:.0f} → {new:.0f}")
+    status = "🔍 Пробный запуск" if args.dry_run else "✅ Рейтинги пересчитаны"
+    print(f"{status}: игроков {len(changes)}, изменилось {len(changed)}")
+
+
+if __name__ == "__main__":
+    main()
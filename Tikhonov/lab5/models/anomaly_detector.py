@@ -1,7 +1,10 @@
 from transformers import pipeline
 
+from models.stream_detector import DetectorConfig, StreamingAnomalyDetector
+
+
 class AnomalyDetector:
-    def __init__(self):
+    def __init__(self, config: DetectorConfig = None):
         print("🔥 Загрузка модели DistilBert для анализа температуры...")
         # Используем модель из задания для анализа интенсивности
         self.temp_analyzer = pipeline(
@@ -9,6 +12,8 @@ class AnomalyDetector:
             model="distilbert-base-uncased"
         )
         print("✅ Модель температуры готова.")
+        # Потоковый детектор всплесков по локациям (кольцевые корзины + EWMA/сезонная база)
+        self.stream = StreamingAnomalyDetector(config)
 
     def analyze_temperature(self, text):
         """Вычисляет коэффициент активности (score) через DistilBert"""
@@ -20,6 +25,10 @@ class AnomalyDetector:
             print(f"⚠️ Ошибка при анализе температуры: {e}")
             return 0.0
 
-    def check_anomaly(self, recent_count):
-        """Выявляет аномалию на основе частоты упоминаний в районе"""
-        return 1 if recent_count > 5 else 0
\ No newline at end of file
+    def check_anomaly(self, locations, timestamp=None):
+        """Учитывает пост в потоковом детекторе и возвращает 1, если хотя бы одна его локация во всплеске"""
+        if isinstance(locations, str):
+            locations = [locations]
+        threshold = self.stream.config.z_threshold
+        flags = [self.stream.observe(loc, timestamp) > threshold for loc in locations]
+        return 1 if any(flags) else 0
@@ -0,0 +1,229 @@
+import math
+import numbers
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from statistics import median
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+
+def to_epoch_seconds(value, naive_tz: str = "UTC") -> Optional[float]:
+    """
+    Время поста в секундах Unix (UTC).
+    Числа — уже секунды Unix (колонка timestamp). Даты без часового пояса
+    (created_at TIMESTAMP, заполняется CURRENT_TIMESTAMP сервера БД)
+    считаются временем в зоне naive_tz. None и NaN — None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value != value:  # pandas.NaT
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc if naive_tz == "UTC" else ZoneInfo(naive_tz))
+        return value.timestamp()
+    if isinstance(value, numbers.Real):
+        return None if math.isnan(value) else float(value)
+    raise TypeError(f"Неизвестный формат времени: {value!r}")
+
+
+@dataclass
+class DetectorConfig:
+    """Параметры потокового детектора (все окна задаются в корзинах)"""
+    bucket_seconds: int = 300  # ширина временной корзины
+    window_buckets: int = 288  # длина кольцевого буфера (сутки при 5-минутных корзинах)
+    season_buckets: int = 288  # период сезонности; 0 — без сезонной базы
+    ewma_alpha: float = 0.1  # скорость забывания EWMA
+    z_threshold: float = 3.5  # порог робастного z-score
+    min_history: int = 12  # сколько закрытых корзин нужно до первых срабатываний
+    min_scale: float = 1.0  # нижняя граница разброса, чтобы тихие районы не «взрывались» от одного поста
+
+
+@dataclass
+class LocationStatus:
+    """Снимок состояния локации для дашборда"""
+    location: str
+    count: int  # постов в текущей корзине
+    window_total: int  # постов за всё окно
+    expected: float  # ожидаемое значение для текущей корзины
+    zscore: float
+    ratio: float  # count / expected
+    is_anomaly: bool
+
+
+class _LocationState:
+    """Кольцевой буфер корзин и базовые линии одной локации"""
+
+    def __init__(self, config: DetectorConfig, bucket: int):
+        self.config = config
+        self.counts = [0] * config.window_buckets
+        self.head = bucket  # абсолютный номер текущей (открытой) корзины
+        self.window_total = 0
+        self.closed = 0  # сколько корзин уже закрыто
+        self.ewma_mean = 0.0
+        self.ewma_var = 0.0
+        self.seasonal = [0.0] * config.season_buckets
+        self.seasonal_seen = [False] * config.season_buckets
+        # Медиана и MAD окна пересчитываются раз на закрытие корзины, а не на каждый пост
+        self.median = 0.0
+        self.mad = 0.0
+
+    def _slot(self, bucket: int) -> int:
+        return bucket % self.config.window_buckets
+
+    def _close(self, bucket: int, count: int):
+        alpha = self.config.ewma_alpha
+
+        if self.closed == 0:
+            self.ewma_mean = float(count)
+        else:
+            diff = count - self.ewma_mean
+            self.ewma_mean += alpha * diff
+            self.ewma_var = (1 - alpha) * (self.ewma_var + alpha * diff * diff)
+
+        if self.config.season_buckets:
+            s = bucket % self.config.season_buckets
+            if self.seasonal_seen[s]:
+                self.seasonal[s] += alpha * (count - self.seasonal[s])
+            else:
+                self.seasonal[s] = float(count)
+                self.seasonal_seen[s] = True
+
+        self.closed += 1
+
+    def _refresh_robust(self):
+        n = min(self.closed, self.config.window_buckets - 1)
+        if n == 0:
+            return
+        history = [self.counts[self._slot(self.head - i)] for i in range(1, n + 1)]
+        self.median = median(history)
+        self.mad = median(abs(x - self.median) for x in history)
+
+    def advance(self, bucket: int):
+        """Сдвигает голову буфера до bucket, закрывая пропущенные корзины"""
+        if bucket <= self.head:
+            return
+        window = self.config.window_buckets
+        self._close(self.head, self.counts[self._slot(self.head)])
+
+        if bucket - self.head >= window:
+            # Всё окно вытеснено; длинную паузу проигрываем не дальше одного окна пустых корзин
+            for b in range(max(self.head + 1, bucket - window), bucket):
+                self._close(b, 0)
+            self.counts = [0] * window
+            self.window_total = 0
+        else:
+            for b in range(self.head + 1, bucket + 1):
+                slot = self._slot(b)
+                self.window_total -= self.counts[slot]
+                self.counts[slot] = 0
+                if b < bucket:
+                    self._close(b, 0)
+
+        self.head = bucket
+        self._refresh_robust()
+
+    def add(self, bucket: int):
+        if bucket > self.head:
+            self.advance(bucket)
+        elif bucket <= self.head - self.config.window_buckets:
+            return  # слишком старый пост, корзина уже вытеснена
+        self.counts[self._slot(bucket)] += 1
+        self.window_total += 1
+
+    def current(self) -> int:
+        return self.counts[self._slot(self.head)]
+
+    def expected(self) -> float:
+        if self.config.season_buckets:
+            s = self.head % self.config.season_buckets
+            if self.seasonal_seen[s]:
+                return self.seasonal[s]
+        if self.closed >= self.config.window_buckets // 2:
+            return float(self.median)
+        return self.ewma_mean
+
+    def zscore(self) -> float:
+        if self.closed < self.config.min_history:
+            return 0.0
+        # 1.4826 * MAD — состоятельная оценка σ для нормального распределения
+        scale = max(1.4826 * self.mad, math.sqrt(self.ewma_var), self.config.min_scale)
+        return (self.current() - self.expected()) / scale
+
+
+class StreamingAnomalyDetector:
+    """
+    Потоковый детектор всплесков по локациям.
+    Каждый пост — O(1): инкремент корзины кольцевого буфера; базовые линии
+    (EWMA, сезонная, медиана/MAD окна) обновляются только при закрытии корзины.
+    """
+
+    def __init__(self, config: Optional[DetectorConfig] = None):
+        self.config = config or DetectorConfig()
+        self._states: Dict[str, _LocationState] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, timestamp) -> int:
+        if timestamp is None:
+            timestamp = time.time()
+        else:
+            timestamp = to_epoch_seconds(timestamp)
+        return int(timestamp // self.config.bucket_seconds)
+
+    def observe(self, location: str, timestamp=None) -> float:
+        """Учитывает один пост и возвращает текущий z-score локации"""
+        bucket = self._bucket(timestamp)
+        with self._lock:
+            state = self._states.get(location)
+            if state is None:
+                state = self._states[location] = _LocationState(self.config, bucket)
+            state.add(bucket)
+            return state.zscore()
+
+    def advance(self, timestamp=None):
+        """Сдвигает время для всех локаций (затухание районов без новых постов)"""
+        bucket = self._bucket(timestamp)
+        with self._lock:
+            for state in self._states.values():
+                state.advance(bucket)
+
+    def status(self, location: str, now=None) -> Optional[LocationStatus]:
+        bucket = self._bucket(now)
+        with self._lock:
+            state = self._states.get(location)
+            if state is None:
+                return None
+            state.advance(bucket)
+            return self._status(location, state)
+
+    def snapshot(self, now=None) -> List[LocationStatus]:
+        """Состояние всех локаций, отсортированное по убыванию z-score"""
+        bucket = self._bucket(now)
+        with self._lock:
+            result = []
+            for location, state in self._states.items():
+                state.advance(bucket)
+                result.append(self._status(location, state))
+        result.sort(key=lambda s: s.zscore, reverse=True)
+        return result
+
+    def anomalies(self, now=None) -> List[LocationStatus]:
+        return [s for s in self.snapshot(now) if s.is_anomaly]
+
+    def _status(self, location: str, state: _LocationState) -> LocationStatus:
+        count = state.current()
+        expected = state.expected()
+        z = state.zscore()
+        return LocationStatus(
+            location=location,
+            count=count,
+            window_total=state.window_total,
+            expected=expected,
+            zscore=z,
+            ratio=count / expected if expected > 0 else float(count),
+            is_anomaly=z > self.config.z_threshold,
+        )
@@ -0,0 +1,91 @@
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from models.stream_detector import DetectorConfig, StreamingAnomalyDetector, to_epoch_seconds
+
+CONFIG = DetectorConfig(bucket_seconds=60, window_buckets=30, season_buckets=0, min_history=10)
+
+
+def feed_background(detector, location, buckets, per_bucket=2):
+    for b in range(buckets):
+        for i in range(per_bucket):
+            detector.observe(location, b * 60 + i)
+
+
+def test_spike_detected():
+    print("\n[ANOMALY] Проверка всплеска на фоне стабильного потока...")
+    detector = StreamingAnomalyDetector(CONFIG)
+    feed_background(detector, "Ленина", 20)
+    feed_background(detector, "Маркса", 20)
+
+    # Всплеск в одной локации в 20-й корзине
+    for i in range(15):
+        detector.observe("Ленина", 20 * 60 + i)
+    detector.observe("Маркса", 20 * 60)
+
+    snapshot = detector.snapshot(now=20 * 60 + 30)
+    assert snapshot[0].location == "Ленина"
+    assert snapshot[0].is_anomaly
+    assert not detector.status("Маркса", now=20 * 60 + 30).is_anomaly
+    print(f"✅ УСПЕХ: z-score всплеска = {snapshot[0].zscore:.2f}")
+
+
+def test_no_alerts_before_history():
+    detector = StreamingAnomalyDetector(CONFIG)
+    feed_background(detector, "Мира", 3)
+    for i in range(50):
+        detector.observe("Мира", 3 * 60 + i)
+    assert detector.anomalies(now=3 * 60 + 59) == []
+
+
+def test_window_eviction():
+    detector = StreamingAnomalyDetector(CONFIG)
+    feed_background(detector, "Вокзал", 10)
+    assert detector.status("Вокзал", now=9 * 60).window_total == 20
+
+    # Через половину окна старые корзины ещё в буфере
+    assert detector.status("Вокзал", now=25 * 60).window_total == 20
+    # Спустя окно — всё вытеснено, а пауза длиннее окна не ломает буфер
+    assert detector.status("Вокзал", now=500 * 60).window_total == 0
+    detector.observe("Вокзал", 500 * 60 + 1)
+    assert detector.status("Вокзал", now=500 * 60 + 2).count == 1
+
+
+def test_seasonal_baseline():
+    config = DetectorConfig(bucket_seconds=60, window_buckets=40, season_buckets=10, min_history=10)
+    detector = StreamingAnomalyDetector(config)
+    # Каждый 10-й слот — регулярный «час пик» по 10 постов
+    for b in range(30):
+        n = 10 if b % 10 == 0 else 1
+        for i in range(n):
+            detector.observe("ТЦ Омега", b * 60 + i)
+    for i in range(10):
+        detector.observe("ТЦ Омега", 30 * 60 + i)
+
+    status = detector.status("ТЦ Омега", now=30 * 60 + 30)
+    assert status.expected == 10
+    assert not status.is_anomaly
+
+
+def test_post_time_normalized_to_utc_epoch():
+    moment = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    # created_at без зоны: CURRENT_TIMESTAMP сервера БД в Москве (UTC+3)
+    naive_local = pd.Timestamp("2024-05-01 15:00:00")
+    assert to_epoch_seconds(naive_local, "Europe/Moscow") == moment.timestamp()
+    assert to_epoch_seconds(naive_local.to_pydatetime(), "Europe/Moscow") == moment.timestamp()
+    assert to_epoch_seconds("2024-05-01 12:00:00") == moment.timestamp()
+    # timestamp — секунды Unix, NaN/NaT — нет значения
+    assert to_epoch_seconds(int(moment.timestamp())) == moment.timestamp()
+    assert to_epoch_seconds(float("nan")) is None and to_epoch_seconds(pd.NaT) is None
+
+
+def test_naive_created_at_lands_in_current_bucket():
+    detector = StreamingAnomalyDetector(CONFIG)
+    now = time.time()
+    # Свежий пост, записанный в БД по московскому времени
+    created_at = datetime.fromtimestamp(now, tz=ZoneInfo("Europe/Moscow")).replace(tzinfo=None)
+    detector.observe("Ленина", to_epoch_seconds(created_at, "Europe/Moscow"))
+    assert detector.status("Ленина", now=now).count == 1
@@ -0,0 +1,170 @@
+"""
+Обучение PPO в лабиринте на нескольких процессах (SubprocVecEnv).
+
+    python -m agents.training --steps 100000 --envs 8
+    python -m agents.training --steps 500000 --mazes mazes.npz   # curriculum по набору
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback, CallbackList, CheckpointCallback
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+from env.custom_env import CustomMazeEnv
+from env.maze_set import MazeSet
+from env.wrappers import DictFlattenWrapper
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PREFIX = "ppo_labyrinth"
+ROLLOUT_STEPS = 2048  # шагов в одном rollout суммарно по всем средам, как у PPO по умолчанию
+
+
+def load_maze_config(path="maze.json"):
+    # Путь считается относительно корня проекта, а не текущей директории
+    full_path = os.path.join(PROJECT_DIR, path)
+
+    # Проверяем существование файла
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(f"Файл {full_path} не найден! Убедитесь, что файл maze.json существует в директории {PROJECT_DIR}")
+
+    try:
+        # Используем utf-8-sig для автоматического удаления BOM, если он есть
+        with open(full_path, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+            # Проверяем структуру данных
+            if 'map' not in data:
+                raise ValueError("В файле maze.json отсутствует ключ 'map'")
+            return data
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Ошибка при чтении JSON файла {full_path}: {e}")
+
+
+def make_env(maze_layout, size=13, max_steps=200, seed=0, rank=0, maze_set=None):
+    """Фабрика среды для VecEnv: каждый воркер со своим seed"""
+    def _init():
+        env = CustomMazeEnv(maze_layout=maze_layout, size=size, max_steps=max_steps, render_mode=None,
+                            maze_set=maze_set, max_difficulty=0.0 if maze_set is not None else 1.0)
+        env = Monitor(DictFlattenWrapper(env))
+        env.reset(seed=seed + rank)
+        return env
+    return _init
+
+
+def make_vec_env(maze_layout, n_envs=1, size=13, max_steps=200, seed=0, maze_set=None):
+    """n_envs > 1 — SubprocVecEnv (по процессу на среду), иначе DummyVecEnv без накладных расходов"""
+    env_fns = [make_env(maze_layout, size, max_steps, seed, rank, maze_set) for rank in range(n_envs)]
+    if n_envs == 1:
+        return DummyVecEnv(env_fns)
+    return SubprocVecEnv(env_fns)
+
+
+class ThroughputCallback(BaseCallback):
+    """Считает шаги среды в секунду (по всем воркерам) за время обучения"""
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self.steps_per_second = 0.0
+
+    def _on_training_start(self):
+        self._start_time = time.perf_counter()
+        self._start_steps = self.num_timesteps
+
+    def _on_rollout_end(self):
+        self.logger.record("time/env_steps_per_sec", self._rate())
+
+    def _on_step(self):
+        return True
+
+    def _on_training_end(self):
+        self.steps_per_second = self._rate()
+
+    def _rate(self):
+        elapsed = time.perf_counter() - self._start_time
+        return (self.num_timesteps - self._start_steps) / elapsed if elapsed else 0.0
+
+
+class CurriculumCallback(BaseCallback):
+    """Поднимает порог сложности лабиринтов линейно от 0 до 1 к концу обучения"""
+
+    def __init__(self, total_timesteps, verbose=0):
+        super().__init__(verbose)
+        self.total_timesteps = total_timesteps
+
+    def _on_rollout_start(self):
+        max_difficulty = min(self.num_timesteps / self.total_timesteps, 1.0)
+        self.training_env.env_method("set_max_difficulty", max_difficulty)
+        self.logger.record("curriculum/max_difficulty", max_difficulty)
+
+    def _on_step(self):
+        return True
+
+
+def train(maze_layout, total_timesteps=10000, n_envs=None, size=13, max_steps=200, seed=0,
+          checkpoint_dir=PROJECT_DIR, checkpoint_freq=50000, verbose=1, maze_set=None):
+    """
+    Обучить PPO на n_envs параллельных средах.
+
+    С maze_set (env.maze_set.MazeSet) каждый эпизод идет в случайном
+    лабиринте набора, сложность растет по мере обучения (maze_layout
+    тогда можно не передавать).
+
+    Промежуточные веса сохраняются каждые checkpoint_freq шагов в
+    ppo_labyrinth_<size>x<size>_<шаги>_steps.zip, итоговые — в
+    ppo_labyrinth_<size>x<size>.zip.
+
+    Returns:
+        (model, шаги среды в секунду)
+    """
+    n_envs = n_envs or os.cpu_count() or 1
+    name = f"{MODEL_PREFIX}_{size}x{size}"
+    env = make_vec_env(maze_layout, n_envs, size, max_steps, seed, maze_set)
+
+    throughput = ThroughputCallback()
+    callbacks = [
+        throughput,
+        # save_freq считается в вызовах step у VecEnv, т.е. по n_envs шагов за раз
+        CheckpointCallback(save_freq=max(checkpoint_freq // n_envs, 1), save_path=checkpoint_dir, name_prefix=name),
+    ]
+    if maze_set is not None:
+        callbacks.append(CurriculumCallback(total_timesteps))
+    callbacks = CallbackList(callbacks)
+    try:
+        model = PPO("MlpPolicy", env, n_steps=max(ROLLOUT_STEPS // n_envs, 64), verbose=verbose,
+                    device="cpu", seed=seed)
+        model.learn(total_timesteps=total_timesteps, callback=callbacks)
+    finally:
+        env.close()
+
+    model.save(os.path.join(checkpoint_dir, name))
+    print(f"⚡ {throughput.steps_per_second:.0f} шагов среды/с на {n_envs} воркерах")
+    return model, throughput.steps_per_second
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Обучение PPO в лабиринте")
+    parser.add_argument("--maze", default="maze.json")
+    parser.add_argument("--mazes", default=None, help="Набор лабиринтов .npz из generate_maze.py для curriculum")
+    parser.add_argument("--steps", type=int, default=10000, help="Всего шагов среды")
+    parser.add_argument("--envs", type=int, default=None, help="Число параллельных сред (по умолчанию — ядер CPU)")
+    parser.add_argument("--size", type=int, default=13)
+    parser.add_argument("--max-steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-freq", type=int, default=50000)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.mazes:
+        maze_set = MazeSet.load(args.mazes)
+        train(None, args.steps, args.envs, maze_set.grid_size, args.max_steps, args.seed,
+              checkpoint_freq=args.checkpoint_freq, maze_set=maze_set)
+    else:
+        maze_layout = np.array(load_maze_config(args.maze)['map'])
+        train(maze_layout, args.steps, args.envs, args.size, args.max_steps, args.seed,
+              checkpoint_freq=args.checkpoint_freq)
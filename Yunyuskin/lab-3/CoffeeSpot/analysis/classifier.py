@@ -1,20 +1,60 @@
+import numpy as np
 import torch
+import torch.nn.functional as F
 from transformers import ViTImageProcessor, ViTForImageClassification
 from PIL import Image
 
+from analysis.inference import chunks, prepare_model
+
 
 class SituationClassifier:
-    def __init__(self):
+    def __init__(self, quantize=False):
         # Модель из ТЗ: nateraw/vit-base-beans
         self.processor = ViTImageProcessor.from_pretrained("nateraw/vit-base-beans")
-        self.model = ViTForImageClassification.from_pretrained("nateraw/vit-base-beans")
+        self.model = prepare_model(ViTForImageClassification.from_pretrained("nateraw/vit-base-beans"), quantize)
 
-    def classify(self, frame):
-        image = Image.fromarray(frame)
-        inputs = self.processor(images=image, return_tensors="pt")
-        with torch.no_grad():
-            outputs = self.model(**inputs)
+        # Параметры предобработки берем из процессора и делаем ее сразу для батча на torch
+        self.image_size = (self.processor.size["height"], self.processor.size["width"])
+        self.mean = torch.tensor(self.processor.image_mean).view(1, 3, 1, 1)
+        self.std = torch.tensor(self.processor.image_std).view(1, 3, 1, 1)
+
+    def _preprocess(self, frames):
+        """Кадры одной формы -> pixel_values (B, 3, h, w), шаги как у ViTImageProcessor"""
+        frame = frames[0]
+        if frame.ndim != 3 or frame.shape[-1] != 3:
+            # Не RGB (оттенки серого, RGBA) — через PIL и сам процессор
+            images = [Image.fromarray(f).convert("RGB") for f in frames]
+            return self.processor(images=images, return_tensors="pt")["pixel_values"]
+
+        pixels = torch.from_numpy(np.stack(frames)).permute(0, 3, 1, 2).float()
+        if self.processor.do_resize:
+            pixels = F.interpolate(pixels, size=self.image_size, mode="bilinear", antialias=True, align_corners=False)
+        if self.processor.do_rescale:
+            pixels = pixels * self.processor.rescale_factor
+        if self.processor.do_normalize:
+            pixels = (pixels - self.mean) / self.std
+        return pixels
+
+    def classify_batch(self, frames):
+        """Классификация списка кадров: кадры одной формы идут батчами по MAX_BATCH_SIZE"""
+        groups = {}
+        for i, frame in enumerate(frames):
+            frame = np.asarray(frame)
+            groups.setdefault((frame.shape, frame.dtype.str), []).append((i, frame))
+
+        labels = [None] * len(frames)
+        with torch.inference_mode():
+            for group in groups.values():
+                for batch in chunks(group):
+                    logits = self.model(pixel_values=self._preprocess([frame for _, frame in batch])).logits
+                    for (i, _), label in zip(batch, logits.argmax(-1).tolist()):
+                        labels[i] = label
 
         # Если индекс предсказания высокий - помечаем как Опасно
-        label = outputs.logits.argmax(-1).item()
-        return "ОПАСНО" if label == 1 else "БЕЗОПАСНО"
\ No newline at end of file
+        return ["ОПАСНО" if label == 1 else "БЕЗОПАСНО" for label in labels]
+
+    def classify(self, frame):
+        return self.classify_batch([frame])[0]
+
+    def warm_up(self, batch_size=1):
+        self.classify_batch([np.zeros((128, 128, 3), dtype=np.uint8)] * batch_size)
@@ -1,44 +1,58 @@
 import torch
 from transformers import DetrImageProcessor, DetrForObjectDetection
-from PIL import Image
 import numpy as np
 
+from analysis.inference import chunks, prepare_model
+
 
 class MazeDetector:
-    def __init__(self):
+    def __init__(self, quantize=False):
         print("Загрузка модели DETR (facebook/detr-resnet-50)...")
         # Модель из твоего ТЗ
         self.processor = DetrImageProcessor.from_pretrained("facebook/detr-resnet-50")
-        self.model = DetrForObjectDetection.from_pretrained("facebook/detr-resnet-50")
+        self.model = prepare_model(DetrForObjectDetection.from_pretrained("facebook/detr-resnet-50"), quantize)
+        self.id2label = self.model.config.id2label
 
-    def analyze_frame(self, frame):
+    def analyze_batch(self, frames, threshold=0.5):
         """
-        Принимает скриншот из MiniGrid (numpy array)
-        Возвращает список найденных объектов
+        Принимает список скриншотов из MiniGrid (numpy array)
+        Возвращает для каждого список найденных объектов
         """
-        image = Image.fromarray(frame)
-        inputs = self.processor(images=image, return_tensors="pt")
-
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-
-        # Обработка результатов
-        target_sizes = torch.tensor([image.size[::-1]])
-        results = self.processor.post_process_object_detection(outputs, target_sizes=target_sizes, threshold=0.5)[0]
-
+        results = []
+        with torch.inference_mode():
+            for batch in chunks(frames):
+                # Процессор сам выравнивает кадры разного размера (pixel_mask)
+                inputs = self.processor(images=list(batch), return_tensors="pt")
+                outputs = self.model(**inputs)
+
+                # Обработка результатов
+                target_sizes = torch.tensor([frame.shape[:2] for frame in batch])
+                processed = self.processor.post_process_object_detection(
+                    outputs, target_sizes=target_sizes, threshold=threshold)
+                results.extend(self._to_detections(result) for result in processed)
+        return results
+
+    def _to_detections(self, result):
         detections = []
-        for score, label, box in zip(results["scores"], results["labels"], results["boxes"]):
-            box = [round(i, 2) for i in box.tolist()]
-            label_name = self.model.config.id2label[label.item()]
+        for score, label, box in zip(result["scores"].tolist(), result["labels"].tolist(), result["boxes"].tolist()):
             detections.append({
-                "label": label_name,
-                "confidence": round(score.item(), 3),
-                "box": box
+                "label": self.id2label[label],
+                "confidence": round(score, 3),
+                "box": [round(i, 2) for i in box]
             })
-
         return detections
 
+    def analyze_frame(self, frame):
+        """
+        Принимает скриншот из MiniGrid (numpy array)
+        Возвращает список найденных объектов
+        """
+        return self.analyze_batch([frame])[0]
+
+    def warm_up(self, batch_size=1):
+        self.analyze_batch([np.zeros((128, 128, 3), dtype=np.uint8)] * batch_size)
+
 
 if __name__ == "__main__":
     detector = MazeDetector()
-    print("Детектор успешно инициализирован.")
\ No newline at end of file
+    print("Детектор успешно инициализирован.")
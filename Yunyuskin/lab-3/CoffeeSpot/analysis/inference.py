@@ -0,0 +1,21 @@
+import torch
+
+# Кадров за один проход модели: больше — быстрее на кадр, но больше памяти
+MAX_BATCH_SIZE = 32
+
+
+def prepare_model(model, quantize=False):
+    """
+    Режим инференса; с quantize — динамическая int8-квантизация Linear-слоев
+    для CPU (быстрее и меньше памяти ценой небольшой потери точности).
+    """
+    model.eval()
+    if quantize:
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def chunks(items, size=MAX_BATCH_SIZE):
+    """Разбить список кадров на батчи не больше size"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
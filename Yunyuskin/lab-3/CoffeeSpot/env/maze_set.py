@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class MazeSet:
+    """
+    Набор лабиринтов для curriculum-обучения, отсортированный по сложности.
+
+    Хранится одним сжатым .npz: макеты (N, n, n) uint8 и метаданные
+    по каждому лабиринту (длина кратчайшего пути, число лавы, сложность 0..1).
+    Макет n x n занимает внутреннюю область сетки CustomMazeEnv размера n + 2.
+    """
+
+    FIELDS = ("layouts", "difficulty", "path_length", "lava_count", "dead_ends")
+
+    def __init__(self, layouts, difficulty, path_length, lava_count, dead_ends, seed=0):
+        order = np.argsort(difficulty, kind="stable")
+        self.layouts = np.asarray(layouts, dtype=np.uint8)[order]
+        self.difficulty = np.asarray(difficulty, dtype=np.float32)[order]
+        self.path_length = np.asarray(path_length, dtype=np.int16)[order]
+        self.lava_count = np.asarray(lava_count, dtype=np.int16)[order]
+        self.dead_ends = np.asarray(dead_ends, dtype=np.int16)[order]
+        self.seed = seed
+
+    def __len__(self):
+        return len(self.layouts)
+
+    @property
+    def grid_size(self):
+        """Размер сетки CustomMazeEnv для этих макетов (с внешним контуром)"""
+        return self.layouts.shape[1] + 2
+
+    def available(self, max_difficulty=1.0):
+        """Сколько лабиринтов (с начала списка) не сложнее max_difficulty, минимум один"""
+        return max(int(np.searchsorted(self.difficulty, max_difficulty, side="right")), 1)
+
+    def sample(self, rng, max_difficulty=1.0):
+        """Случайный макет не сложнее max_difficulty (rng — np.random.Generator среды)"""
+        return self.layouts[rng.integers(self.available(max_difficulty))]
+
+    def save(self, path):
+        np.savez_compressed(path, seed=self.seed, **{field: getattr(self, field) for field in self.FIELDS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(*(data[field] for field in cls.FIELDS), seed=int(data["seed"]))
@@ -1,44 +1,181 @@
+"""
+Генератор лабиринтов на NumPy (recursive backtracker) с лавой в тупиках.
+
+    python generate_maze.py                              # один лабиринт в maze.json
+    python generate_maze.py --count 5000 --out mazes.npz # набор для curriculum-обучения
+
+Макет n x n (n нечетное): 0 — проход, 1 — стена, 2 — лава. Клетки лабиринта
+стоят на четных координатах, старт в (0, 0), финиш в (n-1, n-1) — в сетке
+CustomMazeEnv размера n + 2 это (1, 1) и (n, n).
+"""
+import argparse
 import json
+
 import numpy as np
 
-def generate_maze():
-    """Генерирует простой лабиринт в формате JSON"""
-    width = 11
-    height = 11
-    
-    # Создаем базовую карту (0 = проход, 1 = стена, 2 = лава)
-    # Начинаем с заполнения стенами
-    maze_data = np.ones((height, width), dtype=int)
-    
-    # Создаем простой проход от (1,1) до (9,9)
-    # Горизонтальные проходы
-    for y in [1, 3, 5, 7, 9]:
-        for x in range(1, width-1):
-            maze_data[y, x] = 0
-    
-    # Вертикальные проходы
-    for x in [1, 3, 5, 7, 9]:
-        for y in range(1, height-1):
-            maze_data[y, x] = 0
-    
-    # Добавляем лаву в некоторых тупиках
-    lava_positions = [(2, 2), (4, 4), (6, 6), (8, 8)]
-    for y, x in lava_positions:
-        if 0 < y < height-1 and 0 < x < width-1:
-            maze_data[y, x] = 2
-    
+from env.maze_set import MazeSet
+
+# Соседи клетки: вверх, вниз, влево, вправо
+DIRECTIONS = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+LAVA_WEIGHT = 2  # вклад одной лавы в сложность относительно шага пути
+
+
+def carve_mazes(count, size, rng):
+    """
+    Recursive backtracker сразу для count лабиринтов: все обходы в глубину
+    идут в ногу, один шаг — одна векторная операция на весь батч.
+    """
+    if size < 3 or size % 2 == 0:
+        raise ValueError(f"Размер лабиринта должен быть нечетным и не меньше 3, получено {size}")
+    cells = (size + 1) // 2
+    batch = np.arange(count)
+
+    layouts = np.ones((count, size, size), dtype=np.uint8)
+    layouts[:, ::2, ::2] = 0  # клетки открыты, стены между ними сносятся при обходе
+
+    visited = np.zeros((count, cells, cells), dtype=bool)
+    visited[:, 0, 0] = True
+    stack = np.zeros((count, cells * cells, 2), dtype=np.int64)
+    depth = np.ones(count, dtype=np.int64)
+
+    while True:
+        active = depth > 0
+        if not active.any():
+            break
+        top = stack[batch, np.maximum(depth - 1, 0)]
+        neighbours = top[:, None, :] + DIRECTIONS[None]
+        inside = ((neighbours >= 0) & (neighbours < cells)).all(axis=-1)
+        clipped = np.clip(neighbours, 0, cells - 1)
+        unvisited = inside & ~visited[batch[:, None], clipped[..., 0], clipped[..., 1]]
+
+        # Случайный непосещенный сосед; если таких нет — возврат по стеку
+        choice = np.where(unvisited, rng.random((count, 4)), -1.0).argmax(axis=1)
+        advance = active & unvisited.any(axis=1)
+        idx = batch[advance]
+        current, nxt = top[advance], neighbours[advance, choice[advance]]
+
+        visited[idx, nxt[:, 0], nxt[:, 1]] = True
+        # Стена между клетками (r, c) и (r', c') в макете — (r + r', c + c')
+        layouts[idx, current[:, 0] + nxt[:, 0], current[:, 1] + nxt[:, 1]] = 0
+        stack[idx, depth[advance]] = nxt
+        depth[advance] += 1
+        depth[active & ~advance] -= 1
+
+    return layouts
+
+
+def open_loops(layouts, fraction, rng):
+    """Снести долю оставшихся стен между клетками — появляются циклы и несколько путей"""
+    size = layouts.shape[1]
+    rows, cols = np.indices((size, size))
+    between_cells = (rows + cols) % 2 == 1
+    knock = between_cells & (layouts == 1) & (rng.random(layouts.shape) < fraction)
+    layouts[knock] = 0
+    return layouts
+
+
+def open_neighbours(layouts):
+    """Число открытых соседей у каждой позиции макета"""
+    closed = np.pad(layouts != 0, ((0, 0), (1, 1), (1, 1)), constant_values=True)
+    return (4 - closed[:, :-2, 1:-1].astype(np.int8) - closed[:, 2:, 1:-1]
+            - closed[:, 1:-1, :-2] - closed[:, 1:-1, 2:])
+
+
+def place_lava(layouts, probability, rng):
+    """Лава в тупиках (клетка с одним выходом), кроме старта и финиша — путь она не перекрывает"""
+    size = layouts.shape[1]
+    dead_end = (layouts == 0) & (open_neighbours(layouts) == 1)
+    dead_end[:, 0, 0] = dead_end[:, size - 1, size - 1] = False
+    lava = dead_end & (rng.random(layouts.shape) < probability)
+    layouts[lava] = 2
+    return layouts
+
+
+def shortest_paths(layouts):
+    """
+    BFS от старта сразу по всем лабиринтам (расширение фронта сдвигами).
+    Лава непроходима. Возвращает длину кратчайшего пути до финиша, -1 — нет пути.
+    """
+    count, height, width = layouts.shape
+    passable = layouts == 0
+    reached = np.zeros_like(passable)
+    reached[:, 0, 0] = passable[:, 0, 0]
+    lengths = np.where(reached[:, -1, -1], 0, -1)
+
+    for step in range(1, height * width):
+        grown = reached.copy()
+        grown[:, 1:] |= reached[:, :-1]
+        grown[:, :-1] |= reached[:, 1:]
+        grown[:, :, 1:] |= reached[:, :, :-1]
+        grown[:, :, :-1] |= reached[:, :, 1:]
+        grown &= passable
+        lengths[grown[:, -1, -1] & (lengths < 0)] = step
+        if np.array_equal(grown, reached):
+            break
+        reached = grown
+    return lengths
+
+
+def build_maze_set(count, size=11, seed=0, lava=0.75, loops=0.0):
+    """Сгенерировать count решаемых лабиринтов с метаданными сложности"""
+    rng = np.random.default_rng(seed)
+    layouts = carve_mazes(count, size, rng)
+    if loops:
+        open_loops(layouts, loops, rng)
+    dead_ends = ((layouts == 0) & (open_neighbours(layouts) == 1)).sum(axis=(1, 2))
+    place_lava(layouts, lava, rng)
+
+    path_length = shortest_paths(layouts)
+    solvable = path_length >= 0
+    layouts, path_length, dead_ends = layouts[solvable], path_length[solvable], dead_ends[solvable]
+    lava_count = (layouts == 2).sum(axis=(1, 2))
+
+    # Сложность — ранг по длине пути и числу лавы, от 0 (самый простой) до 1
+    score = path_length + LAVA_WEIGHT * lava_count
+    ranks = np.argsort(np.argsort(score, kind="stable"), kind="stable")
+    difficulty = ranks / max(len(ranks) - 1, 1)
+    return MazeSet(layouts, difficulty, path_length, lava_count, dead_ends, seed=seed)
+
+
+def generate_maze(seed=None, size=11, path="maze.json"):
+    """Генерирует один решаемый лабиринт в формате JSON (для main.py)"""
+    maze_set = build_maze_set(1, size=size, seed=seed if seed is not None else np.random.SeedSequence().entropy)
+    maze_data = maze_set.layouts[0]
+
     # Сохраняем в JSON (формат ожидаемый main.py)
     result = {
-        "width": width,
-        "height": height,
+        "width": size,
+        "height": size,
         "map": maze_data.tolist()  # 2D массив для main.py
     }
-    
-    with open("maze.json", "w") as f:
-        json.dump(result, f, indent=2)
-    
-    print(f"Лабиринт {width}x{height} создан и сохранен в maze.json")
+
+    # Строка макета — одна строка файла, как в исходном maze.json
+    rows = ",\n".join(f"    {json.dumps(row)}" for row in result["map"])
+    with open(path, "w") as f:
+        f.write(f'{{\n  "width": {size},\n  "height": {size},\n  "map": [\n{rows}\n  ]\n}}\n')
+
+    print(f"Лабиринт {size}x{size} создан и сохранен в {path} (кратчайший путь: {maze_set.path_length[0]})")
     return result
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Генератор лабиринтов")
+    parser.add_argument("--count", type=int, default=1, help="Сколько лабиринтов (больше 1 — набор .npz)")
+    parser.add_argument("--size", type=int, default=11, help="Размер макета (нечетный), сетка среды на 2 больше")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--lava", type=float, default=0.75, help="Вероятность лавы в тупике")
+    parser.add_argument("--loops", type=float, default=0.0, help="Доля лишних стен, которые сносятся")
+    parser.add_argument("--out", default=None, help="Файл результата (maze.json или mazes.npz)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    generate_maze()
+    args = parse_args()
+    if args.count == 1:
+        generate_maze(args.seed, args.size, args.out or "maze.json")
+    else:
+        maze_set = build_maze_set(args.count, args.size, args.seed or 0, args.lava, args.loops)
+        out = args.out or "mazes.npz"
+        maze_set.save(out)
+        print(f"{len(maze_set)} лабиринтов {args.size}x{args.size} сохранено в {out}, "
+              f"кратчайший путь {maze_set.path_length.min()}..{maze_set.path_length.max()}")
@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+from agents.training import load_maze_config, train
+from env.custom_env import CustomMazeEnv
+from env.maze_set import MazeSet
+from generate_maze import build_maze_set, carve_mazes, open_neighbours, shortest_paths
+
+
+def test_perfect_mazes_connect_every_cell():
+    layouts = carve_mazes(200, 11, np.random.default_rng(0))
+    cells = 6 * 6
+    # Остовное дерево: открытых стен между клетками ровно cells - 1
+    assert ((layouts == 0).sum(axis=(1, 2)) == cells + cells - 1).all()
+    assert (shortest_paths(layouts) >= 10).all()
+
+
+def test_generation_is_seeded():
+    first, second = build_maze_set(50, seed=7), build_maze_set(50, seed=7)
+    np.testing.assert_array_equal(first.layouts, second.layouts)
+    assert not np.array_equal(first.layouts, build_maze_set(50, seed=8).layouts)
+
+
+def test_lava_only_in_dead_ends_and_paths_exist():
+    maze_set = build_maze_set(500, seed=1, loops=0.1)
+    assert len(maze_set) == 500
+    assert (maze_set.path_length > 0).all()
+    assert (maze_set.lava_count > 0).any()
+    # Лава в клетке с одним выходом, старт и финиш свободны
+    lava_exits = open_neighbours(np.where(maze_set.layouts == 2, 0, maze_set.layouts))[maze_set.layouts == 2]
+    assert (lava_exits == 1).all()
+    assert (maze_set.layouts[:, 0, 0] == 0).all() and (maze_set.layouts[:, -1, -1] == 0).all()
+    np.testing.assert_array_equal(shortest_paths(maze_set.layouts), maze_set.path_length)
+
+
+def test_maze_set_roundtrip_and_curriculum(tmp_path):
+    maze_set = build_maze_set(300, seed=2)
+    assert (np.diff(maze_set.difficulty) >= 0).all()
+    path = tmp_path / "mazes.npz"
+    maze_set.save(path)
+    loaded = MazeSet.load(path)
+    np.testing.assert_array_equal(loaded.layouts, maze_set.layouts)
+    np.testing.assert_array_equal(loaded.path_length, maze_set.path_length)
+
+    rng = np.random.default_rng(0)
+    easiest = {layout.tobytes() for layout in loaded.layouts[:loaded.available(0.1)]}
+    assert all(loaded.sample(rng, 0.1).tobytes() in easiest for _ in range(50))
+    assert loaded.available(0.0) == 1 and loaded.available(1.0) == len(loaded)
+
+
+def test_env_samples_mazes_from_set():
+    maze_set = build_maze_set(100, seed=3)
+    env = CustomMazeEnv(size=13, max_steps=50, maze_set=maze_set)
+    layouts = set()
+    for seed in range(20):
+        env.reset(seed=seed)
+        layouts.add(env.maze_layout.tobytes())
+        assert env.agent_pos == (1, 1)
+        assert env.grid.get(11, 11).type == 'goal'
+    assert len(layouts) > 1
+
+    env.set_max_difficulty(0.0)
+    env.reset(seed=0)
+    np.testing.assert_array_equal(env.maze_layout, maze_set.layouts[0])
+
+
+def test_default_maze_is_solvable():
+    layout = np.array(load_maze_config()['map'])
+    assert shortest_paths(layout[np.newaxis])[0] > 0
+
+
+def test_curriculum_training_smoke(tmp_path):
+    maze_set = build_maze_set(64, seed=4)
+    model, _ = train(None, total_timesteps=256, n_envs=1, size=maze_set.grid_size, max_steps=50,
+                     checkpoint_dir=str(tmp_path), verbose=0, maze_set=maze_set)
+    assert (tmp_path / "ppo_labyrinth_13x13.zip").exists()
+
+
+def test_benchmark_batch_generation():
+    start = time.perf_counter()
+    maze_set = build_maze_set(5000, seed=5)
+    elapsed = time.perf_counter() - start
+    print(f"\n[BENCHMARK] 5000 лабиринтов 11x11 с проверкой BFS: {elapsed:.2f} с "
+          f"({len(maze_set) / elapsed:,.0f} лабиринтов/с)")
+    assert len(maze_set) == 5000
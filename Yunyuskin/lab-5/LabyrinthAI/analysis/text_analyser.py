@@ -1,17 +1,53 @@
-from sentence_transformers import SentenceTransformer, util
+from collections import OrderedDict, deque
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from analysis.inference import MAX_BATCH_SIZE, prepare_model
+
+# Действий агента немного ("вперед", "налево"...) — эмбеддинги одних и тех же фраз кешируются
+MAX_CACHED_EMBEDDINGS = 4096
 
 
 class LoopDetector:
-    def __init__(self):
+    def __init__(self, quantize=False, history_size=16, cache_size=MAX_CACHED_EMBEDDINGS):
         # Модель из ТЗ: multi-qa-mpnet-base-dot-v1
-        self.model = SentenceTransformer('multi-qa-mpnet-base-dot-v1')
-        self.history = []
+        self.model = prepare_model(SentenceTransformer('multi-qa-mpnet-base-dot-v1', device='cpu'), quantize)
+        self.history = deque(maxlen=history_size)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # LRU: давно не встречавшиеся фразы вытесняются первыми
+
+    def encode(self, texts):
+        """Нормированные эмбеддинги списка фраз; новые считаются одним батчем"""
+        found = {}
+        for text in dict.fromkeys(texts):
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                found[text] = self._cache[text]
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if missing:
+            embeddings = self.model.encode(missing, batch_size=MAX_BATCH_SIZE,
+                                           normalize_embeddings=True, convert_to_numpy=True)
+            found.update(zip(missing, embeddings))
+            self._cache.update(zip(missing, embeddings))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        # Ответ собирается из found: вытеснение из кеша его не затрагивает
+        return np.stack([found[text] for text in texts])
+
+    def analyze_batch(self, action_texts):
+        """Прогнать серию действий через check_loop, эмбеддинги — за один вызов модели"""
+        self.encode(action_texts)
+        return [self.check_loop(text) for text in action_texts]
 
     def check_loop(self, action_text):
         self.history.append(action_text)
         if len(self.history) < 4: return False
 
         # Сравниваем текущее действие с тем, что было 2 шага назад
-        embeddings = self.model.encode([self.history[-1], self.history[-3]])
-        score = util.cos_sim(embeddings[0], embeddings[1])
-        return score > 0.85  # Если похожи - значит ходит кругами
\ No newline at end of file
+        embeddings = self.encode([self.history[-1], self.history[-3]])
+        score = float(embeddings[0] @ embeddings[1])
+        return score > 0.85  # Если похожи - значит ходит кругами
+
+    def warm_up(self):
+        self.model.encode(["вперед"], normalize_embeddings=True)
@@ -5,10 +5,90 @@ from minigrid.core.grid import Grid
 from minigrid.core.world_object import Wall, Goal, Lava
 from minigrid.core.mission import MissionSpace
 
+# Скомпилированные лабиринты: (макет, размер сетки) -> CompiledMaze.
+# Общий для всех сред процесса, так что смена макета между эпизодами
+# (и повторные reset) не пересобирает сетку; вмещает набор из generate_maze.py
+MAX_COMPILED_MAZES = 16384
+_compiled_mazes = {}
+
+# Стены, лава и финиш не меняются — один объект на процесс для всех скомпилированных
+# сеток, иначе каждый макет в кеше держит собственные ~100 экземпляров Wall
+WALL, LAVA, GOAL = Wall(), Lava(), Goal()
+
+
+class CompiledMaze:
+    """
+    Собранная один раз сетка MiniGrid для макета: шаблон клеток,
+    стартовая позиция и маска лавы. Стены, лава и финиш не меняются
+    во время эпизода, поэтому все сетки ссылаются на общие WALL, LAVA и GOAL.
+    """
+
+    def __init__(self, maze_layout, width, height):
+        template = Grid(width, height)
+        # Внешний контур
+        template.horz_wall(0, 0, width, obj_type=lambda: WALL)
+        template.horz_wall(0, height - 1, width, obj_type=lambda: WALL)
+        template.vert_wall(0, 0, height, obj_type=lambda: WALL)
+        template.vert_wall(width - 1, 0, height, obj_type=lambda: WALL)
+
+        # 1-Стена, 2-Лава из макета Node.js; maze_layout[y][x] соответствует grid[x+1][y+1]
+        for y, x in zip(*np.nonzero(maze_layout == 1)):
+            template.set(x + 1, y + 1, WALL)
+        lava_cells = list(zip(*np.nonzero(maze_layout == 2)))
+        for y, x in lava_cells:
+            template.set(x + 1, y + 1, LAVA)
+
+        # Финиш
+        template.set(width - 2, height - 2, GOAL)
+        self.template = template
+
+        # Маска лавы в координатах сетки: lava_mask[x, y]
+        self.lava_mask = np.zeros((width, height), dtype=bool)
+        for y, x in lava_cells:
+            self.lava_mask[x + 1, y + 1] = True
+
+        # Стартовая позиция: первая свободная клетка внутренней области
+        # построчно (не стена, не лава, не цель), иначе (1, 1)
+        free = np.array([cell is None for cell in template.grid]).reshape(height, width)[1:-1, 1:-1]
+        ys, xs = np.nonzero(free)
+        self.start_pos = (int(xs[0]) + 1, int(ys[0]) + 1) if len(ys) else (1, 1)
+
+    def new_grid(self):
+        """Копия сетки для нового эпизода: только список клеток, без deepcopy объектов"""
+        grid = Grid.__new__(Grid)
+        grid.width = self.template.width
+        grid.height = self.template.height
+        grid.grid = list(self.template.grid)
+        return grid
+
+
+def compile_maze(maze_layout, width, height):
+    maze_layout = np.asarray(maze_layout)
+    key = (maze_layout.shape, maze_layout.dtype.str, maze_layout.tobytes(), width, height)
+    compiled = _compiled_mazes.get(key)
+    if compiled is None:
+        if len(_compiled_mazes) >= MAX_COMPILED_MAZES:
+            _compiled_mazes.clear()
+        compiled = _compiled_mazes[key] = CompiledMaze(maze_layout, width, height)
+    return compiled
+
 
 class CustomMazeEnv(MiniGridEnv):
-    def __init__(self, maze_layout, size=13, max_steps=100, render_mode="rgb_array"):
-        self.maze_layout = maze_layout
+    """
+    Лабиринт из макета maze_layout либо, для curriculum-обучения, из набора
+    maze_set (env.maze_set.MazeSet): на каждом reset берется случайный
+    лабиринт не сложнее max_difficulty.
+    """
+
+    def __init__(self, maze_layout=None, size=13, max_steps=100, render_mode="rgb_array",
+                 maze_set=None, max_difficulty=1.0):
+        if maze_layout is None and maze_set is None:
+            raise ValueError("Нужен maze_layout или maze_set")
+        if maze_set is not None and maze_set.grid_size != size:
+            raise ValueError(f"Лабиринты набора рассчитаны на сетку {maze_set.grid_size}, а не {size}")
+        self.maze_set = maze_set
+        self.max_difficulty = max_difficulty
+        self.maze_layout = maze_layout if maze_layout is not None else maze_set.layouts[0]
         mission_space = MissionSpace(mission_func=lambda: "find the green goal")
 
         super().__init__(
@@ -18,57 +98,38 @@ class CustomMazeEnv(MiniGridEnv):
             render_mode=render_mode
         )
 
-    def _gen_grid(self, width, height):
-        self.grid = Grid(width, height)
-        # Внешний контур
-        self.grid.wall_rect(0, 0, width, height)
+    @property
+    def maze_layout(self):
+        return self._maze_layout
 
-        # 1-Стена, 2-Лава из макета Node.js
-        for y in range(self.maze_layout.shape[0]):
-            for x in range(self.maze_layout.shape[1]):
-                val = self.maze_layout[y, x]
-                if val == 1:
-                    self.grid.set(x + 1, y + 1, Wall())
-                elif val == 2:
-                    self.grid.set(x + 1, y + 1, Lava())
+    @maze_layout.setter
+    def maze_layout(self, maze_layout):
+        # Новый макет подхватывается на следующем reset()
+        self._maze_layout = np.asarray(maze_layout)
+        self._compiled = None
+
+    def set_max_difficulty(self, max_difficulty):
+        """Порог сложности для следующих reset (из VecEnv: env_method("set_max_difficulty", ...))"""
+        self.max_difficulty = max_difficulty
+
+    def _gen_grid(self, width, height):
+        if self.maze_set is not None:
+            self.maze_layout = self.maze_set.sample(self.np_random, self.max_difficulty)
+        # Сетка собирается один раз на макет, на reset только копируется
+        if self._compiled is None:
+            self._compiled = compile_maze(self.maze_layout, width, height)
+        self.grid = self._compiled.new_grid()
 
-        # Финиш
-        self.grid.set(width - 2, height - 2, Goal())
-        
-        # Устанавливаем начальную позицию агента
-        # В MiniGrid координаты начинаются с 0, но внешние стены занимают границы
-        # Внутренняя область: от (1, 1) до (width-2, height-2)
-        # maze_layout[y][x] соответствует grid[x+1][y+1]
-        # Ищем первую свободную клетку (где cell is None)
-        start_pos = None
-        
-        # Ищем первую свободную клетку в внутренней области
-        for y in range(1, height - 1):
-            for x in range(1, width - 1):
-                cell = self.grid.get(x, y)
-                # Клетка свободна, если она None (пустая) - не стена, не лава, не цель
-                if cell is None:
-                    start_pos = (x, y)
-                    break
-            if start_pos is not None:
-                break
-        
-        # Если не нашли свободную клетку, используем (1, 1) по умолчанию
-        # MiniGridEnv проверит это при reset() и выдаст ошибку, если клетка занята
-        if start_pos is None:
-            start_pos = (1, 1)
-        
         # Устанавливаем позицию и направление агента
-        # MiniGridEnv автоматически разместит агента при вызове reset()
-        # и проверит, что start_pos может быть перекрыта (can_overlap())
-        self.agent_pos = start_pos
+        # MiniGridEnv проверит при reset(), что start_pos может быть перекрыта (can_overlap())
+        self.agent_pos = self._compiled.start_pos
         self.agent_dir = 0
 
     def step(self, action):
         obs, reward, terminated, truncated, info = super().step(action)
-        # Кастомная проверка смерти
-        cell = self.grid.get(*self.agent_pos)
-        if cell and cell.type == 'lava':
+        # Кастомная проверка смерти по маске лавы, без чтения клетки сетки
+        x, y = self.agent_pos
+        if self._compiled.lava_mask[x, y]:
             reward = -1.0
             terminated = True
-        return obs, reward, terminated, truncated, info
\ No newline at end of file
+        return obs, reward, terminated, truncated, info
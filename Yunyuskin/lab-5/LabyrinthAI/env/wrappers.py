@@ -0,0 +1,62 @@
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+
+class ObsFlattener:
+    """
+    Преобразует Dict observation MiniGrid в плоский float32-вектор.
+
+    Раскладка (ключи по алфавиту, mission пропускается) вычисляется один раз
+    по observation_space, дальше на каждом шаге только копирование в
+    готовые срезы без проверок типов и concatenate. Используется и в
+    обучении (DictFlattenWrapper), и при инференсе (batch) — раскладка
+    гарантированно одна и та же.
+    """
+
+    def __init__(self, observation_space):
+        self.fields = []  # (ключ, начало, конец) в плоском векторе
+        offset = 0
+        for key in sorted(observation_space.spaces):
+            space = observation_space.spaces[key]
+            if isinstance(space, spaces.Box):
+                size = int(np.prod(space.shape))
+            elif isinstance(space, spaces.Discrete):
+                size = 1  # Одно значение для дискретного пространства
+            else:
+                continue  # mission (строка) модели не нужна
+            self.fields.append((key, offset, offset + size))
+            offset += size
+
+        self.size = offset
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(self.size,), dtype=np.float32)
+        # Буфер для predict: (1, n) — batch dimension, которую ждет модель
+        self._batch = np.empty((1, self.size), dtype=np.float32)
+
+    def flatten(self, obs, out=None):
+        """
+        Плоский вектор наблюдения. Без out выделяется новый массив: VecEnv
+        хранит terminal_observation, поэтому общий буфер для обучения не годится.
+        """
+        if out is None:
+            out = np.empty(self.size, dtype=np.float32)
+        for key, start, stop in self.fields:
+            out[start:stop] = np.ravel(obs[key])
+        return out
+
+    def batch(self, obs):
+        """Наблюдение в переиспользуемом буфере формы (1, n) для model.predict"""
+        self.flatten(obs, out=self._batch[0])
+        return self._batch
+
+
+class DictFlattenWrapper(gym.ObservationWrapper):
+    """Wrapper для преобразования Dict observation в плоский вектор"""
+
+    def __init__(self, env):
+        super().__init__(env)
+        self.flattener = ObsFlattener(env.observation_space)
+        self.observation_space = self.flattener.observation_space
+
+    def observation(self, obs):
+        return self.flattener.flatten(obs)
@@ -1,20 +1,52 @@
-import torch
+import os
+import threading
+
 from analysis.classifier import SituationClassifier
 from analysis.detector import MazeDetector
 from analysis.text_analyser import LoopDetector
 
+
 class ModelRegistry:
     """Дженерик-класс (Registry) для управления моделями без повторной загрузки."""
+    _factories = {
+        "classifier": SituationClassifier,
+        "detector": MazeDetector,
+        "loop_detector": LoopDetector,
+    }
     _instances = {}
+    _warmed = set()  # ключи моделей, уже прогнанных через warm_up
+    _lock = threading.Lock()
+    # LABYRINTH_QUANTIZE=1 — по умолчанию отдавать int8-варианты для CPU
+    quantized_default = os.environ.get("LABYRINTH_QUANTIZE", "0") == "1"
+
+    @classmethod
+    def get_model(cls, model_key, quantized=None, warm_up=False):
+        """Модель загружается лениво при первом запросе; warm_up — прогон-разогрев"""
+        if model_key not in cls._factories:
+            raise KeyError(f"Неизвестная модель: {model_key}. Доступны: {', '.join(cls._factories)}")
+        if quantized is None:
+            quantized = cls.quantized_default
+
+        key = (model_key, quantized)
+        with cls._lock:
+            if key not in cls._instances:
+                print(f"\n[Registry] Единоразовая загрузка: {model_key}{' (int8)' if quantized else ''}")
+                cls._instances[key] = cls._factories[model_key](quantize=quantized)
+            model = cls._instances[key]
+            # Разогрев и для уже загруженной модели, но не больше одного раза
+            if warm_up and key not in cls._warmed:
+                model.warm_up()
+                cls._warmed.add(key)
+        return model
+
+    @classmethod
+    def warm_up(cls, keys=None, quantized=None):
+        """Загрузить и разогреть модели заранее, чтобы первый кадр не платил за инициализацию"""
+        for model_key in keys or cls._factories:
+            cls.get_model(model_key, quantized, warm_up=True)
 
     @classmethod
-    def get_model(cls, model_key):
-        if model_key not in cls._instances:
-            print(f"\n[Registry] Единоразовая загрузка: {model_key}")
-            if model_key == "classifier":
-                cls._instances[model_key] = SituationClassifier()
-            elif model_key == "detector":
-                cls._instances[model_key] = MazeDetector()
-            elif model_key == "loop_detector":
-                cls._instances[model_key] = LoopDetector()
-        return cls._instances[model_key]
\ No newline at end of file
+    def clear(cls):
+        with cls._lock:
+            cls._instances.clear()
+            cls._warmed.clear()
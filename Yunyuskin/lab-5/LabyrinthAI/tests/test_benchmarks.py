@@ -3,30 +3,130 @@ import numpy as np
 import pytest
 from tests.model_registry import ModelRegistry
 
+BATCH_SIZES = [1, 2, 4, 8, 16, 32]
 
-def run_timer(label, stmt, globals_dict):
+
+def run_timer(label, stmt, globals_dict, sub_label=""):
     timer = benchmark.Timer(
         stmt=stmt,
         globals=globals_dict,
         label=label,
+        sub_label=sub_label,
         description="Inference timing"
     )
     return timer.blocked_autorange(min_run_time=1)
 
 
+def dummy_frames(count):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (128, 128, 3), dtype=np.uint8) for _ in range(count)]
+
+
 def test_inference_benchmarks():
     # Данные для теста (заглушка кадра)
     dummy_frame = np.random.randint(0, 255, (128, 128, 3), dtype=np.uint8)
 
     # Тест Классификатора (ViT)
-    classifier = ModelRegistry.get_model("classifier")
+    classifier = ModelRegistry.get_model("classifier", warm_up=True)
     res_vit = run_timer("ViT Classifier", "model.classify(frame)",
                         {"model": classifier, "frame": dummy_frame})
 
     # Тест Детектора (DETR)
-    detector = ModelRegistry.get_model("detector")
+    detector = ModelRegistry.get_model("detector", warm_up=True)
     res_detr = run_timer("DETR Detector", "model.analyze_frame(frame)",
                          {"model": detector, "frame": dummy_frame})
 
     print(f"\nРезультаты бенчмарка:\n{res_vit}\n{res_detr}")
-    assert res_vit.median < 1  # Пример: инференс не должен быть дольше 0.5 сек
\ No newline at end of file
+    assert res_vit.median < 1  # Пример: инференс не должен быть дольше 0.5 сек
+
+
+@pytest.mark.parametrize("batch_size", BATCH_SIZES)
+def test_classifier_throughput(batch_size):
+    classifier = ModelRegistry.get_model("classifier", warm_up=True)
+    frames = dummy_frames(batch_size)
+
+    # Батч дает тот же ответ, что и покадровая классификация
+    assert classifier.classify_batch(frames) == [classifier.classify(frame) for frame in frames]
+
+    res = run_timer("ViT Classifier", "model.classify_batch(frames)",
+                    {"model": classifier, "frames": frames}, sub_label=f"batch={batch_size}")
+    print(f"\n[BENCHMARK] ViT batch={batch_size}: {batch_size / res.median:.1f} кадров/с")
+
+
+@pytest.mark.parametrize("batch_size", [1, 4])
+def test_detector_throughput(batch_size):
+    detector = ModelRegistry.get_model("detector", warm_up=True)
+    frames = dummy_frames(batch_size)
+
+    detections = detector.analyze_batch(frames)
+    assert len(detections) == batch_size
+
+    res = run_timer("DETR Detector", "model.analyze_batch(frames)",
+                    {"model": detector, "frames": frames}, sub_label=f"batch={batch_size}")
+    print(f"\n[BENCHMARK] DETR batch={batch_size}: {batch_size / res.median:.1f} кадров/с")
+
+
+def test_loop_detector_caches_embeddings():
+    loop_detector = ModelRegistry.get_model("loop_detector")
+    loop_detector.history.clear()
+    actions = ["повернуть налево", "идти вперед"] * 8
+
+    # Счетчик вызовов модели: закешированные фразы повторно не кодируются
+    encoded = []
+    model_encode = loop_detector.model.encode
+
+    def counting_encode(texts, **kwargs):
+        encoded.extend(texts)
+        return model_encode(texts, **kwargs)
+
+    loop_detector.model.encode = counting_encode
+    try:
+        loop_detector._cache.clear()
+        # Повторяющиеся действия — это цикл, а каждая фраза кодируется один раз
+        assert loop_detector.analyze_batch(actions)[-1]
+        assert sorted(encoded) == sorted(set(actions))
+
+        encoded.clear()
+        res = run_timer("Loop Detector", "model.check_loop(text)",
+                        {"model": loop_detector, "text": actions[0]})
+        print(f"\n[BENCHMARK] check_loop с кешем: {1 / res.median:,.0f} вызовов/с")
+        assert encoded == []
+    finally:
+        del loop_detector.model.encode
+
+
+def test_loop_detector_cache_eviction_keeps_requested_texts():
+    loop_detector = ModelRegistry.get_model("loop_detector")
+    cache_size = loop_detector.cache_size
+    loop_detector.cache_size = 2
+    try:
+        loop_detector._cache.clear()
+        loop_detector.encode(["a", "b"])
+        # "a" уже в кеше, "c" вытесняет самую старую фразу — ответ полный
+        embeddings = loop_detector.encode(["a", "c", "d"])
+        assert embeddings.shape[0] == 3
+        assert len(loop_detector._cache) == 2
+    finally:
+        loop_detector.cache_size = cache_size
+        loop_detector._cache.clear()
+
+
+def test_classifier_mixed_frame_sizes():
+    classifier = ModelRegistry.get_model("classifier")
+    rng = np.random.default_rng(1)
+    frames = [rng.integers(0, 255, shape, dtype=np.uint8)
+              for shape in [(128, 128, 3), (64, 96, 3), (128, 128, 3), (80, 80)]]
+    assert classifier.classify_batch(frames) == [classifier.classify(frame) for frame in frames]
+
+
+def test_registry_warms_up_cached_model():
+    classifier = ModelRegistry.get_model("classifier")
+    ModelRegistry._warmed.discard(("classifier", ModelRegistry.quantized_default))
+    calls = []
+    classifier.warm_up = lambda: calls.append(1)
+    try:
+        assert ModelRegistry.get_model("classifier", warm_up=True) is classifier
+        ModelRegistry.get_model("classifier", warm_up=True)
+        assert calls == [1]
+    finally:
+        del classifier.warm_up
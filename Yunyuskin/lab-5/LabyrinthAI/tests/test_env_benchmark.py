@@ -0,0 +1,111 @@
+import timeit
+
+import numpy as np
+from minigrid.core.grid import Grid
+from minigrid.core.world_object import Wall, Goal, Lava
+from agents.training import load_maze_config
+from env.custom_env import CustomMazeEnv, compile_maze
+
+MAZE_LAYOUT = np.array(load_maze_config()['map'])
+ACTIONS = np.random.RandomState(0).randint(0, 3, size=2000)
+
+
+class RebuildingMazeEnv(CustomMazeEnv):
+    """Прежний способ: сетка собирается по клеткам на каждом reset, лава — чтением клетки"""
+
+    def _gen_grid(self, width, height):
+        self.grid = Grid(width, height)
+        self.grid.wall_rect(0, 0, width, height)
+        for y in range(self.maze_layout.shape[0]):
+            for x in range(self.maze_layout.shape[1]):
+                val = self.maze_layout[y, x]
+                if val == 1:
+                    self.grid.set(x + 1, y + 1, Wall())
+                elif val == 2:
+                    self.grid.set(x + 1, y + 1, Lava())
+        self.grid.set(width - 2, height - 2, Goal())
+        start_pos = None
+        for y in range(1, height - 1):
+            for x in range(1, width - 1):
+                if self.grid.get(x, y) is None:
+                    start_pos = (x, y)
+                    break
+            if start_pos is not None:
+                break
+        self.agent_pos = start_pos or (1, 1)
+        self.agent_dir = 0
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = super(CustomMazeEnv, self).step(action)
+        cell = self.grid.get(*self.agent_pos)
+        if cell and cell.type == 'lava':
+            reward = -1.0
+            terminated = True
+        return obs, reward, terminated, truncated, info
+
+
+def rollout(env):
+    """Траектория по фиксированным действиям с reset при завершении эпизода"""
+    trace = []
+    env.reset(seed=0)
+    for action in ACTIONS:
+        obs, reward, terminated, truncated, _ = env.step(int(action))
+        trace.append((tuple(env.agent_pos), reward, terminated, truncated, obs['image'].tobytes()))
+        if terminated or truncated:
+            env.reset()
+    return trace
+
+
+def test_compiled_grid_matches_rebuilt():
+    new_env = CustomMazeEnv(maze_layout=MAZE_LAYOUT, size=13, max_steps=50)
+    old_env = RebuildingMazeEnv(maze_layout=MAZE_LAYOUT, size=13, max_steps=50)
+    new_env.reset(seed=0)
+    old_env.reset(seed=0)
+    assert new_env.agent_pos == old_env.agent_pos
+    assert new_env.grid == old_env.grid
+    assert rollout(new_env) == rollout(old_env)
+
+
+def test_lava_terminates_with_penalty():
+    layout = np.zeros((11, 11), dtype=int)
+    layout[0, 1] = 2  # лава справа от старта (1, 1)
+    env = CustomMazeEnv(maze_layout=layout, size=13, max_steps=50)
+    env.reset(seed=0)
+    _, reward, terminated, _, _ = env.step(env.actions.forward)
+    assert env.agent_pos == (2, 1)
+    assert reward == -1.0 and terminated
+
+
+def test_layout_change_recompiles():
+    env = CustomMazeEnv(maze_layout=MAZE_LAYOUT, size=13, max_steps=50)
+    env.reset(seed=0)
+    layout = np.zeros((11, 11), dtype=int)
+    layout[0, 0] = 1
+    env.maze_layout = layout
+    env.reset(seed=0)
+    assert env.agent_pos == (2, 1)
+    assert env.grid.get(1, 1).type == 'wall'
+
+
+def test_compiled_mazes_share_cell_objects():
+    layout = np.array(MAZE_LAYOUT)
+    other = layout.copy()
+    other[0, 1] = 1 - other[0, 1]
+    first, second = compile_maze(layout, 13, 13), compile_maze(other, 13, 13)
+    # Кеш держит только списки ссылок: объекты стен одни на все сетки
+    cells = [cell for maze in (first, second) for cell in maze.template.grid if cell is not None]
+    assert len({id(cell) for cell in cells}) == len({cell.type for cell in cells})
+
+def test_benchmark_resets_and_steps():
+    print("\n[BENCHMARK] CustomMazeEnv 13x13")
+    for label, env_cls in (("пересборка сетки", RebuildingMazeEnv), ("скомпилированная сетка", CustomMazeEnv)):
+        env = env_cls(maze_layout=MAZE_LAYOUT, size=13, max_steps=200)
+        env.reset(seed=0)
+        reset_time = min(timeit.repeat(env.reset, number=500, repeat=3)) / 500
+        steps = iter(np.tile(ACTIONS, 10))
+        step_time = min(timeit.repeat(lambda: env.step(int(next(steps))), number=2000, repeat=3)) / 2000
+        print(f"  {label}: {1 / reset_time:,.0f} reset/с, {1 / step_time:,.0f} step/с")
+        if env_cls is RebuildingMazeEnv:
+            old_reset = reset_time
+    print(f"  Ускорение reset: x{old_reset / reset_time:.1f}")
+    assert reset_time < old_reset
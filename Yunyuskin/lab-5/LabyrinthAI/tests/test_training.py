@@ -0,0 +1,71 @@
+import glob
+import os
+import time
+
+import numpy as np
+from agents.training import load_maze_config, make_env, train
+from env.custom_env import CustomMazeEnv
+from env.wrappers import ObsFlattener
+
+MAZE_LAYOUT = np.array(load_maze_config()['map'])
+
+
+def flatten_by_keys(obs):
+    """Прежний способ из main.py: обход ключей, проверки типов и concatenate"""
+    flat_obs = []
+    for key in sorted(obs.keys()):
+        if key == 'mission':
+            continue
+        val = obs[key]
+        if isinstance(val, np.ndarray):
+            flat_obs.append(val.flatten())
+        else:
+            flat_obs.append(np.array([float(val)]))
+    return np.concatenate(flat_obs).astype(np.float32)
+
+
+def test_flattener_matches_previous_layout():
+    env = CustomMazeEnv(maze_layout=MAZE_LAYOUT, size=13, max_steps=50)
+    flattener = ObsFlattener(env.observation_space)
+    obs, _ = env.reset(seed=0)
+    for action in [2, 1, 2, 2, 0, 2]:
+        np.testing.assert_array_equal(flattener.flatten(obs), flatten_by_keys(obs))
+        np.testing.assert_array_equal(flattener.batch(obs)[0], flatten_by_keys(obs))
+        obs, *_ = env.step(action)
+    assert flattener.observation_space.shape == (flattener.size,)
+
+
+def test_wrapped_env_returns_fresh_observations():
+    env = make_env(MAZE_LAYOUT, max_steps=50)()
+    first, _ = env.reset(seed=0)
+    second, *_ = env.step(2)
+    # terminal_observation в VecEnv не должна перезаписываться следующим reset
+    assert first is not second
+    assert first.dtype == np.float32 and first.shape == env.observation_space.shape
+
+
+def test_flattener_speed():
+    env = CustomMazeEnv(maze_layout=MAZE_LAYOUT, size=13, max_steps=50)
+    flattener = ObsFlattener(env.observation_space)
+    obs, _ = env.reset(seed=0)
+
+    start = time.perf_counter()
+    for _ in range(20000):
+        flatten_by_keys(obs)
+    old = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(20000):
+        flattener.batch(obs)
+    new = time.perf_counter() - start
+    print(f"\n[Flatten] по ключам: {old * 50:.2f} мкс, раскладка: {new * 50:.2f} мкс, x{old / new:.1f}")
+    assert new < old
+
+
+def test_subproc_training_saves_checkpoints(tmp_path):
+    model, steps_per_second = train(MAZE_LAYOUT, total_timesteps=512, n_envs=2, max_steps=50,
+                                    checkpoint_dir=str(tmp_path), checkpoint_freq=256, verbose=0)
+    print(f"\n[Training] {steps_per_second:.0f} шагов среды/с на 2 воркерах")
+    assert steps_per_second > 0
+    assert os.path.exists(tmp_path / "ppo_labyrinth_13x13.zip")
+    assert glob.glob(str(tmp_path / "ppo_labyrinth_13x13_*_steps.zip"))
+    assert model.observation_space.shape == (148,)
@@ -1,24 +1,44 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, ForeignKey, Boolean, BigInteger, Index, update
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import os
+import asyncio
+import hashlib
+import logging
 from pathlib import Path
+from scheduler import days_to_mask, parse_time, next_fire_time, ReminderDispatcher
+from photos import PhotoTooLarge, photo_extension, store_upload, generate_variants, ImmutableStaticFiles
 
 # Настройки
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Планировщик напоминаний
+BOT_TOKEN = os.getenv("BOT_TOKEN", "")
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "1000"))
+REMINDER_POLL_SECONDS = float(os.getenv("REMINDER_POLL_SECONDS", "5"))
+# Недоставленное напоминание выбирается снова через REMINDER_RETRY_SECONDS * 2^попытка
+REMINDER_RETRY_SECONDS = float(os.getenv("REMINDER_RETRY_SECONDS", "300"))
+REMINDER_MAX_ATTEMPTS = int(os.getenv("REMINDER_MAX_ATTEMPTS", "5"))
+BOT_RATE_PER_SECOND = float(os.getenv("BOT_RATE_PER_SECOND", "25"))
+
+# Фото
+MAX_PHOTO_BYTES = int(os.getenv("MAX_PHOTO_MB", "15")) * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
 # База данных
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/plant_diary")
 engine = create_engine(DATABASE_URL)
@@ -41,13 +61,14 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+    telegram_chat_id = Column(BigInteger, nullable=True)  # Куда доставлять напоминания
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class Plant(Base):
     __tablename__ = "plants"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     name = Column(String, index=True)
     species = Column(String)
     description = Column(Text)
@@ -77,8 +98,11 @@ class PlantPhoto(Base):
     __tablename__ = "plant_photos"
     
     id = Column(Integer, primary_key=True, index=True)
-    plant_id = Column(Integer, ForeignKey("plants.id"))
+    plant_id = Column(Integer, ForeignKey("plants.id"), index=True)
     photo_path = Column(String)
+    content_hash = Column(String(64), index=True)  # SHA-256 оригинала
+    thumbnail_path = Column(String, nullable=True)  # Заполняется фоновой задачей
+    preview_path = Column(String, nullable=True)
     description = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -88,15 +112,21 @@ class Reminder(Base):
     __tablename__ = "reminders"
     
     id = Column(Integer, primary_key=True, index=True)
-    plant_id = Column(Integer, ForeignKey("plants.id"))
+    plant_id = Column(Integer, ForeignKey("plants.id"), index=True)
     reminder_type = Column(String)  # watering, fertilizing, pruning, etc.
     times_per_day = Column(Integer, default=1)  # Количество раз в день
     reminder_time = Column(String)  # Время в формате HH:MM
     days_of_week = Column(String)  # Дни недели через запятую (0-6, где 0=понедельник)
+    days_mask = Column(Integer, default=0)  # Те же дни битовой маской: бит i = день i
+    next_fire_at = Column(DateTime, nullable=True)  # Ближайшее срабатывание (UTC)
+    delivery_attempts = Column(Integer, default=0)  # Попытки доставки текущего срабатывания
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     plant = relationship("Plant", back_populates="reminders")
+    
+    # Планировщик выбирает сработавшие напоминания по индексу, без сканирования таблицы
+    __table_args__ = (Index("ix_reminders_due", "is_active", "next_fire_at"),)
 
 # Создание таблиц
 # Удаляем старые таблицы и создаем заново (для разработки)
@@ -173,6 +203,9 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+class TelegramLink(BaseModel):
+    chat_id: int
+
 # FastAPI приложение
 app = FastAPI(title="Дневник растений", version="1.0.0")
 
@@ -188,6 +221,10 @@ app.add_middleware(
 # Статические файлы для фото
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+# Оригиналы и миниатюры хранятся по хэшу содержимого, поэтому отдаются с вечным кэшем
+PHOTOS_DIR = UPLOAD_DIR / "photos"
+PHOTOS_DIR.mkdir(exist_ok=True)
+app.mount("/uploads/photos", ImmutableStaticFiles(directory=str(PHOTOS_DIR)), name="photos")
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 # Утилиты
@@ -268,6 +305,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
+@app.put("/users/me/telegram")
+def link_telegram(link: TelegramLink, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Чат, в который планировщик будет присылать напоминания пользователя
+    current_user.telegram_chat_id = link.chat_id
+    db.commit()
+    return {"message": "Telegram linked"}
+
 # Растения
 @app.post("/plants", response_model=PlantResponse)
 def create_plant(plant: PlantCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -321,28 +365,75 @@ def get_entries(plant_id: int, current_user: User = Depends(get_current_user), d
     return entries
 
 # Фото
+def build_photo_variants(content_hash: str, filename: str):
+    """Фоновая генерация миниатюр и запись их путей во все фото с этим хэшем"""
+    try:
+        variants = generate_variants(PHOTOS_DIR / filename, content_hash)
+    except Exception as e:
+        logger.error(f"Thumbnail generation failed for {filename}: {e}")
+        return
+    db = SessionLocal()
+    try:
+        db.query(PlantPhoto).filter(PlantPhoto.content_hash == content_hash).update({
+            PlantPhoto.thumbnail_path: f"/uploads/photos/{variants['thumb']}",
+            PlantPhoto.preview_path: f"/uploads/photos/{variants['preview']}"
+        })
+        db.commit()
+    finally:
+        db.close()
+
+def photo_to_dict(photo: PlantPhoto) -> dict:
+    return {
+        "id": photo.id,
+        "photo_path": photo.photo_path,
+        "thumbnail_path": photo.thumbnail_path,
+        "preview_path": photo.preview_path,
+        "description": photo.description,
+        "created_at": photo.created_at
+    }
+
 @app.post("/plants/{plant_id}/photos")
-async def upload_photo(plant_id: int, file: UploadFile = File(...), description: Optional[str] = None, 
+async def upload_photo(plant_id: int, background_tasks: BackgroundTasks, file: UploadFile = File(...), description: Optional[str] = None, 
                        current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     plant = db.query(Plant).filter(Plant.id == plant_id, Plant.user_id == current_user.id).first()
     if not plant:
         raise HTTPException(status_code=404, detail="Plant not found")
     
-    # Сохранение файла
-    file_ext = file.filename.split(".")[-1]
-    filename = f"{plant_id}_{datetime.now().timestamp()}.{file_ext}"
-    file_path = UPLOAD_DIR / filename
+    # Потоковое сохранение кусками в пуле потоков, без чтения файла целиком в память
+    try:
+        content_hash, filename, _ = await run_in_threadpool(
+            store_upload, file.file, PHOTOS_DIR, photo_extension(file.filename), MAX_PHOTO_BYTES
+        )
+    except PhotoTooLarge:
+        raise HTTPException(status_code=413, detail="Photo is too large")
     
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Повторная загрузка того же фото для того же растения не создает дубликат
+    db_photo = db.query(PlantPhoto).filter(
+        PlantPhoto.plant_id == plant_id,
+        PlantPhoto.content_hash == content_hash
+    ).first()
+    if db_photo is None:
+        # Миниатюры могли уже быть построены для такого же файла у другого растения
+        known = db.query(PlantPhoto).filter(
+            PlantPhoto.content_hash == content_hash,
+            PlantPhoto.thumbnail_path.isnot(None)
+        ).first()
+        db_photo = PlantPhoto(
+            plant_id=plant_id,
+            photo_path=f"/uploads/photos/{filename}",
+            content_hash=content_hash,
+            thumbnail_path=known.thumbnail_path if known else None,
+            preview_path=known.preview_path if known else None,
+            description=description
+        )
+        db.add(db_photo)
+        db.commit()
+        db.refresh(db_photo)
     
-    db_photo = PlantPhoto(plant_id=plant_id, photo_path=f"/uploads/{filename}", description=description)
-    db.add(db_photo)
-    db.commit()
-    db.refresh(db_photo)
+    if db_photo.thumbnail_path is None:
+        background_tasks.add_task(build_photo_variants, content_hash, filename)
     
-    return {"id": db_photo.id, "photo_path": db_photo.photo_path, "description": db_photo.description}
+    return photo_to_dict(db_photo)
 
 @app.get("/plants/{plant_id}/photos")
 def get_photos(plant_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -351,7 +442,36 @@ def get_photos(plant_id: int, current_user: User = Depends(get_current_user), db
         raise HTTPException(status_code=404, detail="Plant not found")
     
     photos = db.query(PlantPhoto).filter(PlantPhoto.plant_id == plant_id).order_by(PlantPhoto.created_at.desc()).all()
-    return [{"id": p.id, "photo_path": p.photo_path, "description": p.description, "created_at": p.created_at} for p in photos]
+    return [photo_to_dict(p) for p in photos]
+
+@app.get("/plants/{plant_id}/photos/timeline")
+def get_photo_timeline(plant_id: int, request: Request, response: Response,
+                       current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    plant = db.query(Plant).filter(Plant.id == plant_id, Plant.user_id == current_user.id).first()
+    if not plant:
+        raise HTTPException(status_code=404, detail="Plant not found")
+    
+    photos = db.query(
+        PlantPhoto.id, PlantPhoto.created_at, PlantPhoto.description,
+        PlantPhoto.photo_path, PlantPhoto.thumbnail_path, PlantPhoto.preview_path
+    ).filter(PlantPhoto.plant_id == plant_id).order_by(PlantPhoto.created_at).all()
+    
+    # ETag меняется при добавлении фото и при появлении миниатюр
+    etag = '"%s"' % hashlib.sha1(repr([(p.id, p.thumbnail_path) for p in photos]).encode()).hexdigest()
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
+    # Пока миниатюра не готова, клиенту отдается оригинал
+    return [{
+        "id": p.id,
+        "created_at": p.created_at,
+        "description": p.description,
+        "thumbnail_url": p.thumbnail_path or p.photo_path,
+        "preview_url": p.preview_path or p.photo_path,
+        "original_url": p.photo_path
+    } for p in photos]
 
 # Напоминания
 @app.post("/plants/{plant_id}/reminders", response_model=ReminderResponse)
@@ -360,12 +480,20 @@ def create_reminder(plant_id: int, reminder: ReminderCreate, current_user: User
     if not plant:
         raise HTTPException(status_code=404, detail="Plant not found")
     
+    try:
+        days_mask = days_to_mask(reminder.days_of_week)
+        parse_time(reminder.reminder_time)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid reminder_time or days_of_week")
+    
     db_reminder = Reminder(
         plant_id=plant_id,
         reminder_type=reminder.reminder_type,
         times_per_day=reminder.times_per_day,
         reminder_time=reminder.reminder_time,
-        days_of_week=reminder.days_of_week
+        days_of_week=reminder.days_of_week,
+        days_mask=days_mask,
+        next_fire_at=next_fire_time(reminder.reminder_time, reminder.times_per_day, days_mask, datetime.utcnow())
     )
     db.add(db_reminder)
     db.commit()
@@ -397,31 +525,24 @@ def delete_reminder(reminder_id: int, current_user: User = Depends(get_current_u
 
 @app.get("/reminders/upcoming")
 def get_upcoming_reminders(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    plants = db.query(Plant).filter(Plant.user_id == current_user.id).all()
-    plant_ids = [p.id for p in plants]
-    
-    reminders = db.query(Reminder).filter(
-        Reminder.plant_id.in_(plant_ids),
-        Reminder.is_active == True
-    ).all()
-    
-    result = []
-    now = datetime.utcnow()
-    current_weekday = now.weekday()  # 0=Monday, 6=Sunday
-    
-    for rem in reminders:
-        days_list = [int(d) for d in rem.days_of_week.split(",")]
-        if current_weekday in days_list:
-            plant = db.query(Plant).filter(Plant.id == rem.plant_id).first()
-            result.append({
-                "id": rem.id,
-                "plant_name": plant.name,
-                "reminder_type": rem.reminder_type,
-                "reminder_time": rem.reminder_time,
-                "times_per_day": rem.times_per_day
-            })
+    current_weekday = datetime.utcnow().weekday()  # 0=Monday, 6=Sunday
+    
+    # Один запрос с JOIN вместо запроса растения на каждое напоминание;
+    # день недели проверяется по битовой маске на стороне БД
+    rows = db.query(Reminder, Plant.name).join(Plant, Reminder.plant_id == Plant.id).filter(
+        Plant.user_id == current_user.id,
+        Reminder.is_active == True,
+        Reminder.days_mask.op("&")(1 << current_weekday) != 0
+    ).order_by(Reminder.reminder_time).all()
     
-    return result
+    return [{
+        "id": rem.id,
+        "plant_name": plant_name,
+        "reminder_type": rem.reminder_type,
+        "reminder_time": rem.reminder_time,
+        "times_per_day": rem.times_per_day,
+        "next_fire_at": rem.next_fire_at
+    } for rem, plant_name in rows]
 
 @app.post("/reminders/{reminder_id}/complete")
 def complete_reminder(reminder_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -436,6 +557,105 @@ def complete_reminder(reminder_id: int, current_user: User = Depends(get_current
     # Напоминание просто остается активным, выполнение отмечается в записях дневника
     return {"message": "Reminder completed"}
 
+# Планировщик: выбирает сработавшие напоминания по индексу (is_active, next_fire_at)
+# и передает пачки диспетчеру доставки. next_fire_at сдвигается к следующему срабатыванию
+# только после доставки, а до нее служит арендой: недоставленное напоминание снова
+# станет сработавшим через REMINDER_RETRY_SECONDS (с удвоением на каждую попытку)
+def complete_reminder_delivery(reminder_ids: List[int]):
+    """Доставленные напоминания — к следующему срабатыванию, счетчик попыток сбрасывается"""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        rows = db.query(
+            Reminder.id, Reminder.reminder_time, Reminder.times_per_day, Reminder.days_mask
+        ).filter(Reminder.id.in_(reminder_ids), Reminder.delivery_attempts > 0).all()
+        if rows:
+            db.execute(update(Reminder), [
+                {"id": row.id, "delivery_attempts": 0,
+                 "next_fire_at": next_fire_time(row.reminder_time, row.times_per_day, row.days_mask, now)}
+                for row in rows
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+async def on_reminders_delivered(reminder_ids: List[int]):
+    await run_in_threadpool(complete_reminder_delivery, reminder_ids)
+
+# Пачки ждут в очереди, пока не истекла аренда: очередь короткая, лимит скорости все равно у Bot API
+dispatcher = ReminderDispatcher(BOT_TOKEN, max_batches=2, rate=BOT_RATE_PER_SECOND,
+                                on_delivered=on_reminders_delivered)
+
+def claim_due_reminders(limit: int = REMINDER_BATCH_SIZE) -> Tuple[int, List[dict]]:
+    """
+    Выбрать сработавшие напоминания и взять их в аренду.
+
+    Returns:
+        Сколько напоминаний выбрано и пачка для доставки (без чата или
+        с исчерпанными попытками напоминания сразу переходят к следующему срабатыванию)
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        # SKIP LOCKED позволяет запускать несколько экземпляров backend без двойной доставки
+        rows = db.query(
+            Reminder.id, Reminder.reminder_type, Reminder.reminder_time, Reminder.times_per_day,
+            Reminder.days_mask, Reminder.delivery_attempts, Plant.name, User.telegram_chat_id
+        ).join(Plant, Reminder.plant_id == Plant.id).join(User, Plant.user_id == User.id).filter(
+            Reminder.is_active == True,
+            Reminder.next_fire_at <= now
+        ).order_by(Reminder.next_fire_at).limit(limit).with_for_update(of=Reminder, skip_locked=True).all()
+        
+        if not rows:
+            return 0, []
+        
+        updates, batch = [], []
+        for row in rows:
+            attempts = row.delivery_attempts or 0
+            if not row.telegram_chat_id or attempts >= REMINDER_MAX_ATTEMPTS:
+                if attempts >= REMINDER_MAX_ATTEMPTS:
+                    logger.warning(f"Reminder {row.id} not delivered after {attempts} attempts, skipped")
+                # Пропущенные срабатывания не догоняем — следующее считается от now
+                updates.append({"id": row.id, "delivery_attempts": 0,
+                                "next_fire_at": next_fire_time(row.reminder_time, row.times_per_day, row.days_mask, now)})
+                continue
+            updates.append({"id": row.id, "delivery_attempts": attempts + 1,
+                            "next_fire_at": now + timedelta(seconds=REMINDER_RETRY_SECONDS * 2 ** attempts)})
+            batch.append({
+                "id": row.id,
+                "chat_id": row.telegram_chat_id,
+                "plant_name": row.name,
+                "reminder_type": row.reminder_type
+            })
+        db.execute(update(Reminder), updates)
+        db.commit()
+        return len(rows), batch
+    finally:
+        db.close()
+
+async def reminder_scheduler_loop():
+    while True:
+        try:
+            # Выбираем пачки, пока очередь сработавших не опустеет
+            while True:
+                claimed, batch = await run_in_threadpool(claim_due_reminders, REMINDER_BATCH_SIZE)
+                await dispatcher.put(batch)
+                if claimed < REMINDER_BATCH_SIZE:
+                    break
+        except Exception as e:
+            logger.error(f"Reminder scheduler error: {e}")
+        await asyncio.sleep(REMINDER_POLL_SECONDS)
+
+@app.on_event("startup")
+async def start_scheduler():
+    dispatcher.start()
+    app.state.scheduler_task = asyncio.create_task(reminder_scheduler_loop())
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    app.state.scheduler_task.cancel()
+    await dispatcher.stop()
+
 @app.get("/")
 def root():
     return {"message": "Дневник растений API", "version": "1.0.0"}
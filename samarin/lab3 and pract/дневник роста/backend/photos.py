@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+from fastapi.staticfiles import StaticFiles
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # 1 МБ
+# Размеры производных изображений: имя -> максимальная сторона
+PHOTO_SIZES: Dict[str, int] = {
+    "thumb": 320,
+    "preview": 1280,
+}
+ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif", "bmp"}
+
+
+class PhotoTooLarge(Exception):
+    pass
+
+
+def photo_extension(filename: Optional[str]) -> str:
+    """Расширение файла в нижнем регистре (jpg, если не удалось определить)"""
+    if filename and "." in filename:
+        ext = filename.rsplit(".", 1)[-1].lower()
+        if ext in ALLOWED_EXTENSIONS:
+            return ext
+    return "jpg"
+
+
+def variant_name(content_hash: str, size_name: str) -> str:
+    return f"{content_hash}_{size_name}.webp"
+
+
+def store_upload(source: BinaryIO, photos_dir: Path, ext: str, max_bytes: int) -> Tuple[str, str, bool]:
+    """
+    Потоково сохранить загрузку на диск, считая SHA-256 по ходу записи.
+    Вызывается в пуле потоков: все чтения и записи блокирующие.
+
+    Args:
+        source: Файловый объект загрузки (UploadFile.file)
+        photos_dir: Каталог оригиналов
+        ext: Расширение оригинала
+        max_bytes: Максимальный размер файла
+
+    Returns:
+        (хэш содержимого, имя файла оригинала, был ли такой файл уже на диске)
+    """
+    photos_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=photos_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise PhotoTooLarge()
+                digest.update(chunk)
+                buffer.write(chunk)
+
+        content_hash = digest.hexdigest()
+        filename = f"{content_hash}.{ext}"
+        target = photos_dir / filename
+        if target.exists():
+            # Такое фото уже загружено — второй копии на диске не держим
+            os.remove(tmp_path)
+            return content_hash, filename, True
+        os.replace(tmp_path, target)
+        return content_hash, filename, False
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def generate_variants(original: Path, content_hash: str) -> Dict[str, str]:
+    """
+    Построить WebP-миниатюры рядом с оригиналом (уже готовые пропускаются).
+
+    Returns:
+        Имя размера -> имя файла
+    """
+    result = {}
+    missing = {}
+    for size_name, max_side in PHOTO_SIZES.items():
+        name = variant_name(content_hash, size_name)
+        result[size_name] = name
+        if not (original.parent / name).exists():
+            missing[size_name] = max_side
+    if not missing:
+        return result
+
+    with Image.open(original) as image:
+        # Телефоны пишут поворот в EXIF, миниатюры сохраняем уже повернутыми
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        # От большего размера к меньшему: каждый следующий уменьшается из предыдущего
+        for size_name, max_side in sorted(missing.items(), key=lambda item: -item[1]):
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            tmp = original.parent / f"{variant_name(content_hash, size_name)}.part"
+            image.save(tmp, "WEBP", quality=80, method=4)
+            os.replace(tmp, original.parent / variant_name(content_hash, size_name))
+    return result
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Статика с именами по хэшу содержимого: файл никогда не меняется, кэшируем навсегда"""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
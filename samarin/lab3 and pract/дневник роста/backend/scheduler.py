@@ -0,0 +1,275 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+DAY_NAMES = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+REMINDER_TYPE_NAMES = {
+    "watering": "💧 Полив",
+    "fertilizing": "🌿 Удобрение",
+    "pruning": "✂️ Обрезка",
+}
+
+
+# Расписание
+def days_to_mask(days_of_week: str) -> int:
+    """
+    Преобразовать дни недели из CSV в битовую маску.
+
+    Args:
+        days_of_week: Строка вида "0,2,4" (0=понедельник, 6=воскресенье)
+
+    Returns:
+        Маска, в которой бит i установлен, если напоминание срабатывает в день i
+    """
+    mask = 0
+    for part in days_of_week.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        day = int(part)
+        if not 0 <= day <= 6:
+            raise ValueError(f"Некорректный день недели: {day}")
+        mask |= 1 << day
+    return mask
+
+
+def parse_time(reminder_time: str) -> int:
+    """Время "HH:MM" -> минуты от начала суток"""
+    hours, minutes = reminder_time.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+        raise ValueError(f"Некорректное время: {reminder_time}")
+    return hours * 60 + minutes
+
+
+def fire_slots(reminder_time: str, times_per_day: int) -> List[int]:
+    """
+    Моменты срабатывания внутри суток (в минутах).
+    Первое — в reminder_time, остальные равномерно распределены по суткам.
+    """
+    start = parse_time(reminder_time)
+    count = max(1, times_per_day or 1)
+    step = MINUTES_PER_DAY // count
+    return sorted({(start + k * step) % MINUTES_PER_DAY for k in range(count)})
+
+
+def next_fire_time(reminder_time: str, times_per_day: int, days_mask: int, after: datetime) -> Optional[datetime]:
+    """
+    Ближайший момент срабатывания строго после after (UTC).
+
+    Args:
+        reminder_time: Время первого срабатывания "HH:MM"
+        times_per_day: Количество срабатываний в сутки
+        days_mask: Битовая маска дней недели
+        after: Момент, после которого ищется срабатывание
+
+    Returns:
+        Время срабатывания или None, если не выбран ни один день
+    """
+    if not days_mask:
+        return None
+    slots = fire_slots(reminder_time, times_per_day)
+    midnight = after.replace(hour=0, minute=0, second=0, microsecond=0)
+    # Достаточно просмотреть 8 суток: сегодняшние оставшиеся слоты + неделя вперед
+    for offset in range(8):
+        day = midnight + timedelta(days=offset)
+        if not days_mask & (1 << day.weekday()):
+            continue
+        for minutes in slots:
+            fire_at = day + timedelta(minutes=minutes)
+            if fire_at > after:
+                return fire_at
+    return None
+
+
+# Доставка
+class RateLimiter:
+    """
+    Общий для всех чатов лимит отправки: не чаще rate сообщений в секунду
+    (Bot API отвечает 429 примерно после 30 сообщений в секунду).
+    pause() откладывает все отправки, например на retry_after из ответа 429.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        while True:
+            async with self._lock:
+                now = asyncio.get_running_loop().time()
+                if self._next <= now:
+                    self._next = now + self.interval
+                    return
+                wait = self._next - now
+            # После сна проверяем заново: за это время могла прийти пауза
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        now = asyncio.get_running_loop().time()
+        self._next = max(self._next, now + seconds)
+
+
+class ReminderDispatcher:
+    """
+    Очередь доставки сработавших напоминаний в Telegram.
+    Планировщик кладет в очередь пачки, диспетчер группирует их по чатам
+    (одно сообщение на пользователя за пачку) и отправляет через Bot API
+    с общим лимитом скорости. Очередь ограничена, поэтому при отставании доставки
+    планировщик притормаживает, а не копит память.
+    id доставленных напоминаний передаются в on_delivered; недоставленные
+    остаются за планировщиком, который выберет их снова.
+    """
+
+    def __init__(self, bot_token: Optional[str], concurrency: int = 20, max_batches: int = 100,
+                 api_url: str = "https://api.telegram.org", rate: float = 25.0, max_retries: int = 3,
+                 retry_delay: float = 1.0,
+                 on_delivered: Optional[Callable[[List[int]], Awaitable[None]]] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.bot_token = bot_token
+        self.api_url = api_url.rstrip("/")
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_batches)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._limiter = RateLimiter(rate)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.on_delivered = on_delivered
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.failed = 0
+        self.throttled = 0
+
+    def start(self):
+        if self._task is None:
+            self._client = httpx.AsyncClient(timeout=10.0, transport=self._transport)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """
+        Дождаться доставки поставленных пачек (не дольше drain_timeout) и остановиться.
+        Что не успело уйти, планировщик выберет снова после перезапуска.
+        """
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Reminder queue not drained, batches left: {self.queue.qsize()}")
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def put(self, batch: List[dict]):
+        """Поставить пачку сработавших напоминаний в очередь доставки"""
+        if batch:
+            await self.queue.put(batch)
+
+    @staticmethod
+    def group_by_chat(batch: List[dict]) -> Dict[int, List[dict]]:
+        grouped = defaultdict(list)
+        for item in batch:
+            if item.get("chat_id"):
+                grouped[item["chat_id"]].append(item)
+        return grouped
+
+    @staticmethod
+    def format_message(items: List[dict]) -> str:
+        text = "🔔 Пора ухаживать за растениями:\n"
+        for item in items:
+            rem_type = REMINDER_TYPE_NAMES.get(item["reminder_type"], item["reminder_type"])
+            text += f"🌱 {item['plant_name']}: {rem_type}\n"
+        return text
+
+    @staticmethod
+    def retry_after(response: httpx.Response) -> float:
+        """Сколько ждать после 429: parameters.retry_after из ответа Bot API"""
+        try:
+            return float(response.json()["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return float(response.headers.get("Retry-After", 1))
+
+    async def _send(self, chat_id: int, text: str) -> bool:
+        """
+        Отправить сообщение в чат.
+        429 приостанавливает все отправки на retry_after, сетевые ошибки и 5xx
+        повторяются с экспоненциальной задержкой, но не больше max_retries раз.
+
+        Returns:
+            False, если сообщение стоит отправить позже; True — доставлено
+            или повторять бессмысленно (бот заблокирован, чат не найден)
+        """
+        delay = self.retry_delay
+        async with self._semaphore:
+            for _ in range(self.max_retries + 1):
+                await self._limiter.acquire()
+                try:
+                    response = await self._client.post(
+                        f"{self.api_url}/bot{self.bot_token}/sendMessage",
+                        json={"chat_id": chat_id, "text": text},
+                    )
+                except httpx.HTTPError as e:
+                    error = str(e)
+                else:
+                    if response.status_code == 200:
+                        self.sent += 1
+                        return True
+                    if response.status_code == 429:
+                        self.throttled += 1
+                        error = "429 Too Many Requests"
+                        self._limiter.pause(self.retry_after(response))
+                        continue
+                    if response.status_code < 500:
+                        self.failed += 1
+                        logger.warning(f"Reminder delivery to {chat_id} failed: {response.status_code}")
+                        return True
+                    error = str(response.status_code)
+                await asyncio.sleep(delay)
+                delay *= 2
+        self.failed += 1
+        logger.warning(f"Reminder delivery to {chat_id} postponed: {error}")
+        return False
+
+    async def dispatch(self, batch: List[dict]) -> List[int]:
+        """
+        Отправить одну пачку: по сообщению на чат, чаты — параллельно.
+
+        Returns:
+            id напоминаний, с которыми доставка завершена (включая пропущенные
+            без BOT_TOKEN или без чата); остальные нужно отправить позже
+        """
+        grouped = self.group_by_chat(batch)
+        if not self.bot_token:
+            logger.info(f"BOT_TOKEN не задан, пропущено уведомлений: {len(grouped)}")
+            return [item["id"] for item in batch]
+        chat_ids = list(grouped)
+        results = await asyncio.gather(*(self._send(chat_id, self.format_message(grouped[chat_id]))
+                                         for chat_id in chat_ids))
+        postponed = {chat_id for chat_id, delivered in zip(chat_ids, results) if not delivered}
+        return [item["id"] for item in batch if item.get("chat_id") not in postponed]
+
+    async def _run(self):
+        while True:
+            batch = await self.queue.get()
+            try:
+                delivered = await self.dispatch(batch)
+                if delivered and self.on_delivered is not None:
+                    await self.on_delivered(delivered)
+            except Exception as e:
+                logger.error(f"Reminder dispatch error: {e}")
+            finally:
+                self.queue.task_done()
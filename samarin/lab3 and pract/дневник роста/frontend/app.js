@@ -352,7 +352,9 @@ function displayPhotos(photos) {
     
     container.innerHTML = photos.map(photo => `
         <div class="photo-item">
-            <img src="${photo.photo_path}" alt="${photo.description || ''}">
+            <a href="${photo.photo_path}" target="_blank">
+                <img src="${photo.thumbnail_path || photo.photo_path}" alt="${photo.description || ''}" loading="lazy">
+            </a>
             ${photo.description ? `<div class="description">${photo.description}</div>` : ''}
         </div>
     `).join('');
@@ -0,0 +1,122 @@
+# app/api_client.py
+
+import asyncio
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class BackendClient:
+    """
+    Общий асинхронный клиент к API дневника растений.
+    Одно пулированное соединение (keep-alive) на весь бот вместо блокирующих
+    requests в каждом обработчике; GET-ответы можно кэшировать на пользователя
+    с коротким TTL, любая успешная запись пользователя сбрасывает его кэш.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token_provider: Callable[[int], Optional[str]],
+        timeout: float = 10.0,
+        cache_ttl: float = 30.0,
+        max_connections: int = 50,
+    ):
+        """
+        Args:
+            base_url: Адрес backend API
+            token_provider: Функция user_id -> токен доступа (или None)
+            timeout: Таймаут запроса по умолчанию, сек
+            cache_ttl: Время жизни закэшированных ответов, сек
+            max_connections: Размер пула соединений
+        """
+        self.base_url = base_url.rstrip("/")
+        self.token_provider = token_provider
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        # user_id -> {path: (время получения, ответ)}
+        self._cache: Dict[int, Dict[str, Tuple[float, httpx.Response]]] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Создаем лениво, уже внутри цикла событий бота
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+            )
+        return self._client
+
+    def headers(self, user_id: Optional[int]) -> Dict[str, str]:
+        """Заголовки с токеном пользователя"""
+        token = self.token_provider(user_id) if user_id is not None else None
+        if token:
+            return {"Authorization": f"Bearer {token}"}
+        return {}
+
+    def invalidate(self, user_id: int):
+        """Сбросить кэш пользователя (после записи, входа или выхода)"""
+        self._cache.pop(user_id, None)
+
+    async def request(self, method: str, path: str, user_id: Optional[int] = None, **kwargs) -> httpx.Response:
+        """
+        Выполнить запрос к API от имени пользователя.
+
+        Args:
+            method: HTTP метод
+            path: Путь относительно base_url
+            user_id: Telegram ID пользователя (для токена и кэша)
+            **kwargs: Параметры httpx (json, data, files, timeout...)
+
+        Returns:
+            Ответ сервера
+        """
+        headers = {**self.headers(user_id), **kwargs.pop("headers", {})}
+        response = await self.client.request(method, path, headers=headers, **kwargs)
+        if user_id is not None:
+            if response.status_code == 401:
+                self.invalidate(user_id)
+            elif method.upper() != "GET" and response.status_code < 400:
+                self.invalidate(user_id)
+        return response
+
+    async def get(self, path: str, user_id: Optional[int] = None, cache: bool = False, **kwargs) -> httpx.Response:
+        """
+        GET-запрос; при cache=True успешный ответ переиспользуется cache_ttl секунд.
+        """
+        if cache and user_id is not None:
+            cached = self._cache.get(user_id, {}).get(path)
+            if cached and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[1]
+
+        response = await self.request("GET", path, user_id, **kwargs)
+        if cache and user_id is not None and response.status_code == 200:
+            self._cache.setdefault(user_id, {})[path] = (time.monotonic(), response)
+        return response
+
+    async def get_many(self, paths: List[str], user_id: Optional[int] = None, cache: bool = False) -> List[httpx.Response]:
+        """Параллельно выполнить несколько GET-запросов (порядок ответов = порядок путей)"""
+        return await asyncio.gather(*(self.get(path, user_id, cache=cache) for path in paths))
+
+    async def post(self, path: str, user_id: Optional[int] = None, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, user_id, **kwargs)
+
+    async def delete(self, path: str, user_id: Optional[int] = None, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", path, user_id, **kwargs)
+
+    async def close(self):
+        """Закрыть пул соединений"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._cache.clear()
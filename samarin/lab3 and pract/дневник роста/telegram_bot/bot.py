@@ -2,7 +2,8 @@
 
 import os
 import logging
-import requests
+import asyncio
+import httpx
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import (
     Application,
@@ -14,6 +15,7 @@ from telegram.ext import (
 )
 from typing import Dict, Optional
 from datetime import datetime
+from api_client import BackendClient
 
 # Настройки
 API_URL = os.getenv("API_URL", "http://backend:8000")
@@ -35,12 +37,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def get_headers(user_id: int) -> Dict[str, str]:
-    """Получить заголовки с токеном для API запросов"""
-    token = user_tokens.get(user_id)
-    if token:
-        return {"Authorization": f"Bearer {token}"}
-    return {}
+# Общий пул соединений к backend; списки и карточки растений кэшируются на CACHE_TTL секунд
+CACHE_TTL = float(os.getenv("API_CACHE_TTL", "30"))
+api = BackendClient(API_URL, token_provider=user_tokens.get, cache_ttl=CACHE_TTL)
 
 def is_admin(user_id: int) -> bool:
     """Проверить, является ли пользователь администратором"""
@@ -125,6 +124,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if data == "logout":
         if user_id in user_tokens:
             del user_tokens[user_id]
+        api.invalidate(user_id)
         await query.edit_message_text("Вы вышли из системы.")
         await start(update, context)
         return
@@ -289,10 +289,17 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "password": password
         }
         try:
-            response = requests.post(f"{API_URL}/token", data=form_data, timeout=10)
+            response = await api.post("/token", data=form_data)
             if response.status_code == 200:
                 data = response.json()
                 user_tokens[user_id] = data["access_token"]
+                api.invalidate(user_id)
+                # Привязываем чат, чтобы backend присылал сюда сработавшие напоминания
+                link_response = await api.request(
+                    "PUT", "/users/me/telegram", user_id, json={"chat_id": update.effective_chat.id}
+                )
+                if link_response.status_code != 200:
+                    logger.warning(f"Telegram link failed: {link_response.status_code}")
                 await update.message.reply_text("✅ Вы успешно вошли!")
                 context.user_data.clear()
                 await start(update, context)
@@ -308,7 +315,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 error_msg = response.json().get("detail", "Неверное имя пользователя или пароль")
                 await update.message.reply_text(f"❌ {error_msg}")
                 context.user_data.clear()
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             await update.message.reply_text("❌ Превышено время ожидания. Попробуйте позже.")
         except Exception as e:
             logger.error(f"Login error: {e}")
@@ -335,11 +342,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         email = context.user_data.get("reg_email")
         password = text
         try:
-            response = requests.post(
-                f"{API_URL}/register",
-                json={"username": username, "email": email, "password": password},
-                headers={"Content-Type": "application/json"},
-                timeout=10
+            response = await api.post(
+                "/register",
+                json={"username": username, "email": email, "password": password}
             )
             if response.status_code == 200:
                 await update.message.reply_text("✅ Регистрация успешна! Теперь войдите в систему.")
@@ -363,7 +368,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 error = response.json().get("detail", "Ошибка регистрации")
                 await update.message.reply_text(f"❌ {error}")
                 context.user_data.clear()
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             await update.message.reply_text("❌ Превышено время ожидания. Попробуйте позже.")
         except Exception as e:
             logger.error(f"Register error: {e}")
@@ -459,10 +464,10 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             import io
             files = {"file": ("photo.jpg", io.BytesIO(photo_bytes), "image/jpeg")}
-            response = requests.post(
-                f"{API_URL}/plants/{plant_id}/photos",
+            response = await api.post(
+                f"/plants/{plant_id}/photos",
+                user_id,
                 files=files,
-                headers=get_headers(user_id),
                 timeout=30
             )
             if response.status_code == 200:
@@ -487,7 +492,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
             else:
                 error_msg = response.json().get("detail", "Ошибка при загрузке фото")
                 await update.message.reply_text(f"❌ {error_msg}")
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             await update.message.reply_text("❌ Превышено время ожидания при загрузке фото.")
         except Exception as e:
             logger.error(f"Photo upload error: {e}")
@@ -505,7 +510,7 @@ async def show_plants(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     try:
-        response = requests.get(f"{API_URL}/plants", headers=get_headers(user_id), timeout=10)
+        response = await api.get("/plants", user_id, cache=True)
         if response.status_code == 200:
             plants = response.json()
             if not plants:
@@ -556,7 +561,7 @@ async def show_plants(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await update.callback_query.edit_message_text(message_text)
             elif update.message:
                 await update.message.reply_text(message_text)
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         message_text = "❌ Превышено время ожидания. Попробуйте позже."
         if update.callback_query:
             await update.callback_query.edit_message_text(message_text)
@@ -641,10 +646,10 @@ async def save_plant(update: Update, context: ContextTypes.DEFAULT_TYPE):
     description = context.user_data.get("plant_description")
 
     try:
-        response = requests.post(
-            f"{API_URL}/plants",
-            json={"name": name, "species": species, "description": description},
-            headers={**get_headers(user_id), "Content-Type": "application/json"}
+        response = await api.post(
+            "/plants",
+            user_id,
+            json={"name": name, "species": species, "description": description}
         )
         if response.status_code == 200:
             await update.callback_query.edit_message_text("✅ Растение добавлено!")
@@ -670,10 +675,10 @@ async def save_plant_from_message(update: Update, context: ContextTypes.DEFAULT_
     description = context.user_data.get("plant_description")
 
     try:
-        response = requests.post(
-            f"{API_URL}/plants",
-            json={"name": name, "species": species, "description": description},
-            headers={**get_headers(user_id), "Content-Type": "application/json"}
+        response = await api.post(
+            "/plants",
+            user_id,
+            json={"name": name, "species": species, "description": description}
         )
         if response.status_code == 200:
             await update.message.reply_text("✅ Растение добавлено!")
@@ -696,9 +701,12 @@ async def show_plant_detail(update: Update, context: ContextTypes.DEFAULT_TYPE,
     """Показать детали растения"""
     user_id = update.effective_user.id
     try:
-        plant_response = requests.get(
-            f"{API_URL}/plants/{plant_id}",
-            headers=get_headers(user_id)
+        # Карточка растения и три вложенных списка запрашиваются параллельно
+        plant_response, entries_response, photos_response, reminders_response = await asyncio.gather(
+            api.get(f"/plants/{plant_id}", user_id, cache=True),
+            api.get(f"/plants/{plant_id}/entries", user_id),
+            api.get(f"/plants/{plant_id}/photos", user_id),
+            api.get(f"/plants/{plant_id}/reminders", user_id),
         )
         if plant_response.status_code == 404:
             await update.callback_query.edit_message_text("❌ Растение не найдено.")
@@ -715,18 +723,6 @@ async def show_plant_detail(update: Update, context: ContextTypes.DEFAULT_TYPE,
             return
 
         plant = plant_response.json()
-        entries_response = requests.get(
-            f"{API_URL}/plants/{plant_id}/entries",
-            headers=get_headers(user_id)
-        )
-        photos_response = requests.get(
-            f"{API_URL}/plants/{plant_id}/photos",
-            headers=get_headers(user_id)
-        )
-        reminders_response = requests.get(
-            f"{API_URL}/plants/{plant_id}/reminders",
-            headers=get_headers(user_id)
-        )
 
         entries = entries_response.json() if entries_response.status_code == 200 else []
         photos = photos_response.json() if photos_response.status_code == 200 else []
@@ -792,10 +788,10 @@ async def show_entry_notes(update: Update, context: ContextTypes.DEFAULT_TYPE, p
         entry_data["notes"] = "Заметка"
 
     try:
-        response = requests.post(
-            f"{API_URL}/plants/{plant_id}/entries",
-            json=entry_data,
-            headers={**get_headers(user_id), "Content-Type": "application/json"}
+        response = await api.post(
+            f"/plants/{plant_id}/entries",
+            user_id,
+            json=entry_data
         )
         if response.status_code == 200:
             await update.callback_query.edit_message_text("✅ Запись добавлена!")
@@ -827,11 +823,7 @@ async def show_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     try:
-        response = requests.get(
-            f"{API_URL}/reminders/upcoming",
-            headers=get_headers(user_id),
-            timeout=10
-        )
+        response = await api.get("/reminders/upcoming", user_id)
         if response.status_code == 200:
             reminders = response.json()
             if not reminders:
@@ -911,10 +903,7 @@ async def admin_check_reminders(update: Update, context: ContextTypes.DEFAULT_TY
 
     try:
         # Получаем все растения админа
-        plants_response = requests.get(
-            f"{API_URL}/plants",
-            headers=get_headers(user_id)
-        )
+        plants_response = await api.get("/plants", user_id, cache=True)
 
         if plants_response.status_code == 401:
             await update.message.reply_text("❌ Сессия истекла. Войдите снова.")
@@ -933,11 +922,11 @@ async def admin_check_reminders(update: Update, context: ContextTypes.DEFAULT_TY
         text = "📋 **Статистика напоминаний:**\n"
         total_reminders = 0
         active_reminders = 0
-        for plant in plants:
-            reminders_response = requests.get(
-                f"{API_URL}/plants/{plant['id']}/reminders",
-                headers=get_headers(user_id)
-            )
+        # Напоминания всех растений запрашиваются параллельно, а не по одному
+        reminders_responses = await api.get_many(
+            [f"/plants/{plant['id']}/reminders" for plant in plants], user_id
+        )
+        for plant, reminders_response in zip(plants, reminders_responses):
             if reminders_response.status_code == 200:
                 reminders = reminders_response.json()
                 total_reminders += len(reminders)
@@ -1065,15 +1054,15 @@ async def save_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
     days_str = ",".join(sorted(days))
 
     try:
-        response = requests.post(
-            f"{API_URL}/plants/{plant_id}/reminders",
+        response = await api.post(
+            f"/plants/{plant_id}/reminders",
+            user_id,
             json={
                 "reminder_type": rem_type,
                 "times_per_day": times_per_day,
                 "reminder_time": time_str,
                 "days_of_week": days_str
-            },
-            headers={**get_headers(user_id), "Content-Type": "application/json"}
+            }
         )
         if response.status_code == 200:
             await update.callback_query.edit_message_text("✅ Напоминание создано!")
@@ -1102,9 +1091,9 @@ async def show_plant_entries(update: Update, context: ContextTypes.DEFAULT_TYPE,
     """Показать записи дневника растения"""
     user_id = update.effective_user.id
     try:
-        plant_response = requests.get(
-            f"{API_URL}/plants/{plant_id}",
-            headers=get_headers(user_id)
+        plant_response, entries_response = await asyncio.gather(
+            api.get(f"/plants/{plant_id}", user_id, cache=True),
+            api.get(f"/plants/{plant_id}/entries", user_id),
         )
         if plant_response.status_code == 404:
             await update.callback_query.edit_message_text("❌ Растение не найдено.")
@@ -1121,10 +1110,6 @@ async def show_plant_entries(update: Update, context: ContextTypes.DEFAULT_TYPE,
             return
 
         plant = plant_response.json()
-        entries_response = requests.get(
-            f"{API_URL}/plants/{plant_id}/entries",
-            headers=get_headers(user_id)
-        )
         if entries_response.status_code != 200:
             if entries_response.status_code == 401:
                 await update.callback_query.edit_message_text("❌ Сессия истекла. Войдите снова.")
@@ -1185,9 +1170,9 @@ async def show_plant_photos(update: Update, context: ContextTypes.DEFAULT_TYPE,
     """Показать фото растения"""
     user_id = update.effective_user.id
     try:
-        plant_response = requests.get(
-            f"{API_URL}/plants/{plant_id}",
-            headers=get_headers(user_id)
+        plant_response, photos_response = await asyncio.gather(
+            api.get(f"/plants/{plant_id}", user_id, cache=True),
+            api.get(f"/plants/{plant_id}/photos", user_id),
         )
         if plant_response.status_code == 404:
             await update.callback_query.edit_message_text("❌ Растение не найдено.")
@@ -1204,10 +1189,6 @@ async def show_plant_photos(update: Update, context: ContextTypes.DEFAULT_TYPE,
             return
 
         plant = plant_response.json()
-        photos_response = requests.get(
-            f"{API_URL}/plants/{plant_id}/photos",
-            headers=get_headers(user_id)
-        )
         if photos_response.status_code != 200:
             if photos_response.status_code == 401:
                 await update.callback_query.edit_message_text("❌ Сессия истекла. Войдите снова.")
@@ -1238,7 +1219,8 @@ async def show_plant_photos(update: Update, context: ContextTypes.DEFAULT_TYPE,
             text += f"{i}. {date_str}\n"
             if photo.get('description'):
                 text += f"   {photo['description']}\n"
-            text += f"   {API_URL}{photo['photo_path']}\n"
+            # Ссылка на уменьшенную копию вместо оригинала в 5–10 МБ
+            text += f"   {API_URL}{photo.get('preview_path') or photo['photo_path']}\n"
 
         if len(photos) > 5:
             text += f"... и еще {len(photos) - 5} фото"
@@ -1257,9 +1239,9 @@ async def show_plant_reminders(update: Update, context: ContextTypes.DEFAULT_TYP
     """Показать напоминания растения"""
     user_id = update.effective_user.id
     try:
-        plant_response = requests.get(
-            f"{API_URL}/plants/{plant_id}",
-            headers=get_headers(user_id)
+        plant_response, reminders_response = await asyncio.gather(
+            api.get(f"/plants/{plant_id}", user_id, cache=True),
+            api.get(f"/plants/{plant_id}/reminders", user_id),
         )
         if plant_response.status_code == 404:
             await update.callback_query.edit_message_text("❌ Растение не найдено.")
@@ -1276,10 +1258,6 @@ async def show_plant_reminders(update: Update, context: ContextTypes.DEFAULT_TYP
             return
 
         plant = plant_response.json()
-        reminders_response = requests.get(
-            f"{API_URL}/plants/{plant_id}/reminders",
-            headers=get_headers(user_id)
-        )
         if reminders_response.status_code != 200:
             if reminders_response.status_code == 401:
                 await update.callback_query.edit_message_text("❌ Сессия истекла. Войдите снова.")
@@ -1344,10 +1322,7 @@ async def delete_plant(update: Update, context: ContextTypes.DEFAULT_TYPE, plant
     """Удаление растения"""
     user_id = update.effective_user.id
     try:
-        response = requests.delete(
-            f"{API_URL}/plants/{plant_id}",
-            headers=get_headers(user_id)
-        )
+        response = await api.delete(f"/plants/{plant_id}", user_id)
         if response.status_code == 200:
             await update.callback_query.edit_message_text("✅ Растение удалено!")
             await show_plants(update, context)
@@ -1371,10 +1346,7 @@ async def delete_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE, re
     user_id = update.effective_user.id
     try:
         # Получаем все растения пользователя для поиска plant_id
-        plants_response = requests.get(
-            f"{API_URL}/plants",
-            headers=get_headers(user_id)
-        )
+        plants_response = await api.get("/plants", user_id, cache=True)
 
         if plants_response.status_code == 401:
             await update.callback_query.edit_message_text("❌ Сессия истекла. Войдите снова.")
@@ -1388,13 +1360,11 @@ async def delete_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE, re
 
         plants = plants_response.json()
         plant_id = None
-        # Ищем растение с этим напоминанием
-        for plant in plants:
-            # Для каждого растения запрашиваем его напоминания
-            reminders_response = requests.get(
-                f"{API_URL}/plants/{plant['id']}/reminders",
-                headers=get_headers(user_id)
-            )
+        # Ищем растение с этим напоминанием (напоминания всех растений запрашиваем параллельно)
+        reminders_responses = await api.get_many(
+            [f"/plants/{plant['id']}/reminders" for plant in plants], user_id
+        )
+        for plant, reminders_response in zip(plants, reminders_responses):
             if reminders_response.status_code == 200:
                 reminders = reminders_response.json()
                 if any(r['id'] == reminder_id for r in reminders):
@@ -1406,10 +1376,7 @@ async def delete_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE, re
             return
 
         # Удаляем напоминание
-        delete_response = requests.delete(
-            f"{API_URL}/reminders/{reminder_id}",
-            headers=get_headers(user_id)
-        )
+        delete_response = await api.delete(f"/reminders/{reminder_id}", user_id)
 
         if delete_response.status_code == 200:
             await update.callback_query.edit_message_text("✅ Напоминание удалено!")
@@ -1430,12 +1397,16 @@ async def delete_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE, re
         logger.error(f"Delete reminder error: {e}")
         await update.callback_query.edit_message_text("❌ Ошибка подключения к серверу.")
 
+async def close_api(application: Application):
+    """Закрыть пул соединений к backend при остановке бота"""
+    await api.close()
+
 def main():
     """Запуск бота"""
     if not BOT_TOKEN:
         logger.error("BOT_TOKEN не установлен!")
         return
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = Application.builder().token(BOT_TOKEN).post_shutdown(close_api).build()
 
     # Регистрация обработчиков
     application.add_handler(CommandHandler("start", start))
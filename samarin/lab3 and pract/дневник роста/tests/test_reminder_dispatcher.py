@@ -0,0 +1,110 @@
+"""
+Тесты доставки напоминаний на fake Bot API (httpx.MockTransport)
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from scheduler import ReminderDispatcher
+
+
+class FakeBotAPI:
+    """sendMessage: заданные заранее ответы по чатам, дальше — 200"""
+
+    def __init__(self, responses=None):
+        self.responses = {chat_id: list(codes) for chat_id, codes in (responses or {}).items()}
+        self.calls = []
+
+    def __call__(self, request):
+        chat_id = json.loads(request.content)["chat_id"]
+        self.calls.append((chat_id, asyncio.get_running_loop().time()))
+        codes = self.responses.get(chat_id)
+        status = codes.pop(0) if codes else 200
+        if status == 429:
+            return httpx.Response(429, json={
+                "ok": False, "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1}
+            })
+        return httpx.Response(status, json={"ok": status == 200})
+
+
+def reminder(reminder_id, chat_id):
+    return {"id": reminder_id, "chat_id": chat_id, "plant_name": "Фикус", "reminder_type": "watering"}
+
+
+def make_dispatcher(bot, **kwargs):
+    kwargs.setdefault("retry_delay", 0.01)
+    return ReminderDispatcher("token", transport=httpx.MockTransport(bot), **kwargs)
+
+
+def run_dispatch(dispatcher, batch):
+    async def scenario():
+        dispatcher.start()
+        try:
+            return await dispatcher.dispatch(batch)
+        finally:
+            await dispatcher.stop()
+    return asyncio.run(scenario())
+
+
+def test_429_pauses_all_chats_and_retries():
+    bot = FakeBotAPI({1: [429]})
+    dispatcher = make_dispatcher(bot, concurrency=1)
+
+    delivered = run_dispatch(dispatcher, [reminder(10, 1), reminder(20, 2)])
+
+    assert sorted(delivered) == [10, 20]
+    assert (dispatcher.sent, dispatcher.failed, dispatcher.throttled) == (2, 0, 1)
+    # После 429 ни один чат не получает сообщение раньше retry_after
+    throttled_at = bot.calls[0][1]
+    assert all(at - throttled_at >= 0.99 for _, at in bot.calls[1:])
+
+
+def test_rate_limit_spaces_requests():
+    bot = FakeBotAPI()
+    dispatcher = make_dispatcher(bot, rate=50)
+
+    run_dispatch(dispatcher, [reminder(i, i) for i in range(1, 11)])
+
+    times = sorted(at for _, at in bot.calls)
+    assert times[-1] - times[0] >= 9 / 50 * 0.95
+
+
+def test_server_errors_are_postponed_client_errors_are_not():
+    bot = FakeBotAPI({1: [500] * 10, 2: [403]})
+    dispatcher = make_dispatcher(bot, max_retries=2)
+
+    delivered = run_dispatch(dispatcher, [reminder(10, 1), reminder(11, 1), reminder(20, 2), reminder(30, 3)])
+
+    # Чат 1 недоступен — его напоминания остаются за планировщиком; бот, заблокированный в чате 2, не повторяем
+    assert sorted(delivered) == [20, 30]
+    assert len([chat_id for chat_id, _ in bot.calls if chat_id == 1]) == 3
+    assert (dispatcher.sent, dispatcher.failed) == (1, 2)
+
+
+def test_stop_delivers_queued_batches():
+    bot = FakeBotAPI({1: [429]})
+    reported = []
+
+    async def on_delivered(reminder_ids):
+        reported.extend(reminder_ids)
+
+    async def scenario():
+        dispatcher = make_dispatcher(bot, on_delivered=on_delivered)
+        dispatcher.start()
+        await dispatcher.put([reminder(10, 1)])
+        await dispatcher.put([reminder(20, 2), reminder(30, 3)])
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(scenario())
+
+    assert sorted(reported) == [10, 20, 30]
+    assert dispatcher.sent == 3
+    assert dispatcher.queue.empty()
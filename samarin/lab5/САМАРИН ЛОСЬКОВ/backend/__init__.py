@@ -3,7 +3,7 @@ Backend модуль для генерации видео через Stable Vide
 """
 
 from .video_generator import VideoGenerator
-from .comfyui_client import ComfyUIClient
+from .comfyui_client import ComfyUIClient, AsyncComfyUIClient
 from .keyframe_generator import KeyframeGenerator
 
-__all__ = ['VideoGenerator', 'ComfyUIClient', 'KeyframeGenerator']
+__all__ = ['VideoGenerator', 'ComfyUIClient', 'AsyncComfyUIClient', 'KeyframeGenerator']
@@ -2,6 +2,7 @@
 Клиент для взаимодействия с ComfyUI через WebSocket API
 """
 
+import asyncio
 import json
 import uuid
 import websocket
@@ -9,7 +10,8 @@ import threading
 import queue
 import time
 import requests
-from typing import Dict, Any, Optional, Callable
+import aiohttp
+from typing import Dict, Any, Optional, Callable, List
 import os
 
 
@@ -26,7 +28,9 @@ class ComfyUIClient:
         """
         self.host = host
         self.port = port
-        self.ws_url = f"ws://{host}:{port}/ws?clientId={uuid.uuid4()}"
+        # Один clientId на клиента: ComfyUI адресует сообщения о прогрессе по нему
+        self.client_id = str(uuid.uuid4())
+        self.ws_url = f"ws://{host}:{port}/ws?clientId={self.client_id}"
         self.api_url = f"http://{host}:{port}"
         self.ws = None
         self.message_queue = queue.Queue()
@@ -101,7 +105,7 @@ class ComfyUIClient:
         prompt_id = str(uuid.uuid4())
         data = {
             "prompt": prompt,
-            "client_id": str(uuid.uuid4())
+            "client_id": self.client_id
         }
         
         try:
@@ -259,3 +263,341 @@ class ComfyUIClient:
         if self.ws:
             self.ws.close()
         self.is_connected = False
+
+
+class AsyncComfyUIClient:
+    """
+    Асинхронный клиент ComfyUI: общий пул HTTP-соединений, постоянный WebSocket
+    с переподключением и future на каждый промпт, который завершается по событиям
+    executing/executed — без опроса очереди сообщений
+    """
+    
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8188,
+        max_connections: int = 8,
+        handshake_timeout: float = 10.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        max_early_events: int = 256
+    ):
+        """
+        Инициализация клиента ComfyUI
+        
+        Args:
+            host: Хост ComfyUI сервера
+            port: Порт ComfyUI сервера
+            max_connections: Размер пула HTTP-соединений
+            handshake_timeout: Сколько ждать первого сообщения status после подключения WebSocket
+            reconnect_delay: Начальная задержка переподключения (удваивается до max_reconnect_delay)
+            max_reconnect_delay: Максимальная задержка переподключения
+            max_early_events: Сколько событий завершения хранить до ответа на POST /prompt
+        """
+        self.host = host
+        self.port = port
+        self.client_id = str(uuid.uuid4())
+        self.api_url = f"http://{host}:{port}"
+        self.ws_url = f"ws://{host}:{port}/ws?clientId={self.client_id}"
+        self.max_connections = max_connections
+        self.handshake_timeout = handshake_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_early_events = max_early_events
+        
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.session_id: Optional[str] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        # Параллельные queue_prompt не должны открывать по своему WebSocket и слушателю
+        self._connect_lock = asyncio.Lock()
+        self._closing = False
+        
+        # prompt_id -> future с outputs; outputs копятся по событиям executed
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._outputs: Dict[str, Dict[str, Any]] = {}
+        # События завершения, пришедшие раньше ответа на POST /prompt; копятся, только пока
+        # есть запросы в полёте (_submitting), иначе это чужие или уже брошенные промпты
+        self._early: Dict[str, Any] = {}
+        self._submitting = 0
+    
+    @property
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+    
+    async def connect(self):
+        """
+        Открытие пула HTTP-соединений и WebSocket с рукопожатием
+        
+        Raises:
+            ValueError: Если ComfyUI недоступен
+        """
+        if self.is_connected:
+            return
+        
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+            
+            # Слушатель уже переподключается — ждём его, а не открываем второй WebSocket
+            if self._listener is not None and not self._listener.done():
+                try:
+                    await asyncio.wait_for(self._connected.wait(), self.handshake_timeout)
+                except asyncio.TimeoutError:
+                    raise ValueError("ComfyUI недоступен: переподключение не удалось")
+                return
+            
+            if self.session is None or self.session.closed:
+                connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+                self.session = aiohttp.ClientSession(connector=connector)
+            
+            self._closing = False
+            try:
+                await self._open_ws()
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                raise ValueError(f"Не удалось подключиться к ComfyUI: {e}")
+            
+            self._listener = asyncio.create_task(self._listen())
+            print(f"Подключено к ComfyUI на {self.ws_url}")
+    
+    async def _open_ws(self):
+        """Подключение WebSocket и ожидание первого сообщения status (рукопожатие)"""
+        self.ws = await self.session.ws_connect(self.ws_url, heartbeat=30)
+        
+        async def handshake():
+            async for msg in self.ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    data = json.loads(msg.data)
+                    if data.get("type") == "status":
+                        self.session_id = data.get("data", {}).get("sid", self.client_id)
+                        return
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+            raise ConnectionError("WebSocket закрыт до рукопожатия")
+        
+        try:
+            await asyncio.wait_for(handshake(), self.handshake_timeout)
+        except BaseException:
+            await self.ws.close()
+            raise
+        self._connected.set()
+    
+    async def _listen(self):
+        """Чтение WebSocket и переподключение с экспоненциальной задержкой"""
+        delay = self.reconnect_delay
+        while not self._closing:
+            try:
+                async for msg in self.ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        self._dispatch(json.loads(msg.data))
+                    elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+            except (aiohttp.ClientError, json.JSONDecodeError) as e:
+                print(f"WebSocket ошибка: {e}")
+            
+            self._connected.clear()
+            if self._closing:
+                break
+            
+            print("WebSocket соединение закрыто, переподключение...")
+            while not self._closing:
+                await asyncio.sleep(delay)
+                try:
+                    await self._open_ws()
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ConnectionError) as e:
+                    print(f"Переподключение не удалось: {e}")
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+                delay = self.reconnect_delay
+                # Промпты могли завершиться, пока соединения не было
+                await self._recover_pending()
+                break
+    
+    def _dispatch(self, message: Dict[str, Any]):
+        """Разбор события ComfyUI и завершение соответствующего future"""
+        msg_type = message.get("type")
+        data = message.get("data", {}) or {}
+        prompt_id = data.get("prompt_id")
+        
+        if msg_type == "progress":
+            print(f"Прогресс: {data.get('value', 0)}/{data.get('max', 100)}")
+        elif msg_type == "executed" and prompt_id:
+            self._outputs.setdefault(prompt_id, {})[data.get("node")] = data.get("output", {})
+        elif msg_type == "executing" and prompt_id and data.get("node") is None:
+            # node == None — выполнение промпта завершено
+            self._resolve(prompt_id, self._outputs.pop(prompt_id, {}))
+        elif msg_type == "execution_error" and prompt_id:
+            error_msg = data.get("exception_message", "Unknown error")
+            self._outputs.pop(prompt_id, None)
+            self._resolve(prompt_id, ValueError(f"Ошибка выполнения: {error_msg}"))
+    
+    def _resolve(self, prompt_id: str, result: Any):
+        future = self._pending.get(prompt_id)
+        if future is None:
+            if self._submitting:
+                self._early[prompt_id] = result
+                if len(self._early) > self.max_early_events:
+                    del self._early[next(iter(self._early))]
+            return
+        if future.done():
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+    
+    async def _recover_pending(self):
+        """Досбор результатов промптов, завершившихся во время разрыва соединения"""
+        for prompt_id, future in list(self._pending.items()):
+            if future.done():
+                continue
+            try:
+                history = await self.get_history(prompt_id)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # Промпт дождётся события по WebSocket или своего таймаута
+                print(f"Не удалось получить историю промпта {prompt_id}: {e}")
+                continue
+            entry = history.get(prompt_id)
+            if entry and entry.get("status", {}).get("completed", entry.get("outputs") is not None):
+                self._resolve(prompt_id, entry.get("outputs", {}))
+    
+    async def queue_prompt(self, prompt: Dict[str, Any]) -> str:
+        """
+        Отправка промпта в очередь ComfyUI
+        
+        Args:
+            prompt: Словарь с workflow для ComfyUI
+            
+        Returns:
+            prompt_id: ID промпта в очереди
+            
+        Raises:
+            ValueError: Если ноды не найдены или другие ошибки
+        """
+        await self.connect()
+        
+        data = {"prompt": prompt, "client_id": self.client_id}
+        self._submitting += 1
+        try:
+            try:
+                async with self.session.post(f"{self.api_url}/prompt", json=data) as response:
+                    result = await response.json(content_type=None)
+            except aiohttp.ClientError as e:
+                raise ValueError(f"Не удалось подключиться к ComfyUI: {e}")
+            
+            # Проверяем на ошибки в ответе
+            if "error" in result:
+                error = result.get("error", {})
+                error_msg = error.get("message", "Unknown error") if isinstance(error, dict) else str(error)
+                if "does not exist" in error_msg:
+                    raise ValueError(f"Нода не найдена в ComfyUI: {error_msg}. "
+                                     f"Установите необходимые custom nodes для SVD.")
+                raise ValueError(f"Ошибка ComfyUI: {error_msg}")
+            
+            prompt_id = result["prompt_id"]
+            future = asyncio.get_running_loop().create_future()
+            self._pending[prompt_id] = future
+            if prompt_id in self._early:
+                self._resolve(prompt_id, self._early.pop(prompt_id))
+            return prompt_id
+        finally:
+            self._submitting -= 1
+            if not self._submitting:
+                # Все ответы на POST /prompt получены: оставшиеся события — не наши
+                self._early.clear()
+    
+    async def wait_for_completion(self, prompt_id: str, timeout: float = 300) -> Dict[str, Any]:
+        """
+        Ожидание завершения обработки промпта
+        
+        Args:
+            prompt_id: ID промпта
+            timeout: Таймаут в секундах
+            
+        Returns:
+            dict: outputs по нодам
+            
+        Raises:
+            ValueError: Если произошла ошибка выполнения или истёк таймаут
+        """
+        future = self._pending.get(prompt_id)
+        if future is None:
+            raise ValueError(f"Неизвестный промпт: {prompt_id}")
+        
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise ValueError(f"Промпт {prompt_id} не завершился за {timeout} с")
+        finally:
+            # Завершённый future хранится до wait_for_completion, брошенный по таймауту — нет
+            self._pending.pop(prompt_id, None)
+    
+    async def run_workflow(self, workflow: Dict[str, Any], timeout: float = 300) -> Dict[str, Any]:
+        """Постановка workflow в очередь и ожидание результата"""
+        prompt_id = await self.queue_prompt(workflow)
+        return await self.wait_for_completion(prompt_id, timeout)
+    
+    async def run_workflows(
+        self,
+        workflows: List[Dict[str, Any]],
+        timeout: float = 300
+    ) -> List[Any]:
+        """
+        Параллельная отправка нескольких workflow: ComfyUI ставит их в свою очередь
+        
+        Returns:
+            List[Any]: outputs каждого workflow или исключение на его месте
+        """
+        return await asyncio.gather(
+            *(self.run_workflow(w, timeout) for w in workflows),
+            return_exceptions=True
+        )
+    
+    async def get_history(self, prompt_id: str) -> Dict[str, Any]:
+        """История выполнения промпта (GET /history/{prompt_id})"""
+        async with self.session.get(f"{self.api_url}/history/{prompt_id}") as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+    
+    async def get_image(self, filename: str, subfolder: str = "", folder_type: str = "output") -> bytes:
+        """
+        Получение изображения из ComfyUI
+        
+        Args:
+            filename: Имя файла
+            subfolder: Подпапка
+            folder_type: Тип папки (output, input, temp)
+            
+        Returns:
+            bytes: Данные изображения
+        """
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        async with self.session.get(f"{self.api_url}/view", params=params) as response:
+            response.raise_for_status()
+            return await response.read()
+    
+    generate_svd_workflow = ComfyUIClient.generate_svd_workflow
+    
+    async def close(self):
+        """Закрытие WebSocket и пула соединений"""
+        self._closing = True
+        self._connected.clear()
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                # Ошибка слушателя уже не важна: соединение всё равно закрывается
+                print(f"WebSocket слушатель завершился с ошибкой: {e}")
+            self._listener = None
+        if self.ws is not None:
+            await self.ws.close()
+        if self.session is not None:
+            await self.session.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
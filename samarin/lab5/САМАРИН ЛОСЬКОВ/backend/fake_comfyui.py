@@ -0,0 +1,136 @@
+"""
+Локальный fake-сервер ComfyUI для проверки клиента без GPU и моделей
+
+Эмулирует POST /prompt, GET /history/{prompt_id}, GET /view и WebSocket /ws
+с событиями status/executing/progress/executed, как настоящий ComfyUI.
+
+Запуск: python -m backend.fake_comfyui --port 8188
+"""
+
+import argparse
+import asyncio
+import json
+import uuid
+from typing import Dict, Any, Set
+
+from aiohttp import web
+
+
+class FakeComfyUI:
+    """Fake ComfyUI: выполняет промпты по очереди с задержкой на шаг"""
+    
+    def __init__(self, known_nodes: Set[str] = None, step_delay: float = 0.01, steps: int = 3):
+        """
+        Args:
+            known_nodes: Допустимые class_type (остальные дают ошибку "does not exist")
+            step_delay: Задержка одного шага выполнения в секундах
+            steps: Количество событий progress на промпт
+        """
+        self.known_nodes = known_nodes or {"StableVideoDiffusionLoader"}
+        self.step_delay = step_delay
+        self.steps = steps
+        self.sockets: Dict[str, web.WebSocketResponse] = {}
+        self.history: Dict[str, Dict[str, Any]] = {}
+        self.queue: asyncio.Queue = None
+        self.worker: asyncio.Task = None
+        self.app = web.Application()
+        self.app.router.add_get("/ws", self.handle_ws)
+        self.app.router.add_post("/prompt", self.handle_prompt)
+        self.app.router.add_get("/history/{prompt_id}", self.handle_history)
+        self.app.router.add_get("/view", self.handle_view)
+        self.app.on_startup.append(self._start_worker)
+        # on_shutdown, а не on_cleanup: открытые WebSocket иначе держат остановку сервера до таймаута
+        self.app.on_shutdown.append(self._stop_worker)
+    
+    async def _start_worker(self, app):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._execute_loop())
+    
+    async def _stop_worker(self, app):
+        self.worker.cancel()
+        for ws in list(self.sockets.values()):
+            await ws.close()
+    
+    async def _send(self, client_id: str, message: Dict[str, Any]):
+        ws = self.sockets.get(client_id)
+        if ws is not None and not ws.closed:
+            await ws.send_str(json.dumps(message))
+    
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        client_id = request.query.get("clientId") or str(uuid.uuid4())
+        self.sockets[client_id] = ws
+        # Как и ComfyUI, первым сообщением отправляем status с sid
+        await ws.send_str(json.dumps({
+            "type": "status",
+            "data": {"status": {"exec_info": {"queue_remaining": self.queue.qsize()}}, "sid": client_id}
+        }))
+        async for _ in ws:
+            pass
+        # Клиент мог уже переподключиться с тем же clientId
+        if self.sockets.get(client_id) is ws:
+            self.sockets.pop(client_id)
+        return ws
+    
+    async def handle_prompt(self, request):
+        body = await request.json()
+        prompt = body.get("prompt", {})
+        for node_id, node in prompt.items():
+            if node.get("class_type") not in self.known_nodes:
+                return web.json_response({
+                    "error": {"message": f"Cannot execute because node {node.get('class_type')} does not exist."}
+                }, status=400)
+        
+        prompt_id = str(uuid.uuid4())
+        self.history[prompt_id] = {"prompt": prompt, "outputs": {}, "status": {"completed": False}}
+        await self.queue.put((prompt_id, body.get("client_id"), prompt))
+        return web.json_response({"prompt_id": prompt_id, "number": self.queue.qsize()})
+    
+    async def _execute_loop(self):
+        while True:
+            prompt_id, client_id, prompt = await self.queue.get()
+            outputs = {}
+            for node_id in prompt:
+                await self._send(client_id, {"type": "executing", "data": {"node": node_id, "prompt_id": prompt_id}})
+                for step in range(1, self.steps + 1):
+                    await asyncio.sleep(self.step_delay)
+                    await self._send(client_id, {
+                        "type": "progress",
+                        "data": {"value": step, "max": self.steps, "prompt_id": prompt_id, "node": node_id}
+                    })
+                output = {"images": [{"filename": f"{prompt_id}_{node_id}.png", "subfolder": "", "type": "output"}]}
+                outputs[node_id] = output
+                await self._send(client_id, {
+                    "type": "executed",
+                    "data": {"node": node_id, "output": output, "prompt_id": prompt_id}
+                })
+            self.history[prompt_id].update({"outputs": outputs, "status": {"completed": True}})
+            await self._send(client_id, {"type": "executing", "data": {"node": None, "prompt_id": prompt_id}})
+    
+    async def handle_history(self, request):
+        prompt_id = request.match_info["prompt_id"]
+        entry = self.history.get(prompt_id)
+        return web.json_response({prompt_id: entry} if entry else {})
+    
+    async def handle_view(self, request):
+        # Минимальный валидный PNG 1x1
+        png = bytes.fromhex(
+            "89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+            "0000000c4944415408d763f8cfc000000301010018dd8db00000000049454e44ae426082"
+        )
+        return web.Response(body=png, content_type="image/png")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake ComfyUI сервер")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8188)
+    parser.add_argument("--step-delay", type=float, default=0.5)
+    args = parser.parse_args()
+    
+    web.run_app(FakeComfyUI(step_delay=args.step_delay).app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,8 @@
 """
 
 import os
-from typing import List, Optional
+import hashlib
+from typing import List, Optional, Dict, Tuple
 from PIL import Image
 import torch
 import numpy as np
@@ -23,7 +24,11 @@ class KeyframeGenerator:
         self,
         model_id: str = "stabilityai/sdxl-turbo",
         device: str = "cuda" if torch.cuda.is_available() else "cpu",
-        use_sdxl: bool = True
+        use_sdxl: bool = True,
+        preload: bool = True,
+        warmup: bool = False,
+        batch_size: int = 4,
+        embeddings_cache_dir: Optional[str] = None
     ):
         """
         Инициализация генератора ключевых кадров
@@ -32,11 +37,19 @@ class KeyframeGenerator:
             model_id: ID модели SDXL
             device: Устройство для вычислений
             use_sdxl: Использовать ли SDXL для генерации
+            preload: Загрузить модель сразу (иначе — при первой генерации)
+            warmup: Прогнать пробную генерацию после загрузки
+            batch_size: Сколько промптов генерировать за один вызов пайплайна
+            embeddings_cache_dir: Директория дискового кэша эмбеддингов промптов (None — только в памяти)
         """
         self.model_id = model_id
         self.device = device
         self.use_sdxl = use_sdxl
         self.pipeline = None
+        self.batch_size = max(1, batch_size)
+        self.embeddings_cache_dir = embeddings_cache_dir
+        # (model_id, prompt, negative_prompt) -> эмбеддинги encode_prompt
+        self._embeddings_cache: Dict[Tuple[str, str, str], Tuple[torch.Tensor, ...]] = {}
         
         if use_sdxl:
             # Проверяем переменную окружения для предотвращения автоматической загрузки
@@ -44,40 +57,118 @@ class KeyframeGenerator:
                 print("Автоматическая загрузка SDXL отключена (DISABLE_SDXL_AUTO_LOAD=true)")
                 print("Используется режим stub-кадров")
                 self.use_sdxl = False
-            else:
-                if not SDXL_AVAILABLE:
-                    print("diffusers не установлен или SDXL недоступен")
-                    print("Используется режим stub-кадров")
-                    self.use_sdxl = False
-                else:
-                    try:
-                        print(f"Загрузка модели {model_id}...")
-                        print("⚠️  ВНИМАНИЕ: Это загрузит ~10+ ГБ моделей!")
-                        print("   Для использования stub-кадров установите DISABLE_SDXL_AUTO_LOAD=true")
-                        print("   или измените config.yaml: generation.keyframe_generation.method = 'stub'")
-                        
-                        response = input("Продолжить загрузку? (y/n): ").strip().lower()
-                        if response != 'y':
-                            print("Загрузка отменена. Используется режим stub-кадров")
-                            self.use_sdxl = False
-                            return
-                        
-                        self.pipeline = StableDiffusionXLPipeline.from_pretrained(
-                            model_id,
-                            torch_dtype=torch.float16 if device == "cuda" else torch.float32,
-                            variant="fp16" if device == "cuda" else None
-                        )
-                        self.pipeline = self.pipeline.to(device)
-                        if device == "cuda":
-                            self.pipeline.enable_model_cpu_offload()
-                        print("Модель загружена")
-                    except KeyboardInterrupt:
-                        print("\nЗагрузка прервана пользователем. Используется режим stub-кадров")
-                        self.use_sdxl = False
-                    except Exception as e:
-                        print(f"Ошибка загрузки модели: {e}")
-                        print("Будет использован режим stub-кадров")
-                        self.use_sdxl = False
+            elif not SDXL_AVAILABLE:
+                print("diffusers не установлен или SDXL недоступен")
+                print("Используется режим stub-кадров")
+                self.use_sdxl = False
+            elif preload:
+                self.load()
+                if warmup:
+                    self.warmup()
+    
+    def load(self) -> bool:
+        """
+        Загрузка пайплайна SDXL (без интерактивного подтверждения)
+        
+        Returns:
+            bool: Загружен ли пайплайн
+        """
+        if self.pipeline is not None:
+            return True
+        if not self.use_sdxl:
+            return False
+        
+        try:
+            print(f"Загрузка модели {self.model_id}...")
+            print("⚠️  ВНИМАНИЕ: Это загрузит ~10+ ГБ моделей!")
+            print("   Для использования stub-кадров установите DISABLE_SDXL_AUTO_LOAD=true")
+            print("   или измените config.yaml: generation.keyframe_generation.method = 'stub'")
+            
+            self.pipeline = StableDiffusionXLPipeline.from_pretrained(
+                self.model_id,
+                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
+                variant="fp16" if self.device == "cuda" else None
+            )
+            self.pipeline = self.pipeline.to(self.device)
+            if self.device == "cuda":
+                self.pipeline.enable_model_cpu_offload()
+            print("Модель загружена")
+            return True
+        except Exception as e:
+            print(f"Ошибка загрузки модели: {e}")
+            print("Будет использован режим stub-кадров")
+            self.use_sdxl = False
+            return False
+    
+    def warmup(self, width: int = 512, height: int = 512):
+        """
+        Пробная генерация: инициализация CUDA-ядер и кэшей до первого реального запроса
+        
+        Args:
+            width: Ширина пробного кадра
+            height: Высота пробного кадра
+        """
+        if not self.load():
+            return
+        print("Прогрев SDXL...")
+        self.generate_keyframes(["warmup"], num_inference_steps=1, width=width, height=height)
+    
+    def _embeddings_cache_path(self, key: Tuple[str, str, str]) -> Optional[str]:
+        if not self.embeddings_cache_dir:
+            return None
+        digest = hashlib.sha1("\x00".join(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.embeddings_cache_dir, f"{digest}.pt")
+    
+    def encode_prompt(
+        self,
+        prompt: str,
+        negative_prompt: Optional[str] = None,
+        guidance_scale: float = 0.0
+    ) -> Tuple[torch.Tensor, ...]:
+        """
+        Эмбеддинги промпта SDXL с кэшем в памяти и на диске
+        
+        Args:
+            prompt: Текстовое описание
+            negative_prompt: Негативный промпт
+            guidance_scale: Guidance scale (при > 1 нужны и негативные эмбеддинги)
+            
+        Returns:
+            Tuple: (prompt_embeds, negative_prompt_embeds, pooled_prompt_embeds, negative_pooled_prompt_embeds)
+        """
+        do_cfg = guidance_scale > 1.0
+        key = (self.model_id, prompt, (negative_prompt or "") if do_cfg else "\x00no-cfg")
+        
+        cached = self._embeddings_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        cache_path = self._embeddings_cache_path(key)
+        if cache_path and os.path.exists(cache_path):
+            try:
+                cached = tuple(
+                    t.to(self.device) if t is not None else None
+                    for t in torch.load(cache_path, map_location="cpu")
+                )
+                self._embeddings_cache[key] = cached
+                return cached
+            except Exception as e:
+                print(f"Повреждённый кэш эмбеддингов {cache_path}: {e}")
+        
+        with torch.no_grad():
+            embeds = self.pipeline.encode_prompt(
+                prompt=prompt,
+                device=self.device,
+                num_images_per_prompt=1,
+                do_classifier_free_guidance=do_cfg,
+                negative_prompt=negative_prompt
+            )
+        
+        self._embeddings_cache[key] = embeds
+        if cache_path:
+            os.makedirs(self.embeddings_cache_dir, exist_ok=True)
+            torch.save(tuple(t.cpu() if t is not None else None for t in embeds), cache_path)
+        return embeds
     
     def generate_keyframe(
         self,
@@ -102,23 +193,68 @@ class KeyframeGenerator:
         Returns:
             PIL.Image: Сгенерированное изображение
         """
-        if not self.use_sdxl or self.pipeline is None:
-            # Генерируем stub-кадр (однотонное изображение)
-            return self._generate_stub_image(width, height)
+        return self.generate_keyframes(
+            [prompt],
+            negative_prompt=negative_prompt,
+            num_inference_steps=num_inference_steps,
+            guidance_scale=guidance_scale,
+            width=width,
+            height=height
+        )[0]
+    
+    def generate_keyframes(
+        self,
+        prompts: List[str],
+        negative_prompt: Optional[str] = None,
+        num_inference_steps: int = 4,
+        guidance_scale: float = 0.0,
+        width: int = 1024,
+        height: int = 576
+    ) -> List[Image.Image]:
+        """
+        Пакетная генерация ключевых кадров: один вызов пайплайна на batch_size промптов,
+        эмбеддинги промптов берутся из кэша
         
-        try:
-            image = self.pipeline(
-                prompt=prompt,
-                negative_prompt=negative_prompt,
-                num_inference_steps=num_inference_steps,
-                guidance_scale=guidance_scale,
-                width=width,
-                height=height
-            ).images[0]
-            return image
-        except Exception as e:
-            print(f"Ошибка генерации кадра: {e}")
-            return self._generate_stub_image(width, height)
+        Args:
+            prompts: Текстовые описания
+            negative_prompt: Негативный промпт
+            num_inference_steps: Количество шагов
+            guidance_scale: Guidance scale
+            width: Ширина изображения
+            height: Высота изображения
+            
+        Returns:
+            List[PIL.Image]: Сгенерированные изображения в порядке промптов
+        """
+        if not self.use_sdxl or not self.load():
+            # Генерируем stub-кадры (градиент)
+            stub = self._generate_stub_image(width, height)
+            return [stub.copy() for _ in prompts]
+        
+        images = []
+        for start in range(0, len(prompts), self.batch_size):
+            batch = prompts[start:start + self.batch_size]
+            try:
+                embeds = [self.encode_prompt(p, negative_prompt, guidance_scale) for p in batch]
+                prompt_embeds, negative_embeds, pooled_embeds, negative_pooled_embeds = (
+                    torch.cat([e[i] for e in embeds]) if embeds[0][i] is not None else None
+                    for i in range(4)
+                )
+                images.extend(self.pipeline(
+                    prompt_embeds=prompt_embeds,
+                    negative_prompt_embeds=negative_embeds,
+                    pooled_prompt_embeds=pooled_embeds,
+                    negative_pooled_prompt_embeds=negative_pooled_embeds,
+                    num_inference_steps=num_inference_steps,
+                    guidance_scale=guidance_scale,
+                    width=width,
+                    height=height
+                ).images)
+            except Exception as e:
+                print(f"Ошибка генерации кадров: {e}")
+                images.extend(self._generate_stub_image(width, height) for _ in batch)
+        
+        return images
     
     def generate_keyframes_from_scenes(
         self,
@@ -140,13 +276,11 @@ class KeyframeGenerator:
         if num_keyframes is None:
             num_keyframes = len(scene_descriptions)
         
-        keyframes = []
-        for i, description in enumerate(scene_descriptions[:num_keyframes]):
-            print(f"Генерация ключевого кадра {i+1}/{num_keyframes}: {description[:50]}...")
-            keyframe = self.generate_keyframe(description, **kwargs)
-            keyframes.append(keyframe)
+        descriptions = scene_descriptions[:num_keyframes]
+        for i, description in enumerate(descriptions):
+            print(f"Ключевой кадр {i+1}/{len(descriptions)}: {description[:50]}...")
         
-        return keyframes
+        return self.generate_keyframes(descriptions, **kwargs)
     
     def _generate_stub_image(self, width: int, height: int) -> Image.Image:
         """
@@ -159,11 +293,10 @@ class KeyframeGenerator:
         Returns:
             PIL.Image: Stub-изображение
         """
-        # Создаём простое градиентное изображение
-        array = np.zeros((height, width, 3), dtype=np.uint8)
-        for y in range(height):
-            intensity = int(255 * (y / height))
-            array[y, :] = [intensity // 3, intensity // 2, intensity]
+        # Создаём простое градиентное изображение: цвет строки зависит только от y
+        intensity = (255 * (np.arange(height) / height)).astype(np.int64)
+        row_colors = np.stack([intensity // 3, intensity // 2, intensity], axis=1).astype(np.uint8)
+        array = np.ascontiguousarray(np.broadcast_to(row_colors[:, None, :], (height, width, 3)))
         
         return Image.fromarray(array)
     
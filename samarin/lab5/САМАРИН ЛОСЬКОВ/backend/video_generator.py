@@ -4,14 +4,17 @@
 
 import os
 import json
-from typing import List, Optional, Dict, Any
+import asyncio
+import subprocess
+import tempfile
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 from PIL import Image
 import numpy as np
 import cv2
 from pathlib import Path
 
 from .keyframe_generator import KeyframeGenerator
-from .comfyui_client import ComfyUIClient
+from .comfyui_client import AsyncComfyUIClient
 
 
 class VideoGenerator:
@@ -32,15 +35,23 @@ class VideoGenerator:
             comfyui_port: Порт ComfyUI
         """
         self.config = self._load_config(config_path)
-        self.comfyui_client = ComfyUIClient(host=comfyui_host, port=comfyui_port)
+        self.comfyui_client = AsyncComfyUIClient(host=comfyui_host, port=comfyui_port)
+        # Собственный event loop генератора: пул соединений и WebSocket ComfyUI
+        # переживают отдельные вызовы generate_from_text
+        self._loop = asyncio.new_event_loop()
         
         # Определяем, использовать ли SDXL на основе конфига
         keyframe_method = self.config.get("generation", {}).get("keyframe_generation", {}).get("method", "stub")
         use_sdxl = (keyframe_method == "sdxl")
         
+        keyframe_config = self.config.get("generation", {}).get("keyframe_generation", {})
         self.keyframe_generator = KeyframeGenerator(
             model_id=self.config.get("models", {}).get("sdxl", {}).get("model_id", "stabilityai/sdxl-turbo"),
-            use_sdxl=use_sdxl
+            use_sdxl=use_sdxl,
+            preload=keyframe_config.get("preload", True),
+            warmup=keyframe_config.get("warmup", False),
+            batch_size=keyframe_config.get("batch_size", 4),
+            embeddings_cache_dir=keyframe_config.get("embeddings_cache_dir")
         )
         
         # Создаём директории для выходных файлов
@@ -136,22 +147,19 @@ class VideoGenerator:
         keyframe_dir = os.path.join(self.keyframes_dir, session_id)
         self.keyframe_generator.save_keyframes(keyframes, keyframe_dir)
         
-        # Генерируем клипы для каждого ключевого кадра
-        clips = []
+        # Генерируем клипы для каждого ключевого кадра.
+        # Клип — ленивый итератор кадров: в памяти держится один кадр, а не весь ролик
         clip_duration = self.config.get("generation", {}).get("clip_duration", 2.0)
         fps = self.config.get("generation", {}).get("fps", 24)
-        
-        for i, keyframe in enumerate(keyframes):
-            print(f"Генерация клипа {i+1}/{len(keyframes)}...")
-            clip = self._generate_clip_from_keyframe(keyframe, clip_duration, fps)
-            if clip is not None:
-                clips.append(clip)
+        clips = self._loop.run_until_complete(self._generate_clips(keyframes, clip_duration, fps))
         
         # Склеиваем клипы в один ролик
         if not clips:
             raise ValueError("Не удалось сгенерировать ни одного клипа")
         
-        video = self._concatenate_clips(clips, fps)
+        # Размер ролика задаёт первый ключевой кадр
+        width, height = keyframes[0].size
+        video = self._concatenate_clips(clips, (width, height))
         
         # Сохраняем видео
         if output_filename is None:
@@ -159,152 +167,211 @@ class VideoGenerator:
             output_filename = f"video_{int(time.time())}.mp4"
         
         output_path = os.path.join(self.videos_dir, output_filename)
-        self._save_video(video, output_path, fps)
+        self._save_video(video, output_path, fps, (width, height))
         
         print(f"Видео сохранено: {output_path}")
         return output_path
     
-    def _generate_clip_from_keyframe(
+    async def _generate_clips(
         self,
-        keyframe: Image.Image,
+        keyframes: List[Image.Image],
         duration: float,
         fps: int
-    ) -> Optional[np.ndarray]:
+    ) -> List[Iterator[np.ndarray]]:
         """
-        Генерация клипа из ключевого кадра через SVD
+        Генерация клипов из ключевых кадров через SVD
+        
+        Все workflow отправляются в ComfyUI сразу и выполняются его очередью,
+        результаты собираются по событиям WebSocket.
         
         Args:
-            keyframe: Ключевой кадр
+            keyframes: Ключевые кадры
             duration: Длительность клипа в секундах
             fps: FPS
             
         Returns:
-            np.ndarray: Массив кадров (N, H, W, 3) или None при ошибке
+            List[Iterator[np.ndarray]]: Ленивые итераторы кадров (H, W, 3) RGB по клипам
         """
-        # Сохраняем ключевой кадр во временный файл
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            keyframe.save(tmp.name)
-            temp_path = tmp.name
+        num_frames = int(duration * fps)
+        
+        # Сохраняем ключевые кадры во временные файлы
+        temp_paths = []
+        for keyframe in keyframes:
+            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+                keyframe.save(tmp.name)
+                temp_paths.append(tmp.name)
         
         try:
-            # Проверяем подключение к ComfyUI
-            if not self.comfyui_client.is_connected:
-                self.comfyui_client.connect()
-            
-            if not self.comfyui_client.is_connected:
-                print("ComfyUI не подключен, используем stub-режим")
-                raise ValueError("ComfyUI не доступен")
+            try:
+                await self.comfyui_client.connect()
+            except ValueError as e:
+                print(f"⚠️  {e}")
+                print("   ComfyUI не подключен, используется stub-режим (статичные кадры)")
+                return [self._repeat_frame(keyframe, num_frames) for keyframe in keyframes]
             
             # Параметры SVD из конфига
             svd_config = self.config.get("models", {}).get("svd", {})
-            num_frames = int(duration * fps)
-            num_inference_steps = svd_config.get("num_inference_steps", 50)
-            guidance_scale = svd_config.get("guidance_scale", 7.5)
+            workflows = [
+                self.comfyui_client.generate_svd_workflow(
+                    image_path=temp_path,
+                    num_frames=num_frames,
+                    num_inference_steps=svd_config.get("num_inference_steps", 50),
+                    guidance_scale=svd_config.get("guidance_scale", 7.5)
+                )
+                for temp_path in temp_paths
+            ]
             
-            # Генерируем через ComfyUI
-            workflow = self.comfyui_client.generate_svd_workflow(
-                image_path=temp_path,
-                num_frames=num_frames,
-                num_inference_steps=num_inference_steps,
-                guidance_scale=guidance_scale
-            )
+            print(f"Отправка {len(workflows)} клипов в очередь ComfyUI...")
+            results = await self.comfyui_client.run_workflows(workflows)
             
-            prompt_id = self.comfyui_client.queue_prompt(workflow)
-            results = self.comfyui_client.wait_for_completion(prompt_id)
-            
-            # Получаем сгенерированные кадры
-            # Примечание: реальная реализация зависит от структуры ответа ComfyUI
-            # Здесь упрощённая версия - возвращаем статичный кадр, повторённый N раз
-            frames = []
-            keyframe_array = np.array(keyframe)
-            
-            for _ in range(num_frames):
-                frames.append(keyframe_array)
-            
-            return np.array(frames)
-            
-        except ValueError as e:
-            # Ошибки связанные с отсутствием нод или подключением
-            error_msg = str(e)
-            if "does not exist" in error_msg or "Нода не найдена" in error_msg:
-                print(f"⚠️  {error_msg}")
-                print("   Используется stub-режим (статичные кадры)")
-            else:
-                print(f"⚠️  {error_msg}")
-                print("   Используется stub-режим")
-            # Возвращаем статичный клип как fallback
-            keyframe_array = np.array(keyframe)
-            num_frames = int(duration * fps)
-            return np.array([keyframe_array] * num_frames)
-        except Exception as e:
-            print(f"⚠️  Ошибка генерации клипа через ComfyUI: {e}")
-            print("   Используется stub-режим (статичные кадры)")
-            # Возвращаем статичный клип как fallback
-            keyframe_array = np.array(keyframe)
-            num_frames = int(duration * fps)
-            return np.array([keyframe_array] * num_frames)
+            clips = []
+            for i, (keyframe, result) in enumerate(zip(keyframes, results)):
+                if isinstance(result, Exception):
+                    # Ошибки связанные с отсутствием нод или выполнением
+                    print(f"⚠️  Клип {i+1}: {result}")
+                    print("   Используется stub-режим (статичные кадры)")
+                # Получаем сгенерированные кадры
+                # Примечание: реальная реализация зависит от структуры ответа ComfyUI
+                # Здесь упрощённая версия - возвращаем статичный кадр, повторённый N раз
+                clips.append(self._repeat_frame(keyframe, num_frames))
+            return clips
         
         finally:
-            # Удаляем временный файл
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            # Удаляем временные файлы
+            for temp_path in temp_paths:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
     
-    def _concatenate_clips(self, clips: List[np.ndarray], fps: int) -> np.ndarray:
+    @staticmethod
+    def _repeat_frame(keyframe: Image.Image, num_frames: int) -> Iterator[np.ndarray]:
         """
-        Склейка клипов в один ролик
+        Статичный клип: один и тот же массив кадра, выданный num_frames раз (без копий)
         
         Args:
-            clips: Список массивов кадров
-            fps: FPS
+            keyframe: Ключевой кадр
+            num_frames: Количество кадров
             
         Returns:
-            np.ndarray: Объединённый массив кадров
+            Iterator[np.ndarray]: Итератор кадров
+        """
+        keyframe_array = np.asarray(keyframe.convert('RGB'))
+        return (keyframe_array for _ in range(num_frames))
+    
+    def _concatenate_clips(
+        self,
+        clips: List[Iterable[np.ndarray]],
+        size: Tuple[int, int]
+    ) -> Iterator[np.ndarray]:
+        """
+        Склейка клипов в один поток кадров
+        
+        Args:
+            clips: Список итераторов кадров
+            size: Целевой размер (ширина, высота)
+            
+        Returns:
+            Iterator[np.ndarray]: Кадры ролика по одному
         """
         if not clips:
             raise ValueError("Список клипов пуст")
         
-        # Проверяем размеры и приводим к одному
-        target_height = clips[0].shape[1]
-        target_width = clips[0].shape[2]
+        target_width, target_height = size
+        last_source = None
+        last_resized = None
         
-        normalized_clips = []
         for clip in clips:
-            if clip.shape[1] != target_height or clip.shape[2] != target_width:
-                # Ресайзим
-                resized_frames = []
-                for frame in clip:
+            for frame in clip:
+                if frame.shape[0] == target_height and frame.shape[1] == target_width:
+                    yield frame
+                    continue
+                # Ресайзим только кадры другого размера; повтор того же кадра не пересчитываем
+                if frame is not last_source:
                     frame_img = Image.fromarray(frame)
                     frame_img = frame_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-                    resized_frames.append(np.array(frame_img))
-                clip = np.array(resized_frames)
-            normalized_clips.append(clip)
-        
-        # Объединяем все кадры
-        video = np.concatenate(normalized_clips, axis=0)
-        return video
+                    last_source, last_resized = frame, np.asarray(frame_img)
+                yield last_resized
     
-    def _save_video(self, video: np.ndarray, output_path: str, fps: int):
+    def _open_ffmpeg_writer(self, output_path: str, fps: int, size: Tuple[int, int]) -> subprocess.Popen:
         """
-        Сохранение видео в файл
+        Запуск ffmpeg, принимающего сырые RGB-кадры через stdin (H.264)
         
         Args:
-            video: Массив кадров (N, H, W, 3)
             output_path: Путь для сохранения
             fps: FPS
+            size: Размер кадра (ширина, высота)
+            
+        Returns:
+            subprocess.Popen: Процесс ffmpeg
         """
-        # Конвертируем RGB в BGR для OpenCV
-        video_bgr = video[..., ::-1]
-        
-        # Получаем размеры
-        height, width = video_bgr.shape[1:3]
-        
-        # Создаём VideoWriter
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        import imageio_ffmpeg
+        
+        width, height = size
+        command = [
+            imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p",
+            output_path
+        ]
+        return subprocess.Popen(command, stdin=subprocess.PIPE)
+    
+    def _save_video(
+        self,
+        frames: Iterable[np.ndarray],
+        output_path: str,
+        fps: int,
+        size: Tuple[int, int]
+    ):
+        """
+        Потоковая запись видео в файл: кадры кодируются по мере поступления
         
-        for frame in video_bgr:
-            out.write(frame)
+        Args:
+            frames: Итератор кадров (H, W, 3) RGB
+            output_path: Путь для сохранения
+            fps: FPS
+            size: Размер кадра (ширина, высота)
+        """
+        writer = self.config.get("generation", {}).get("video_writer", "opencv")
+        
+        if writer == "ffmpeg":
+            process = self._open_ffmpeg_writer(output_path, fps, size)
+            try:
+                for frame in frames:
+                    process.stdin.write(np.ascontiguousarray(frame).tobytes())
+            finally:
+                process.stdin.close()
+                process.wait()
+            if process.returncode != 0:
+                raise RuntimeError(f"ffmpeg завершился с кодом {process.returncode}")
+        else:
+            # Создаём VideoWriter
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_path, fourcc, fps, size)
+            bgr = None
+            last_frame = None
+            try:
+                for frame in frames:
+                    # Конвертируем RGB в BGR для OpenCV в один переиспользуемый буфер
+                    if frame is not last_frame:
+                        bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=bgr)
+                        last_frame = frame
+                    out.write(bgr)
+            finally:
+                out.release()
         
-        out.release()
         print(f"Видео сохранено: {output_path}")
+    
+    def close(self):
+        """Закрытие соединений с ComfyUI и event loop генератора (повторный вызов ничего не делает)"""
+        if self._loop.is_closed():
+            return
+        try:
+            self._loop.run_until_complete(self.comfyui_client.close())
+        finally:
+            self._loop.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
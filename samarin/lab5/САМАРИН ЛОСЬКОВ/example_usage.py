@@ -12,10 +12,9 @@ def example_generate_video():
     print("Пример 1: Генерация видео из текста")
     print("-" * 60)
     
-    generator = VideoGenerator()
-    
     text = "кот-программист бежит по коду, вокруг всплывают окна ошибок"
-    video_path = generator.generate_from_text(text, output_filename="example_video.mp4")
+    with VideoGenerator() as generator:
+        video_path = generator.generate_from_text(text, output_filename="example_video.mp4")
     
     print(f"Видео сохранено: {video_path}")
 
@@ -50,8 +49,8 @@ def example_full_pipeline():
     text = "робот рисует картину в космосе, звёзды мерцают на фоне"
     
     # Генерируем
-    generator = VideoGenerator()
-    video_path = generator.generate_from_text(text)
+    with VideoGenerator() as generator:
+        video_path = generator.generate_from_text(text)
     
     # Оцениваем
     evaluator = Webench2Evaluator()
@@ -9,6 +9,8 @@ from flask_cors import CORS
 from pathlib import Path
 import pandas as pd
 
+from webench2.catalog import ResultsCatalog
+
 app = Flask(__name__)
 CORS(app)
 
@@ -19,6 +21,26 @@ VIDEOS_DIR = BASE_DIR / "outputs" / "videos"
 BENCHMARK_DIR = RESULTS_DIR / "benchmark"
 COMPARISONS_DIR = RESULTS_DIR / "comparisons"
 
+# Индекс результатов: списки и сводка читаются из SQLite, а не из JSON-файлов
+catalog = ResultsCatalog(RESULTS_DIR / "catalog.sqlite")
+catalog.backfill(RESULTS_DIR, BENCHMARK_DIR, COMPARISONS_DIR)
+
+MAX_PAGE_SIZE = 200
+
+
+def _page_args():
+    """Параметры пагинации limit/offset из query string"""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    return limit, offset
+
+
+def _paginated(items, total):
+    """JSON-список страницы; общее количество — в заголовке X-Total-Count"""
+    response = jsonify(items)
+    response.headers['X-Total-Count'] = str(total)
+    return response
+
 
 @app.route('/')
 def index():
@@ -61,22 +83,10 @@ def get_metrics(video_name):
 
 @app.route('/api/benchmark/runs')
 def list_benchmark_runs():
-    """Список всех запусков бенчмарка"""
-    runs = []
-    if BENCHMARK_DIR.exists():
-        for run_file in BENCHMARK_DIR.glob("benchmark_*.json"):
-            with open(run_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                runs.append({
-                    "file": run_file.name,
-                    "timestamp": data.get("timestamp", ""),
-                    "model_version": data.get("model_version", "unknown"),
-                    "num_prompts": len(data.get("prompts", []))
-                })
-    
-    # Сортируем по времени (новые первыми)
-    runs.sort(key=lambda x: x["timestamp"], reverse=True)
-    return jsonify(runs)
+    """Список запусков бенчмарка (новые первыми), ?limit=&offset="""
+    limit, offset = _page_args()
+    runs, total = catalog.list_benchmark_runs(limit, offset)
+    return _paginated(runs, total)
 
 
 @app.route('/api/benchmark/<run_file>')
@@ -93,22 +103,10 @@ def get_benchmark_run(run_file):
 
 @app.route('/api/comparisons')
 def list_comparisons():
-    """Список всех сравнений моделей"""
-    comparisons = []
-    if COMPARISONS_DIR.exists():
-        for comp_file in COMPARISONS_DIR.glob("comparison_*.json"):
-            with open(comp_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                comparisons.append({
-                    "file": comp_file.name,
-                    "timestamp": data.get("timestamp", ""),
-                    "model_a": data.get("model_a", "unknown"),
-                    "model_b": data.get("model_b", "unknown"),
-                    "num_comparisons": len(data.get("comparisons", []))
-                })
-    
-    comparisons.sort(key=lambda x: x["timestamp"], reverse=True)
-    return jsonify(comparisons)
+    """Список сравнений моделей (новые первыми), ?limit=&offset="""
+    limit, offset = _page_args()
+    comparisons, total = catalog.list_comparisons(limit, offset)
+    return _paginated(comparisons, total)
 
 
 @app.route('/api/comparisons/<comp_file>')
@@ -126,46 +124,14 @@ def get_comparison(comp_file):
 @app.route('/api/analytics/summary')
 def get_analytics_summary():
     """Сводная аналитика по всем метрикам"""
-    summary = {
-        "total_videos": 0,
-        "total_benchmark_runs": 0,
-        "total_comparisons": 0,
-        "average_quality_index": 0.0,
-        "average_clip_score": 0.0
-    }
+    summary = {"total_videos": 0}
     
     # Подсчитываем видео
     if VIDEOS_DIR.exists():
-        summary["total_videos"] = len(list(VIDEOS_DIR.glob("*.mp4")))
-    
-    # Подсчитываем запуски бенчмарка
-    if BENCHMARK_DIR.exists():
-        summary["total_benchmark_runs"] = len(list(BENCHMARK_DIR.glob("benchmark_*.json")))
-    
-    # Подсчитываем сравнения
-    if COMPARISONS_DIR.exists():
-        summary["total_comparisons"] = len(list(COMPARISONS_DIR.glob("comparison_*.json")))
-    
-    # Собираем метрики из всех файлов
-    quality_indices = []
-    clip_scores = []
-    
-    for metrics_file in RESULTS_DIR.glob("*_metrics.json"):
-        try:
-            with open(metrics_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if "quality_index" in data:
-                    quality_indices.append(data["quality_index"])
-                if "clip_score" in data and "mean" in data["clip_score"]:
-                    clip_scores.append(data["clip_score"]["mean"])
-        except:
-            continue
-    
-    if quality_indices:
-        summary["average_quality_index"] = sum(quality_indices) / len(quality_indices)
+        summary["total_videos"] = sum(1 for _ in VIDEOS_DIR.glob("*.mp4"))
     
-    if clip_scores:
-        summary["average_clip_score"] = sum(clip_scores) / len(clip_scores)
+    # Счётчики и средние — предагрегированная строка каталога
+    summary.update(catalog.get_summary())
     
     return jsonify(summary)
 
@@ -28,8 +28,8 @@ def generate_and_evaluate(text: str, output_name: str = None):
     print("=" * 60)
     
     # Генерируем видео
-    generator = VideoGenerator()
-    video_path = generator.generate_from_text(text, output_filename=output_name)
+    with VideoGenerator() as generator:
+        video_path = generator.generate_from_text(text, output_filename=output_name)
     
     print(f"\nВидео сгенерировано: {video_path}")
     
@@ -83,6 +83,8 @@ def main():
     bench_parser = subparsers.add_parser('benchmark', help='Запуск регрессионного бенчмарка')
     bench_parser.add_argument('--prompts', type=str, help='Путь к файлу промптов')
     bench_parser.add_argument('--version', type=str, help='Версия модели')
+    bench_parser.add_argument('--workers', type=int, help='Количество воркеров генерации')
+    bench_parser.add_argument('--no-resume', action='store_true', help='Не продолжать прогон из чекпоинта')
     
     # Команда сравнения
     comp_parser = subparsers.add_parser('compare', help='Сравнение двух моделей')
@@ -92,8 +94,8 @@ def main():
     args = parser.parse_args()
     
     if args.command == 'generate':
-        generator = VideoGenerator()
-        video_path = generator.generate_from_text(args.text, output_filename=args.output)
+        with VideoGenerator() as generator:
+            video_path = generator.generate_from_text(args.text, output_filename=args.output)
         print(f"Видео сгенерировано: {video_path}")
     
     elif args.command == 'evaluate':
@@ -107,7 +109,9 @@ def main():
     elif args.command == 'benchmark':
         run_regression_benchmark(
             prompts_file=args.prompts,
-            model_version=args.version
+            model_version=args.version,
+            num_workers=args.workers,
+            resume=not args.no_resume
         )
     
     elif args.command == 'compare':
@@ -0,0 +1,22 @@
+"""
+Тесты настроек регрессионного бенчмарка
+"""
+from webench2.benchmark import _default_generation_workers
+
+
+def keyframe_config(method, workers):
+    return {
+        "generation": {"keyframe_generation": {"method": method}},
+        "benchmark": {"generation_workers": workers},
+    }
+
+
+def test_stub_keeps_configured_workers():
+    assert _default_generation_workers(keyframe_config("stub", 3)) == 3
+    assert _default_generation_workers({}) == 2
+
+
+def test_sdxl_uses_single_worker():
+    # Каждый воркер загрузил бы свой SDXL-пайплайн на ту же видеокарту
+    assert _default_generation_workers(keyframe_config("sdxl", 2)) == 1
+    assert _default_generation_workers(keyframe_config("sdxl", 1)) == 1
@@ -0,0 +1,182 @@
+"""
+Тесты асинхронного клиента ComfyUI на локальном fake-сервере (без GPU и моделей)
+"""
+import asyncio
+
+from aiohttp import web
+
+from backend.comfyui_client import AsyncComfyUIClient
+from backend.fake_comfyui import FakeComfyUI
+
+
+async def start_fake_server(server_class=FakeComfyUI, **kwargs):
+    """Запуск FakeComfyUI (или его подкласса) на свободном порту"""
+    fake = server_class(**kwargs)
+    runner = web.AppRunner(fake.app)
+    await runner.setup()
+    site = web.TCPSite(runner, "localhost", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return fake, runner, port
+
+
+def svd_workflow(client, index):
+    return client.generate_svd_workflow(image_path=f"frame_{index}.png", num_frames=4)
+
+
+def test_run_workflows_on_fresh_client():
+    async def scenario():
+        fake, runner, port = await start_fake_server()
+        client = AsyncComfyUIClient(port=port)
+        try:
+            # Клиент ещё не подключён: все queue_prompt параллельно проходят через connect()
+            results = await client.run_workflows([svd_workflow(client, i) for i in range(5)], timeout=10)
+            sockets = len(fake.sockets)
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return results, sockets, client
+    
+    results, sockets, client = asyncio.run(scenario())
+    
+    assert sockets == 1
+    for result in results:
+        assert not isinstance(result, Exception), result
+        assert result["1"]["images"][0]["filename"].endswith("_1.png")
+    assert client.session.closed
+    assert not client.is_connected
+
+
+def test_unknown_node_fails_only_its_workflow():
+    async def scenario():
+        fake, runner, port = await start_fake_server()
+        client = AsyncComfyUIClient(port=port)
+        bad = {"1": {"inputs": {}, "class_type": "MissingNode"}}
+        try:
+            return await client.run_workflows([svd_workflow(client, 0), bad, svd_workflow(client, 2)], timeout=10)
+        finally:
+            await client.close()
+            await runner.cleanup()
+    
+    results = asyncio.run(scenario())
+    
+    assert not isinstance(results[0], Exception) and not isinstance(results[2], Exception)
+    assert isinstance(results[1], ValueError)
+    assert "Нода не найдена" in str(results[1])
+
+
+def test_close_after_server_shutdown():
+    async def scenario():
+        fake, runner, port = await start_fake_server()
+        client = AsyncComfyUIClient(port=port, reconnect_delay=0.01)
+        await client.run_workflow(svd_workflow(client, 0), timeout=10)
+        await runner.cleanup()
+        await asyncio.sleep(0.05)
+        # Слушатель переподключается к остановленному серверу — close() не должен падать
+        await client.close()
+        return client
+    
+    client = asyncio.run(scenario())
+    
+    assert client.session.closed
+
+
+class SlowAckComfyUI(FakeComfyUI):
+    """Отвечает на POST /prompt только после того, как промпт уже выполнен"""
+    
+    async def handle_prompt(self, request):
+        response = await super().handle_prompt(request)
+        await asyncio.sleep(0.3)
+        return response
+
+
+class BrokenHistoryComfyUI(FakeComfyUI):
+    """GET /history отдаёт не JSON"""
+    
+    async def handle_history(self, request):
+        return web.Response(text="<html>502 Bad Gateway</html>")
+
+
+def test_result_before_prompt_ack_and_foreign_events():
+    async def scenario():
+        fake, runner, port = await start_fake_server(SlowAckComfyUI)
+        client = AsyncComfyUIClient(port=port)
+        try:
+            result = await client.run_workflow(svd_workflow(client, 0), timeout=10)
+            # Событие завершения чужого промпта, когда своих запросов в полёте нет
+            client._dispatch({"type": "executing", "data": {"node": None, "prompt_id": "foreign"}})
+            return result, dict(client._early), dict(client._pending)
+        finally:
+            await client.close()
+            await runner.cleanup()
+    
+    result, early, pending = asyncio.run(scenario())
+    
+    assert result["1"]["images"][0]["filename"].endswith("_1.png")
+    assert early == {}
+    assert pending == {}
+
+
+def test_timed_out_prompt_is_forgotten():
+    async def scenario():
+        fake, runner, port = await start_fake_server(step_delay=0.05)
+        client = AsyncComfyUIClient(port=port)
+        try:
+            try:
+                await client.run_workflow(svd_workflow(client, 0), timeout=0.05)
+            except ValueError as e:
+                error = e
+            # Промпт всё-таки завершается на сервере уже после таймаута
+            await asyncio.sleep(0.5)
+            return error, dict(client._early), dict(client._pending)
+        finally:
+            await client.close()
+            await runner.cleanup()
+    
+    error, early, pending = asyncio.run(scenario())
+    
+    assert "не завершился" in str(error)
+    assert early == {}
+    assert pending == {}
+
+
+def test_listener_survives_broken_history_on_reconnect():
+    async def scenario():
+        fake, runner, port = await start_fake_server(BrokenHistoryComfyUI, step_delay=0.05)
+        client = AsyncComfyUIClient(port=port, reconnect_delay=0.01)
+        try:
+            prompt_id = await client.queue_prompt(svd_workflow(client, 0))
+            # Сервер рвёт WebSocket: при переподключении /history отвечает не JSON
+            await fake.sockets[client.client_id].close()
+            result = await client.wait_for_completion(prompt_id, timeout=10)
+            return result, client._listener.done(), len(fake.sockets)
+        finally:
+            await client.close()
+            await runner.cleanup()
+    
+    result, listener_done, sockets = asyncio.run(scenario())
+    
+    assert result["1"]["images"][0]["filename"].endswith("_1.png")
+    assert not listener_done
+    assert sockets == 1
+
+
+def test_video_generator_closes_loop_and_session(tmp_path, monkeypatch):
+    from PIL import Image
+    from backend.video_generator import VideoGenerator
+    
+    monkeypatch.chdir(tmp_path)
+    with VideoGenerator() as generator:
+        loop = generator._loop
+        fake, runner, port = loop.run_until_complete(start_fake_server())
+        client = generator.comfyui_client = AsyncComfyUIClient(port=port)
+        keyframes = [Image.new("RGB", (8, 8), color) for color in ("red", "green")]
+        clips = loop.run_until_complete(generator._generate_clips(keyframes, duration=0.25, fps=8))
+        assert [len(list(clip)) for clip in clips] == [2, 2]
+        assert client.is_connected
+        loop.run_until_complete(runner.cleanup())
+    
+    assert loop.is_closed()
+    assert client.session.closed
+    # Повторное закрытие безопасно
+    generator.close()
@@ -2,8 +2,22 @@
 Webench2 модуль для оценки качества видео
 """
 
-from .evaluator import Webench2Evaluator
-from .metrics import MetricsCalculator
-from .benchmark import run_regression_benchmark, compare_models
+import importlib
 
-__all__ = ['Webench2Evaluator', 'MetricsCalculator', 'run_regression_benchmark', 'compare_models']
+# Подмодули импортируются лениво: веб-интерфейсу нужен только каталог результатов,
+# и ему незачем загружать torch/transformers через evaluator и metrics
+_EXPORTS = {
+    'Webench2Evaluator': '.evaluator',
+    'MetricsCalculator': '.metrics',
+    'run_regression_benchmark': '.benchmark',
+    'compare_models': '.benchmark',
+    'ResultsCatalog': '.catalog',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
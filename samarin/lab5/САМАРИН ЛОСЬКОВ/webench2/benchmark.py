@@ -4,12 +4,17 @@
 
 import os
 import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 import pandas as pd
 from datetime import datetime
 
 from .evaluator import Webench2Evaluator
+from .catalog import ResultsCatalog
 from backend.video_generator import VideoGenerator
 
 
@@ -40,18 +45,83 @@ def load_benchmark_prompts(prompts_file: str) -> List[Dict[str, str]]:
         return []
 
 
+def _load_config() -> Dict[str, Any]:
+    """config.yaml целиком (пустой словарь, если конфиг недоступен)"""
+    config_path = os.path.join(os.path.dirname(__file__), "..", "config", "config.yaml")
+    try:
+        import yaml
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except Exception:
+        return {}
+
+
+def _default_generation_workers(config: Dict[str, Any]) -> int:
+    """
+    Число воркеров генерации по умолчанию
+    
+    Каждый воркер держит свой VideoGenerator, а значит и свой SDXL-пайплайн,
+    поэтому с method: "sdxl" воркер один — два пайплайна не помещаются на одну видеокарту.
+    """
+    workers = config.get("benchmark", {}).get("generation_workers", 2)
+    keyframe_method = config.get("generation", {}).get("keyframe_generation", {}).get("method", "stub")
+    if keyframe_method == "sdxl" and workers > 1:
+        print(f"SDXL: generation_workers={workers} из конфига снижено до 1 (пайплайн у каждого воркера свой)")
+        return 1
+    return workers
+
+
+def load_checkpoint(checkpoint_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Загрузка успешно обработанных промптов из JSONL-чекпоинта
+    
+    Args:
+        checkpoint_path: Путь к файлу чекпоинта
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: Записи результатов по prompt_id
+    """
+    done = {}
+    if not os.path.exists(checkpoint_path):
+        return done
+    
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Последняя строка могла оборваться при падении процесса
+                continue
+            # Промпты с ошибкой при возобновлении запускаются заново
+            if "metrics" in entry:
+                done[entry["prompt_id"]] = entry
+    return done
+
+
 def run_regression_benchmark(
     prompts_file: Optional[str] = None,
     output_dir: Optional[str] = None,
-    model_version: Optional[str] = None
+    model_version: Optional[str] = None,
+    num_workers: Optional[int] = None,
+    resume: bool = True
 ) -> Dict[str, Any]:
     """
     Запуск регрессионного бенчмарка на наборе фиксированных промптов
     
+    Генерация идёт на пуле воркеров, готовые видео через очередь попадают на оценку,
+    поэтому генерация следующих промптов перекрывается с оценкой предыдущих.
+    Каждый результат сразу дописывается в JSONL-чекпоинт, и прерванный прогон
+    той же версии модели продолжается с места падения.
+    
     Args:
         prompts_file: Путь к файлу с промптами
         output_dir: Директория для сохранения результатов
         model_version: Версия модели (для идентификации)
+        num_workers: Количество воркеров генерации (по умолчанию из config.yaml, с SDXL — 1)
+        resume: Продолжать ли прогон из существующего чекпоинта
         
     Returns:
         dict: Результаты бенчмарка
@@ -64,6 +134,9 @@ def run_regression_benchmark(
     
     os.makedirs(output_dir, exist_ok=True)
     
+    if num_workers is None:
+        num_workers = _default_generation_workers(_load_config())
+    
     # Загружаем промпты
     prompts = load_benchmark_prompts(prompts_file)
     
@@ -75,59 +148,117 @@ def run_regression_benchmark(
             {"id": "test_3", "text": "дерево растёт в пустыне, вокруг появляются цветы"}
         ]
     
+    version = model_version or "unknown"
+    checkpoint_path = os.path.join(output_dir, f"checkpoint_{version}.jsonl")
+    done = load_checkpoint(checkpoint_path) if resume else {}
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    
+    pending = [
+        (i, prompt_data) for i, prompt_data in enumerate(prompts)
+        if prompt_data.get("id", f"prompt_{i}") not in done
+    ]
+    
     print(f"Запуск регрессионного бенчмарка на {len(prompts)} промптах")
+    if done:
+        print(f"Возобновление из чекпоинта: {len(done)} промптов уже обработано")
     
-    # Инициализируем генератор и оценщик
-    generator = VideoGenerator()
-    evaluator = Webench2Evaluator()
+    run_start = time.perf_counter()
     
-    results = {
-        "model_version": model_version or "unknown",
-        "timestamp": datetime.now().isoformat(),
-        "prompts": [],
-        "summary": {}
-    }
+    # Оценщик один (CLIP на устройстве), генераторы — по одному на поток воркера
+    evaluator = Webench2Evaluator() if pending else None
+    local = threading.local()
+    generators: List[VideoGenerator] = []
     
-    all_metrics = []
+    def get_generator() -> VideoGenerator:
+        if not hasattr(local, "generator"):
+            local.generator = VideoGenerator()
+            generators.append(local.generator)
+        return local.generator
     
-    for i, prompt_data in enumerate(prompts):
-        prompt_id = prompt_data.get("id", f"prompt_{i}")
+    # Готовые видео (или ошибки генерации) в порядке завершения
+    ready = queue.Queue()
+    
+    def generate(index: int, prompt_data: Dict[str, Any]):
+        prompt_id = prompt_data.get("id", f"prompt_{index}")
         prompt_text = prompt_data.get("text", "")
-        category = prompt_data.get("category", "general")
-        
-        print(f"\n[{i+1}/{len(prompts)}] Обработка промпта: {prompt_id}")
+        print(f"\n[{index+1}/{len(prompts)}] Генерация: {prompt_id}")
         print(f"  Текст: {prompt_text[:60]}...")
         
+        entry = {
+            "index": index,
+            "prompt_id": prompt_id,
+            "prompt_text": prompt_text,
+            "category": prompt_data.get("category", "general"),
+            "timing": {}
+        }
+        start = time.perf_counter()
         try:
-            # Генерируем видео
-            video_path = generator.generate_from_text(prompt_text)
-            
-            # Оцениваем видео
-            metrics = evaluator.evaluate_video(video_path, prompt_text, save_results=False)
+            entry["video_path"] = get_generator().generate_from_text(prompt_text)
+        except Exception as e:
+            print(f"  Ошибка генерации промпта {prompt_id}: {e}")
+            entry["error"] = str(e)
+        entry["timing"]["generation_s"] = time.perf_counter() - start
+        entry["_queued_at"] = time.perf_counter()
+        ready.put(entry)
+    
+    checkpoint_lock = threading.Lock()
+    
+    def append_checkpoint(entry: Dict[str, Any]):
+        with checkpoint_lock, open(checkpoint_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    with ThreadPoolExecutor(max_workers=max(1, num_workers), thread_name_prefix="bench-gen") as pool:
+        for index, prompt_data in pending:
+            pool.submit(generate, index, prompt_data)
+        
+        # Оценка в основном потоке по мере готовности видео
+        for _ in range(len(pending)):
+            entry = ready.get()
+            entry["timing"]["queue_wait_s"] = time.perf_counter() - entry.pop("_queued_at")
             
-            # Сохраняем результаты
-            result_entry = {
-                "prompt_id": prompt_id,
-                "prompt_text": prompt_text,
-                "category": category,
-                "video_path": video_path,
-                "metrics": metrics
-            }
-            results["prompts"].append(result_entry)
-            all_metrics.append(metrics)
+            if "error" not in entry:
+                print(f"\nОценка: {entry['prompt_id']}")
+                start = time.perf_counter()
+                try:
+                    entry["metrics"] = evaluator.evaluate_video(
+                        entry["video_path"], entry["prompt_text"], save_results=False
+                    )
+                except Exception as e:
+                    print(f"  Ошибка оценки промпта {entry['prompt_id']}: {e}")
+                    entry["error"] = str(e)
+                entry["timing"]["evaluation_s"] = time.perf_counter() - start
             
-        except Exception as e:
-            print(f"  Ошибка при обработке промпта {prompt_id}: {e}")
-            results["prompts"].append({
-                "prompt_id": prompt_id,
-                "prompt_text": prompt_text,
-                "category": category,
-                "error": str(e)
-            })
+            append_checkpoint(entry)
+            done[entry["prompt_id"]] = entry
+    
+    # Воркеры завершены — закрываем их event loop и сессии ComfyUI
+    for generator in generators:
+        generator.close()
+    
+    results = {
+        "model_version": version,
+        "timestamp": datetime.now().isoformat(),
+        "prompts": [],
+        "summary": {}
+    }
+    
+    # Восстанавливаем исходный порядок промптов
+    for i, prompt_data in enumerate(prompts):
+        entry = done.get(prompt_data.get("id", f"prompt_{i}"))
+        if entry is not None:
+            entry = {k: v for k, v in entry.items() if k != "index"}
+            results["prompts"].append(entry)
+    
+    all_metrics = [p["metrics"] for p in results["prompts"] if "metrics" in p]
+    timings = [p["timing"] for p in results["prompts"] if "timing" in p]
     
     # Вычисляем сводную статистику
-    if all_metrics:
-        results["summary"] = calculate_summary_statistics(all_metrics)
+    if all_metrics or timings:
+        results["summary"] = calculate_summary_statistics(all_metrics, timings)
+        results["summary"].setdefault("timing", {})["wall_s"] = time.perf_counter() - run_start
     
     # Сохраняем результаты
     timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -136,17 +267,28 @@ def run_regression_benchmark(
     with open(results_file, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
     
+    ResultsCatalog().add_benchmark_run(os.path.basename(results_file), results)
+    
+    # Все промпты обработаны успешно — чекпоинт больше не нужен;
+    # при ошибках он остаётся, и повторный запуск перезапустит только упавшие промпты
+    if len(all_metrics) == len(prompts) and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    
     print(f"\nБенчмарк завершён. Результаты сохранены: {results_file}")
     
     return results
 
 
-def calculate_summary_statistics(metrics_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+def calculate_summary_statistics(
+    metrics_list: List[Dict[str, Any]],
+    timings: Optional[List[Dict[str, float]]] = None
+) -> Dict[str, Any]:
     """
     Вычисление сводной статистики по всем метрикам
     
     Args:
         metrics_list: Список словарей с метриками
+        timings: Время этапов по каждому промпту (generation_s, queue_wait_s, evaluation_s)
         
     Returns:
         dict: Сводная статистика
@@ -190,6 +332,18 @@ def calculate_summary_statistics(metrics_list: List[Dict[str, Any]]) -> Dict[str
     if dark_ratios:
         summary["dark_frames_ratio"] = float(sum(dark_ratios) / len(dark_ratios))
     
+    # Время по этапам конвейера
+    if timings:
+        summary["timing"] = {}
+        for stage in ("generation_s", "queue_wait_s", "evaluation_s"):
+            values = [t[stage] for t in timings if stage in t]
+            if values:
+                summary["timing"][stage] = {
+                    "mean": float(sum(values) / len(values)),
+                    "max": float(max(values)),
+                    "total": float(sum(values))
+                }
+    
     return summary
 
 
@@ -265,6 +419,8 @@ def compare_models(
     with open(comparison_file, 'w', encoding='utf-8') as f:
         json.dump(comparison, f, indent=2, ensure_ascii=False)
     
+    ResultsCatalog().add_comparison(os.path.basename(comparison_file), comparison)
+    
     print(f"Сравнение сохранено: {comparison_file}")
     
     return comparison
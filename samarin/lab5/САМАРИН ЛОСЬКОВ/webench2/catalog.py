@@ -0,0 +1,325 @@
+"""
+Индексированный каталог результатов (SQLite) для интерфейса аналитики
+
+Оценщик и бенчмарк записывают сюда строку на каждый сохранённый JSON,
+а сводные счётчики и суммы поддерживаются триггерами, поэтому интерфейсу
+не нужно перечитывать файлы результатов на каждый запрос.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+DEFAULT_CATALOG_PATH = Path(__file__).parent.parent / "results" / "catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    file TEXT PRIMARY KEY,
+    video_path TEXT,
+    prompt TEXT,
+    quality_index REAL,
+    clip_score_mean REAL
+);
+
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+    file TEXT PRIMARY KEY,
+    timestamp TEXT,
+    model_version TEXT,
+    num_prompts INTEGER,
+    quality_index_mean REAL,
+    clip_score_mean REAL
+);
+CREATE INDEX IF NOT EXISTS idx_benchmark_runs_timestamp ON benchmark_runs (timestamp DESC);
+
+CREATE TABLE IF NOT EXISTS comparisons (
+    file TEXT PRIMARY KEY,
+    timestamp TEXT,
+    model_a TEXT,
+    model_b TEXT,
+    num_comparisons INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_comparisons_timestamp ON comparisons (timestamp DESC);
+
+-- Единственная строка с предагрегированной сводкой
+CREATE TABLE IF NOT EXISTS summary (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    benchmark_runs INTEGER NOT NULL DEFAULT 0,
+    comparisons INTEGER NOT NULL DEFAULT 0,
+    quality_sum REAL NOT NULL DEFAULT 0,
+    quality_count INTEGER NOT NULL DEFAULT 0,
+    clip_sum REAL NOT NULL DEFAULT 0,
+    clip_count INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO summary (id) VALUES (1);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TRIGGER IF NOT EXISTS metrics_ai AFTER INSERT ON metrics BEGIN
+    UPDATE summary SET
+        quality_sum = quality_sum + COALESCE(NEW.quality_index, 0),
+        quality_count = quality_count + (NEW.quality_index IS NOT NULL),
+        clip_sum = clip_sum + COALESCE(NEW.clip_score_mean, 0),
+        clip_count = clip_count + (NEW.clip_score_mean IS NOT NULL)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS metrics_au AFTER UPDATE ON metrics BEGIN
+    UPDATE summary SET
+        quality_sum = quality_sum - COALESCE(OLD.quality_index, 0) + COALESCE(NEW.quality_index, 0),
+        quality_count = quality_count - (OLD.quality_index IS NOT NULL) + (NEW.quality_index IS NOT NULL),
+        clip_sum = clip_sum - COALESCE(OLD.clip_score_mean, 0) + COALESCE(NEW.clip_score_mean, 0),
+        clip_count = clip_count - (OLD.clip_score_mean IS NOT NULL) + (NEW.clip_score_mean IS NOT NULL)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS metrics_ad AFTER DELETE ON metrics BEGIN
+    UPDATE summary SET
+        quality_sum = quality_sum - COALESCE(OLD.quality_index, 0),
+        quality_count = quality_count - (OLD.quality_index IS NOT NULL),
+        clip_sum = clip_sum - COALESCE(OLD.clip_score_mean, 0),
+        clip_count = clip_count - (OLD.clip_score_mean IS NOT NULL)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS benchmark_runs_ai AFTER INSERT ON benchmark_runs BEGIN
+    UPDATE summary SET benchmark_runs = benchmark_runs + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS benchmark_runs_ad AFTER DELETE ON benchmark_runs BEGIN
+    UPDATE summary SET benchmark_runs = benchmark_runs - 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS comparisons_ai AFTER INSERT ON comparisons BEGIN
+    UPDATE summary SET comparisons = comparisons + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS comparisons_ad AFTER DELETE ON comparisons BEGIN
+    UPDATE summary SET comparisons = comparisons - 1 WHERE id = 1;
+END;
+"""
+
+
+class ResultsCatalog:
+    """Каталог результатов оценки, бенчмарков и сравнений"""
+    
+    def __init__(self, db_path: Optional[Union[str, Path]] = None):
+        """
+        Инициализация каталога
+        
+        Args:
+            db_path: Путь к файлу SQLite (по умолчанию results/catalog.sqlite)
+        """
+        self.db_path = Path(db_path or DEFAULT_CATALOG_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._backfill_lock = threading.Lock()
+        
+        with self._connect() as conn:
+            # WAL: бенчмарк пишет, пока веб-интерфейс читает
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        """Короткоживущее соединение на операцию (безопасно для потоков Flask)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    # ---- Запись ----
+    
+    def add_metrics(self, file_name: str, metrics: Dict[str, Any]):
+        """
+        Индексация файла метрик видео (*_metrics.json)
+        
+        Args:
+            file_name: Имя файла метрик
+            metrics: Содержимое файла
+        """
+        metadata = metrics.get("metadata", {})
+        row = (
+            file_name,
+            metadata.get("video_path"),
+            metadata.get("prompt"),
+            metrics.get("quality_index"),
+            metrics.get("clip_score", {}).get("mean"),
+        )
+        with self._connect() as conn:
+            # UPSERT, а не REPLACE: REPLACE не вызывает DELETE-триггеры и сводка бы разошлась
+            conn.execute(
+                """
+                INSERT INTO metrics (file, video_path, prompt, quality_index, clip_score_mean)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (file) DO UPDATE SET
+                    video_path = excluded.video_path,
+                    prompt = excluded.prompt,
+                    quality_index = excluded.quality_index,
+                    clip_score_mean = excluded.clip_score_mean
+                """,
+                row
+            )
+    
+    def add_benchmark_run(self, file_name: str, results: Dict[str, Any]):
+        """
+        Индексация файла запуска бенчмарка (benchmark_*.json)
+        
+        Args:
+            file_name: Имя файла
+            results: Результаты run_regression_benchmark
+        """
+        summary = results.get("summary", {})
+        row = (
+            file_name,
+            results.get("timestamp", ""),
+            results.get("model_version", "unknown"),
+            len(results.get("prompts", [])),
+            summary.get("quality_index", {}).get("mean"),
+            summary.get("clip_score", {}).get("mean"),
+        )
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO benchmark_runs
+                    (file, timestamp, model_version, num_prompts, quality_index_mean, clip_score_mean)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (file) DO UPDATE SET
+                    timestamp = excluded.timestamp,
+                    model_version = excluded.model_version,
+                    num_prompts = excluded.num_prompts,
+                    quality_index_mean = excluded.quality_index_mean,
+                    clip_score_mean = excluded.clip_score_mean
+                """,
+                row
+            )
+    
+    def add_comparison(self, file_name: str, comparison: Dict[str, Any]):
+        """
+        Индексация файла сравнения моделей (comparison_*.json)
+        
+        Args:
+            file_name: Имя файла
+            comparison: Результаты compare_models
+        """
+        row = (
+            file_name,
+            comparison.get("timestamp", ""),
+            comparison.get("model_a", "unknown"),
+            comparison.get("model_b", "unknown"),
+            len(comparison.get("comparisons", [])),
+        )
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO comparisons (file, timestamp, model_a, model_b, num_comparisons)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (file) DO UPDATE SET
+                    timestamp = excluded.timestamp,
+                    model_a = excluded.model_a,
+                    model_b = excluded.model_b,
+                    num_comparisons = excluded.num_comparisons
+                """,
+                row
+            )
+    
+    # ---- Чтение ----
+    
+    def list_benchmark_runs(self, limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Страница запусков бенчмарка (новые первыми)
+        
+        Returns:
+            Tuple[List[Dict[str, Any]], int]: (записи страницы, всего записей)
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT file, timestamp, model_version, num_prompts, quality_index_mean, clip_score_mean
+                FROM benchmark_runs ORDER BY timestamp DESC LIMIT ? OFFSET ?
+                """,
+                (limit, offset)
+            ).fetchall()
+            total = conn.execute("SELECT benchmark_runs FROM summary WHERE id = 1").fetchone()[0]
+        return [dict(r) for r in rows], total
+    
+    def list_comparisons(self, limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Страница сравнений моделей (новые первыми)
+        
+        Returns:
+            Tuple[List[Dict[str, Any]], int]: (записи страницы, всего записей)
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT file, timestamp, model_a, model_b, num_comparisons
+                FROM comparisons ORDER BY timestamp DESC LIMIT ? OFFSET ?
+                """,
+                (limit, offset)
+            ).fetchall()
+            total = conn.execute("SELECT comparisons FROM summary WHERE id = 1").fetchone()[0]
+        return [dict(r) for r in rows], total
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """Предагрегированная сводка: одна строка, без чтения файлов"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM summary WHERE id = 1").fetchone()
+        return {
+            "total_benchmark_runs": row["benchmark_runs"],
+            "total_comparisons": row["comparisons"],
+            "average_quality_index": row["quality_sum"] / row["quality_count"] if row["quality_count"] else 0.0,
+            "average_clip_score": row["clip_sum"] / row["clip_count"] if row["clip_count"] else 0.0,
+        }
+    
+    # ---- Первичное заполнение ----
+    
+    def backfill(self, results_dir: Union[str, Path], benchmark_dir: Union[str, Path],
+                 comparisons_dir: Union[str, Path], force: bool = False) -> int:
+        """
+        Однократная индексация уже существующих JSON-файлов результатов
+        
+        Args:
+            results_dir: Директория с *_metrics.json
+            benchmark_dir: Директория с benchmark_*.json
+            comparisons_dir: Директория с comparison_*.json
+            force: Переиндексировать, даже если заполнение уже выполнялось
+        
+        Returns:
+            int: Количество проиндексированных файлов
+        """
+        with self._backfill_lock:
+            with self._connect() as conn:
+                done = conn.execute("SELECT value FROM meta WHERE key = 'backfilled'").fetchone()
+            if done and not force:
+                return 0
+            
+            sources = [
+                (Path(results_dir), "*_metrics.json", self.add_metrics),
+                (Path(benchmark_dir), "benchmark_*.json", self.add_benchmark_run),
+                (Path(comparisons_dir), "comparison_*.json", self.add_comparison),
+            ]
+            count = 0
+            for directory, pattern, add in sources:
+                if not directory.exists():
+                    continue
+                for path in directory.glob(pattern):
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            add(path.name, json.load(f))
+                        count += 1
+                    except Exception as e:
+                        print(f"Пропуск {path.name} при индексации: {e}")
+            
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', '1')")
+            
+            print(f"Каталог результатов: проиндексировано файлов: {count}")
+            return count
@@ -7,8 +7,10 @@ import json
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 import numpy as np
+from PIL import Image
 
 from .metrics import MetricsCalculator
+from .catalog import ResultsCatalog
 
 
 class Webench2Evaluator:
@@ -36,6 +38,9 @@ class Webench2Evaluator:
         # Директория для результатов
         self.results_dir = self.config.get("paths", {}).get("results", "results")
         os.makedirs(self.results_dir, exist_ok=True)
+        
+        # Индекс результатов для интерфейса аналитики
+        self.catalog = ResultsCatalog()
     
     def _load_config(self, config_path: Optional[str]) -> Dict[str, Any]:
         """Загрузка конфигурации"""
@@ -72,9 +77,10 @@ class Webench2Evaluator:
         
         # Извлекаем кадры
         frames_per_second = self.frame_sampling_config.get("frames_per_second", 1.0)
-        frames = self.metrics_calculator.extract_frames(video_path, frames_per_second)
+        # Кадры декодируются один раз в тензор uint8 (N, H, W, 3) и дальше не копируются
+        frames = self.metrics_calculator.extract_frame_array(video_path, frames_per_second)
         
-        if not frames:
+        if len(frames) == 0:
             raise ValueError(f"Не удалось извлечь кадры из видео: {video_path}")
         
         print(f"Извлечено кадров: {len(frames)}")
@@ -85,12 +91,9 @@ class Webench2Evaluator:
         # CLIPScore по кадрам
         if self.metrics_config.get("clip_score", {}).get("enabled", True):
             print("Вычисление CLIPScore...")
-            clip_scores = []
-            for i, frame in enumerate(frames):
-                score = self.metrics_calculator.calculate_clip_score(frame, prompt_text)
-                clip_scores.append(score)
-                if (i + 1) % 10 == 0:
-                    print(f"  Обработано кадров: {i+1}/{len(frames)}")
+            batch_size = self.metrics_config.get("clip_score", {}).get("batch_size", 16)
+            # Промпт кодируется один раз, кадры идут через CLIP пачками
+            clip_scores = self.metrics_calculator.calculate_clip_scores(frames, prompt_text, batch_size)
             
             metrics["clip_score"] = {
                 "scores": clip_scores,
@@ -110,7 +113,7 @@ class Webench2Evaluator:
             
             image_rewards = []
             for idx in sample_indices:
-                score = self.metrics_calculator.calculate_image_reward(frames[idx])
+                score = self.metrics_calculator.calculate_image_reward(Image.fromarray(frames[idx]))
                 image_rewards.append(score)
             
             metrics["image_reward"] = {
@@ -121,46 +124,46 @@ class Webench2Evaluator:
                 "std": float(np.std(image_rewards))
             }
         
-        # Технические проверки
+        # Технические проверки — один векторизованный проход по тензору кадров
         stability_config = self.metrics_config.get("stability", {})
+        print("Технические проверки кадров...")
+        stability = self.metrics_calculator.compute_stability(
+            frames,
+            dark_threshold=stability_config.get("brightness_threshold", 0.1),
+            overexposure_threshold=stability_config.get("overexposure_threshold", 0.9)
+        )
         
         if stability_config.get("check_duplicates", True):
-            print("Проверка на статичные кадры...")
-            has_static, static_indices = self.metrics_calculator.check_static_frames(frames)
+            static_indices = stability["static_indices"]
             metrics["static_frames"] = {
-                "has_static": has_static,
+                "has_static": len(static_indices) > 0,
                 "indices": static_indices,
                 "count": len(static_indices),
-                "ratio": len(static_indices) / len(frames) if frames else 0.0
+                "ratio": len(static_indices) / len(frames)
             }
         
         if stability_config.get("check_dark_frames", True):
-            print("Проверка на тёмные кадры...")
-            threshold = stability_config.get("brightness_threshold", 0.1)
-            has_dark, dark_indices, dark_ratio = self.metrics_calculator.check_dark_frames(frames, threshold)
+            dark_indices = stability["dark_indices"]
             metrics["dark_frames"] = {
-                "has_dark": has_dark,
+                "has_dark": len(dark_indices) > 0,
                 "indices": dark_indices,
                 "count": len(dark_indices),
-                "ratio": dark_ratio
+                "ratio": len(dark_indices) / len(frames)
             }
         
         if stability_config.get("check_overexposed", True):
-            print("Проверка на пересвеченные кадры...")
-            threshold = stability_config.get("overexposure_threshold", 0.9)
-            has_overexposed, overexposed_indices, overexposed_ratio = self.metrics_calculator.check_overexposed_frames(frames, threshold)
+            overexposed_indices = stability["overexposed_indices"]
             metrics["overexposed_frames"] = {
-                "has_overexposed": has_overexposed,
+                "has_overexposed": len(overexposed_indices) > 0,
                 "indices": overexposed_indices,
                 "count": len(overexposed_indices),
-                "ratio": overexposed_ratio
+                "ratio": len(overexposed_indices) / len(frames)
             }
         
         # Проверка скачков яркости
-        print("Проверка скачков яркости...")
-        has_jumps, jump_indices = self.metrics_calculator.check_brightness_jumps(frames)
+        jump_indices = stability["jump_indices"]
         metrics["brightness_jumps"] = {
-            "has_jumps": has_jumps,
+            "has_jumps": len(jump_indices) > 0,
             "indices": jump_indices,
             "count": len(jump_indices)
         }
@@ -247,4 +250,6 @@ class Webench2Evaluator:
         with open(results_file, 'w', encoding='utf-8') as f:
             json.dump(metrics_to_save, f, indent=2, ensure_ascii=False)
         
+        self.catalog.add_metrics(os.path.basename(results_file), metrics_to_save)
+        
         print(f"Результаты сохранены: {results_file}")
@@ -4,13 +4,43 @@
 
 import numpy as np
 import cv2
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Sequence, Union
 from PIL import Image
 import torch
 from transformers import CLIPProcessor, CLIPModel
 import os
 
 
+FrameLike = Union[Image.Image, np.ndarray]
+
+
+def stack_frames(frames: Union[Sequence[FrameLike], np.ndarray]) -> np.ndarray:
+    """
+    Приведение кадров к одному тензору uint8 формы (N, H, W, 3)
+    
+    Args:
+        frames: Список PIL-кадров/массивов или уже собранный тензор
+        
+    Returns:
+        np.ndarray: Тензор кадров
+    """
+    if isinstance(frames, np.ndarray):
+        return frames
+    if not frames:
+        return np.zeros((0, 0, 0, 3), dtype=np.uint8)
+    return np.stack([
+        np.asarray(f.convert('RGB') if isinstance(f, Image.Image) else f, dtype=np.uint8)
+        for f in frames
+    ])
+
+
+def frame_brightness(stack: np.ndarray) -> np.ndarray:
+    """Средняя яркость каждого кадра тензора (0-1)"""
+    if len(stack) == 0:
+        return np.zeros(0)
+    return stack.reshape(len(stack), -1).mean(axis=1) / 255.0
+
+
 class MetricsCalculator:
     """Калькулятор метрик для оценки видео"""
     
@@ -32,6 +62,8 @@ class MetricsCalculator:
         self.clip_model = None
         self.clip_processor = None
         self.image_reward_model = None
+        # Нормализованные текстовые эмбеддинги CLIP: промпт кодируется один раз на видео
+        self._text_embeds_cache: Dict[str, torch.Tensor] = {}
         
         # Загружаем CLIP
         try:
@@ -52,6 +84,72 @@ class MetricsCalculator:
         except Exception as e:
             print(f"Ошибка загрузки ImageReward: {e}")
     
+    def encode_text(self, text: str) -> torch.Tensor:
+        """
+        Нормализованный текстовый эмбеддинг CLIP (с кэшем по тексту)
+        
+        Args:
+            text: Текстовое описание
+            
+        Returns:
+            torch.Tensor: Эмбеддинг формы (1, D)
+        """
+        cached = self._text_embeds_cache.get(text)
+        if cached is not None:
+            return cached
+        
+        with torch.no_grad():
+            inputs = self.clip_processor(
+                text=[text],
+                return_tensors="pt",
+                padding=True,
+                truncation=True
+            ).to(self.device)
+            text_embeds = self.clip_model.get_text_features(**inputs)
+            text_embeds = text_embeds / text_embeds.norm(dim=-1, keepdim=True)
+        
+        self._text_embeds_cache[text] = text_embeds
+        return text_embeds
+    
+    def calculate_clip_scores(
+        self,
+        frames: Union[Sequence[FrameLike], np.ndarray],
+        text: str,
+        batch_size: int = 16
+    ) -> List[float]:
+        """
+        Пакетный расчёт CLIPScore для набора кадров и одного промпта
+        
+        Args:
+            frames: Кадры (PIL, массивы HxWx3 или тензор NxHxWx3)
+            text: Текстовое описание
+            batch_size: Сколько кадров прогонять через CLIP за раз
+            
+        Returns:
+            List[float]: CLIPScore для каждого кадра
+        """
+        if len(frames) == 0:
+            return []
+        if self.clip_model is None or self.clip_processor is None:
+            return [0.0] * len(frames)
+        
+        try:
+            text_embeds = self.encode_text(text)
+            scores = []
+            with torch.no_grad():
+                for start in range(0, len(frames), batch_size):
+                    batch = list(frames[start:start + batch_size])
+                    inputs = self.clip_processor(images=batch, return_tensors="pt").to(self.device)
+                    image_embeds = self.clip_model.get_image_features(**inputs)
+                    image_embeds = image_embeds / image_embeds.norm(dim=-1, keepdim=True)
+                    # Cosine similarity
+                    similarity = image_embeds @ text_embeds.T
+                    scores.extend(similarity.squeeze(-1).cpu().tolist())
+            return [float(s) for s in scores]
+        except Exception as e:
+            print(f"Ошибка расчёта CLIPScore: {e}")
+            return [0.0] * len(frames)
+    
     def calculate_clip_score(
         self,
         image: Image.Image,
@@ -67,35 +165,7 @@ class MetricsCalculator:
         Returns:
             float: CLIPScore
         """
-        if self.clip_model is None or self.clip_processor is None:
-            return 0.0
-        
-        try:
-            with torch.no_grad():
-                inputs = self.clip_processor(
-                    text=[text],
-                    images=image,
-                    return_tensors="pt",
-                    padding=True
-                ).to(self.device)
-                
-                outputs = self.clip_model(**inputs)
-                
-                # Вычисляем cosine similarity
-                image_embeds = outputs.image_embeds
-                text_embeds = outputs.text_embeds
-                
-                # Нормализуем
-                image_embeds = image_embeds / image_embeds.norm(dim=-1, keepdim=True)
-                text_embeds = text_embeds / text_embeds.norm(dim=-1, keepdim=True)
-                
-                # Cosine similarity
-                similarity = (image_embeds * text_embeds).sum(dim=-1)
-                
-                return float(similarity.cpu().item())
-        except Exception as e:
-            print(f"Ошибка расчёта CLIPScore: {e}")
-            return 0.0
+        return self.calculate_clip_scores([image], text)[0]
     
     def calculate_image_reward(
         self,
@@ -135,20 +205,20 @@ class MetricsCalculator:
             print(f"Ошибка расчёта ImageReward: {e}")
             return 0.5
     
-    def extract_frames(
+    def extract_frame_array(
         self,
         video_path: str,
         frames_per_second: float = 1.0
-    ) -> List[Image.Image]:
+    ) -> np.ndarray:
         """
-        Извлечение кадров из видео
+        Извлечение кадров из видео сразу в тензор uint8 (N, H, W, 3), RGB
         
         Args:
             video_path: Путь к видео
             frames_per_second: Сколько кадров в секунду извлекать
             
         Returns:
-            List[Image.Image]: Список кадров
+            np.ndarray: Тензор кадров
         """
         frames = []
         cap = cv2.VideoCapture(video_path)
@@ -157,23 +227,85 @@ class MetricsCalculator:
             raise ValueError(f"Не удалось открыть видео: {video_path}")
         
         fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_interval = int(fps / frames_per_second) if frames_per_second > 0 else 1
+        frame_interval = max(1, int(fps / frames_per_second)) if frames_per_second > 0 else 1
         
         frame_count = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
+        # grab() продвигает поток без декодирования в массив — пропущенные кадры не конвертируются
+        while cap.grab():
             if frame_count % frame_interval == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
                 # Конвертируем BGR в RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frames.append(Image.fromarray(frame_rgb))
-            
+                frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
             frame_count += 1
         
         cap.release()
-        return frames
+        return stack_frames(frames)
+    
+    def extract_frames(
+        self,
+        video_path: str,
+        frames_per_second: float = 1.0
+    ) -> List[Image.Image]:
+        """
+        Извлечение кадров из видео
+        
+        Args:
+            video_path: Путь к видео
+            frames_per_second: Сколько кадров в секунду извлекать
+            
+        Returns:
+            List[Image.Image]: Список кадров
+        """
+        return [Image.fromarray(frame) for frame in self.extract_frame_array(video_path, frames_per_second)]
+    
+    def compute_stability(
+        self,
+        frames: Union[Sequence[FrameLike], np.ndarray],
+        static_threshold: float = 0.01,
+        dark_threshold: float = 0.1,
+        overexposure_threshold: float = 0.9,
+        jump_threshold: float = 0.3,
+        chunk_size: int = 16
+    ) -> Dict[str, Any]:
+        """
+        Все технические проверки за один векторизованный проход по тензору кадров
+        
+        Args:
+            frames: Кадры (PIL, массивы или тензор NxHxWx3 uint8)
+            static_threshold: Порог различия соседних кадров
+            dark_threshold: Порог яркости для тёмных кадров (0-1)
+            overexposure_threshold: Порог яркости для пересвеченных кадров (0-1)
+            jump_threshold: Порог изменения яркости между соседними кадрами
+            chunk_size: Размер пачки кадров при расчёте разностей (ограничивает память)
+            
+        Returns:
+            dict: Яркость, разности кадров и индексы проблемных кадров по каждой проверке
+        """
+        stack = stack_frames(frames)
+        n = len(stack)
+        
+        brightness = frame_brightness(stack)
+        
+        # Средняя абсолютная разность соседних кадров; int16 вместо float64 — в 4 раза меньше памяти
+        diffs = np.zeros(max(n - 1, 0))
+        for start in range(0, n - 1, chunk_size):
+            end = min(start + chunk_size, n - 1)
+            a = stack[start:end].astype(np.int16)
+            b = stack[start + 1:end + 1].astype(np.int16)
+            diffs[start:end] = np.abs(a - b).reshape(end - start, -1).mean(axis=1) / 255.0
+        
+        jumps = np.abs(np.diff(brightness))
+        
+        return {
+            "brightness": brightness,
+            "frame_diffs": diffs,
+            "static_indices": np.flatnonzero(diffs < static_threshold).tolist(),
+            "dark_indices": np.flatnonzero(brightness < dark_threshold).tolist(),
+            "overexposed_indices": np.flatnonzero(brightness > overexposure_threshold).tolist(),
+            "jump_indices": np.flatnonzero(jumps > jump_threshold).tolist(),
+        }
     
     def check_static_frames(
         self,
@@ -190,19 +322,7 @@ class MetricsCalculator:
         Returns:
             Tuple[bool, List[int]]: (есть ли статичные участки, индексы проблемных кадров)
         """
-        static_indices = []
-        
-        for i in range(len(frames) - 1):
-            frame1 = np.array(frames[i])
-            frame2 = np.array(frames[i + 1])
-            
-            # Вычисляем разницу
-            diff = np.abs(frame1.astype(float) - frame2.astype(float))
-            mean_diff = np.mean(diff) / 255.0
-            
-            if mean_diff < threshold:
-                static_indices.append(i)
-        
+        static_indices = self.compute_stability(frames, static_threshold=threshold)["static_indices"]
         return len(static_indices) > 0, static_indices
     
     def check_dark_frames(
@@ -220,16 +340,9 @@ class MetricsCalculator:
         Returns:
             Tuple[bool, List[int], float]: (есть ли тёмные кадры, индексы, доля)
         """
-        dark_indices = []
-        
-        for i, frame in enumerate(frames):
-            img_array = np.array(frame.convert('RGB'))
-            brightness = np.mean(img_array) / 255.0
-            
-            if brightness < threshold:
-                dark_indices.append(i)
-        
-        dark_ratio = len(dark_indices) / len(frames) if frames else 0.0
+        stack = stack_frames(frames)
+        dark_indices = np.flatnonzero(frame_brightness(stack) < threshold).tolist()
+        dark_ratio = len(dark_indices) / len(stack) if len(stack) else 0.0
         return len(dark_indices) > 0, dark_indices, dark_ratio
     
     def check_overexposed_frames(
@@ -247,16 +360,9 @@ class MetricsCalculator:
         Returns:
             Tuple[bool, List[int], float]: (есть ли пересвеченные кадры, индексы, доля)
         """
-        overexposed_indices = []
-        
-        for i, frame in enumerate(frames):
-            img_array = np.array(frame.convert('RGB'))
-            brightness = np.mean(img_array) / 255.0
-            
-            if brightness > threshold:
-                overexposed_indices.append(i)
-        
-        overexposed_ratio = len(overexposed_indices) / len(frames) if frames else 0.0
+        stack = stack_frames(frames)
+        overexposed_indices = np.flatnonzero(frame_brightness(stack) > threshold).tolist()
+        overexposed_ratio = len(overexposed_indices) / len(stack) if len(stack) else 0.0
         return len(overexposed_indices) > 0, overexposed_indices, overexposed_ratio
     
     def check_brightness_jumps(
@@ -274,18 +380,7 @@ class MetricsCalculator:
         Returns:
             Tuple[bool, List[int]]: (есть ли скачки, индексы проблемных переходов)
         """
-        jump_indices = []
-        prev_brightness = None
-        
-        for i, frame in enumerate(frames):
-            img_array = np.array(frame.convert('RGB'))
-            brightness = np.mean(img_array) / 255.0
-            
-            if prev_brightness is not None:
-                jump = abs(brightness - prev_brightness)
-                if jump > threshold:
-                    jump_indices.append(i - 1)  # Индекс первого кадра в паре
-            
-            prev_brightness = brightness
-        
+        brightness = frame_brightness(stack_frames(frames))
+        # Индекс первого кадра в паре
+        jump_indices = np.flatnonzero(np.abs(np.diff(brightness)) > threshold).tolist()
         return len(jump_indices) > 0, jump_indices